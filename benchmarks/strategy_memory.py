@@ -0,0 +1,59 @@
+# benchmarks/strategy_memory.py
+# Memoria adicional por instancia de strategy_class con y sin copia de las velas
+#
+# Uso:  python -m benchmarks.strategy_memory [--rows 1000000] [--instances 20]
+
+import argparse
+import gc
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from core.bar_pyramid import get_pyramid
+from core.indicators import atr
+from core.strategies.ict_money import strategy_class
+
+
+def synthetic_m1(rows, seed=0):
+    """Velas de M1 sinteticas (paseo aleatorio) con columna ATR"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2015-01-01", periods=rows, freq="1min")
+    close = 1.10 + np.cumsum(rng.normal(0, 0.0002, rows))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) + rng.random(rows) * 0.0002
+    low = np.minimum(open_, close) - rng.random(rows) * 0.0002
+    data = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close}, index=index)
+    data['ATR'] = atr(high, low, close, period=14)
+    return data
+
+
+def per_instance_bytes(data, instances, copy):
+    """Bytes retenidos por cada instancia viva (media sobre `instances`)"""
+    pyramid = get_pyramid(data)
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    vivas = [strategy_class(data, "EURUSD", 5, 0, 100000, pyramid=pyramid, copy=copy)
+             for _ in range(instances)]
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vivas
+    return (actual - base) / instances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por instancia de strategy_class")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--instances", type=int, default=20)
+    args = parser.parse_args()
+
+    data = synthetic_m1(args.rows)
+    print(f"Velas: {args.rows:,}  ({data.memory_usage(deep=True).sum() / 1e6:,.1f} MB)")
+    for copy in (True, False):
+        bytes_ = per_instance_bytes(data, args.instances, copy)
+        print(f"copy={copy!s:5}  {bytes_ / 1e6:10,.3f} MB por instancia")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# benchmarks/suite.py
+# Tiempos y memoria de los caminos criticos de strategy_class y del backtest
+#
+# Uso:  python -m benchmarks.suite [--sizes 1M 1Y] [--repeat 3] [--output bench_output.txt]
+#                                  [--baseline benchmarks/baseline.json] [--save-baseline]
+#                                  [--threshold 0.10] [--memory-threshold 0.10] [--fail-on-regression]
+#
+# Para cada tamaño de historico (velas de M1 sinteticas) se mide construccion,
+# remuestreo, indicadores y backtests completos. Cada caso guarda el mejor
+# tiempo de `repeat` ejecuciones y el pico de memoria de una ejecucion aparte
+# con tracemalloc (para no mezclar su sobrecoste con el tiempo). Los resultados
+# se escriben en JSON y se comparan con la linea base guardada; una regresion
+# de tiempo o de pico de memoria hace fallar --fail-on-regression.
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.strategy_memory import synthetic_m1
+from core.bar_pyramid import BarPyramid
+from core.chunked_backtest import ChunkedBacktest
+from core.indicators import atr, rsi, macd
+from core.strategies.ict_money import strategy_class
+
+# Tamaños disponibles en velas de M1
+SIZES = {
+    '1M': 31 * 1440,
+    '6M': 182 * 1440,
+    '1Y': 365 * 1440,
+    '3Y': 3 * 365 * 1440,
+    '10Y': 10 * 365 * 1440,
+}
+
+# El recorrido vela a vela se omite por encima de este tamaño
+MAX_FILAS_LOOP = 365 * 1440
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def _cases(data):
+    """Casos a medir sobre un historico: nombre -> funcion sin argumentos"""
+    high, low, close = data['high'], data['low'], data['close']
+    estrategia = strategy_class(data, "EURUSD", 5, 0, 100000)
+    piramide = {'M15': estrategia.data_m15}
+
+    casos = {
+        'construct': lambda: strategy_class(data, "EURUSD", 5, 0, 100000),
+        'construct_nocopy': lambda: strategy_class(data, "EURUSD", 5, 0, 100000,
+                                                   pyramid=piramide, copy=False),
+        'resample': lambda: BarPyramid(data),
+        'atr': lambda: atr(high, low, close, period=14),
+        'rsi': lambda: rsi(close, period=14),
+        'macd': lambda: macd(close),
+        'run_vectorized': lambda: estrategia.run(vectorized=True),
+        'run_intrabar': lambda: estrategia.run_intrabar(),
+        'run_chunked': lambda: ChunkedBacktest("EURUSD", 5, 0, 100000, chunk_rows=100_000).run_frame(data),
+    }
+    if len(data) <= MAX_FILAS_LOOP:
+        casos['run_loop'] = lambda: estrategia.run()
+    return casos
+
+
+def measure(funcion, repeat):
+    """Mejor tiempo de `repeat` ejecuciones y pico de memoria de una ejecucion extra"""
+    tiempos = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(tiempos), 'mean_seconds': float(np.mean(tiempos)), 'peak_bytes': pico}
+
+
+def run_suite(sizes, repeat=3, only=None, log=print):
+    """Ejecuta los casos de cada tamaño y devuelve {'meta', 'results'}"""
+    resultados = {}
+    for nombre in sizes:
+        filas = SIZES[nombre]
+        data = synthetic_m1(filas)
+        log(f"[{nombre}] {filas:,} velas")
+        for caso, funcion in _cases(data).items():
+            if only and caso not in only:
+                continue
+            r = measure(funcion, repeat)
+            r['rows'] = filas
+            resultados[f"{nombre}/{caso}"] = r
+            log(f"  {caso:18} {r['seconds'] * 1e3:10.1f} ms  {r['peak_bytes'] / 1e6:9.1f} MB")
+        del data
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': resultados,
+    }
+
+
+def _state(ratio, threshold, peor, mejor):
+    if ratio > 1 + threshold:
+        return peor
+    if ratio < 1 - threshold:
+        return mejor
+    return None
+
+
+def compare(actual, base, threshold=0.10, memory_threshold=0.10):
+    """Filas del informe y si hay regresiones de tiempo o de memoria.
+
+    Cada fila es (caso, base s, actual s, ratio, base bytes, actual bytes,
+    ratio de memoria, estado); los valores de la base son None en los casos nuevos.
+    """
+    filas = []
+    regresion = False
+    for caso, r in actual['results'].items():
+        b = base['results'].get(caso)
+        if b is None:
+            filas.append((caso, None, r['seconds'], None, None, r['peak_bytes'], None, 'nuevo'))
+            continue
+        ratio = r['seconds'] / b['seconds'] if b['seconds'] else float('inf')
+        ratio_mem = r['peak_bytes'] / b['peak_bytes'] if b['peak_bytes'] else float('inf')
+        estados = [e for e in (_state(ratio, threshold, 'MAS LENTO', 'mas rapido'),
+                               _state(ratio_mem, memory_threshold, 'MAS MEMORIA', 'menos memoria'))
+                   if e is not None]
+        regresion |= 'MAS LENTO' in estados or 'MAS MEMORIA' in estados
+        filas.append((caso, b['seconds'], r['seconds'], ratio, b['peak_bytes'], r['peak_bytes'],
+                      ratio_mem, ', '.join(estados) or 'igual'))
+    return filas, regresion
+
+
+def format_report(filas):
+    lineas = [f"{'caso':28} {'base ms':>10} {'actual ms':>10} {'ratio':>7} "
+              f"{'base MB':>9} {'actual MB':>9} {'ratio':>7}  estado"]
+    for caso, base, actual, ratio, base_mem, actual_mem, ratio_mem, estado in filas:
+        b = f"{base * 1e3:10.1f}" if base is not None else f"{'-':>10}"
+        r = f"{ratio:7.2f}" if ratio is not None else f"{'-':>7}"
+        bm = f"{base_mem / 1e6:9.1f}" if base_mem is not None else f"{'-':>9}"
+        rm = f"{ratio_mem:7.2f}" if ratio_mem is not None else f"{'-':>7}"
+        lineas.append(f"{caso:28} {b} {actual * 1e3:10.1f} {r} {bm} {actual_mem / 1e6:9.1f} {rm}  {estado}")
+    return "\n".join(lineas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de strategy_class y del backtest")
+    parser.add_argument("--sizes", nargs="+", default=['1M', '1Y'], choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="Casos a medir (por defecto todos)")
+    parser.add_argument("--output", default="bench_output.txt")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guarda los resultados como nueva linea base")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Variacion relativa tolerada antes de marcar una regresion")
+    parser.add_argument("--memory-threshold", type=float, default=0.10,
+                        help="Variacion relativa del pico de memoria tolerada antes de marcar una regresion")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    resultados = run_suite(args.sizes, args.repeat, args.only)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Linea base actualizada: {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+    except FileNotFoundError:
+        print(f"No hay linea base en {args.baseline}; usa --save-baseline para crearla")
+        return 0
+
+    filas, regresion = compare(resultados, base, args.threshold, args.memory_threshold)
+    print()
+    print(format_report(filas))
+    return 1 if regresion and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# core/backtest.py
+# Utilidades vectorizadas para ejecutar backtests sobre arrays de NumPy
+
+import numpy as np
+
+# Numero maximo de celdas (entradas x velas) que se evaluan en cada bloque
+MAX_CELDAS = 4_000_000
+
+# Codigos de salida
+SALIDA_NINGUNA = 0
+SALIDA_SL = 1
+SALIDA_TP = 2
+
+
+def _prices(valores):
+    """Precios como float64, o sin convertir si ya son enteros (unidades de core.fixed_point)"""
+    valores = np.asarray(valores)
+    return valores if valores.dtype.kind in 'iu' else valores.astype(np.float64, copy=False)
+
+
+def first_exit(high, low, entries, direction, stop, target, window=64):
+    """Busca para cada entrada la primera vela posterior que toca el SL o el TP.
+
+    Devuelve dos arrays: el indice de la vela de salida (-1 si nunca se toca)
+    y el motivo (SALIDA_SL / SALIDA_TP / SALIDA_NINGUNA). Si en la misma vela se
+    tocan ambos niveles se asume el SL, igual que el recorrido vela a vela.
+    Los precios pueden ser float o enteros de core.fixed_point.
+    """
+    high = _prices(high)
+    low = _prices(low)
+    entries = np.asarray(entries, dtype=np.int64)
+    direction = np.asarray(direction, dtype=np.int8)
+    stop = _prices(stop)
+    target = _prices(target)
+
+    n = len(high)
+    exit_idx = np.full(len(entries), -1, dtype=np.int64)
+    exit_kind = np.zeros(len(entries), dtype=np.int8)
+
+    # Entradas pendientes y desde que vela se sigue buscando
+    pendientes = np.arange(len(entries))
+    inicio = entries + 1
+    ventana = window
+
+    while len(pendientes):
+        # Las entradas que ya llegaron al final de los datos no se cierran
+        vivas = inicio[pendientes] < n
+        pendientes = pendientes[vivas]
+        if not len(pendientes):
+            break
+
+        # Procesamos por bloques para acotar la memoria de la matriz
+        lote = max(1, MAX_CELDAS // ventana)
+        siguientes = []
+        for a in range(0, len(pendientes), lote):
+            p = pendientes[a:a + lote]
+            idx = inicio[p][:, None] + np.arange(ventana)
+            fuera = idx >= n
+            np.minimum(idx, n - 1, out=idx)
+
+            h = high[idx]
+            l = low[idx]
+            es_largo = (direction[p] == 1)[:, None]
+            toca_sl = np.where(es_largo, l <= stop[p][:, None], h >= stop[p][:, None]) & ~fuera
+            toca_tp = np.where(es_largo, h >= target[p][:, None], l <= target[p][:, None]) & ~fuera
+
+            toca = toca_sl | toca_tp
+            hay = toca.any(axis=1)
+            primero = toca.argmax(axis=1)
+
+            filas = np.flatnonzero(hay)
+            cols = primero[filas]
+            exit_idx[p[filas]] = idx[filas, cols]
+            exit_kind[p[filas]] = np.where(toca_sl[filas, cols], SALIDA_SL, SALIDA_TP)
+
+            siguientes.append(p[~hay])
+
+        pendientes = np.concatenate(siguientes) if siguientes else pendientes[:0]
+        inicio[pendientes] += ventana
+        ventana = min(ventana * 2, 1 << 16)
+
+    return exit_idx, exit_kind
+
+
+def select_sequential(entries, exits):
+    """Filtra las entradas para que solo haya una posicion abierta a la vez.
+
+    `entries` debe estar ordenado. Una nueva entrada solo se acepta en una vela
+    estrictamente posterior a la salida de la anterior. Devuelve los indices
+    (posiciones dentro de `entries`) de las operaciones tomadas.
+    """
+    entries = np.asarray(entries, dtype=np.int64)
+    exits = np.asarray(exits, dtype=np.int64)
+
+    tomadas = []
+    pos = 0
+    # El bucle es por operacion, no por vela
+    while pos < len(entries):
+        tomadas.append(pos)
+        pos = int(np.searchsorted(entries, exits[pos], side='right'))
+    return np.asarray(tomadas, dtype=np.int64)
+
+
+def compound_equity(initial_cash, factors):
+    """Curva de capital compuesta: cash_k = cash_{k-1} * factor_k"""
+    valores = np.concatenate(([float(initial_cash)], np.asarray(factors, dtype=np.float64)))
+    return np.cumprod(valores)
+
+
+def linear_equity(initial_cash, profits):
+    """Curva de capital con lote fijo: cash_k = cash_{k-1} + profit_k"""
+    valores = np.concatenate(([float(initial_cash)], np.asarray(profits, dtype=np.float64)))
+    return np.cumsum(valores)
+
+
+def summarize(operations, initial_cash):
+    """Beneficio neto, drawdown maximo (fraccion del pico) y numero de operaciones"""
+    if hasattr(operations, 'stats'):
+        stats = operations.stats(initial_cash)
+        return {k: stats[k] for k in ('net_profit', 'max_drawdown', 'trades')}
+    equity = np.array([float(initial_cash)] + [op['cash'] for op in operations])
+    pico = np.maximum.accumulate(equity)
+    drawdown = float(((pico - equity) / pico).max())
+    return {
+        'net_profit': float(equity[-1] - initial_cash),
+        'max_drawdown': drawdown,
+        'trades': len(operations),
+    }
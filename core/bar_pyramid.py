@@ -0,0 +1,171 @@
+# core/bar_pyramid.py
+# Piramide de temporalidades (M5/M15/H1/H4/D1) derivada una sola vez de las velas de M1
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Temporalidades derivadas y su regla de pandas
+TIMEFRAMES = {
+    'M5': '5min',
+    'M15': '15min',
+    'H1': '1h',
+    'H4': '4h',
+    'D1': '1D',
+}
+
+# Agregacion de cada columna al pasar a una temporalidad mayor
+AGREGACION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'tick_volume': 'sum',
+    'real_volume': 'sum',
+    'volume': 'sum',
+}
+
+# Numero maximo de piramides que se mantienen en memoria
+MAX_PIRAMIDES = 8
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+# Clave de cada DataFrame vivo: id -> (weakref, forma, hash)
+_claves = {}
+
+
+def _columns(data):
+    """Columnas que se agregan y por tanto forman parte del hash"""
+    return [c for c in AGREGACION if c in data.columns]
+
+
+def _header(columnas):
+    """Nombres de las columnas hasheadas: mismas velas con otras columnas dan otra clave"""
+    return ','.join(columnas).encode()
+
+
+def _row_bytes(data, columnas):
+    """Serializa las velas fila a fila para que el hash admita anexar datos"""
+    filas = np.empty(len(data), dtype=[('t', '<i8')] + [(c, '<f8') for c in columnas])
+    filas['t'] = data.index.asi8
+    for c in columnas:
+        filas[c] = data[c].to_numpy(dtype=np.float64) if c in data.columns else np.nan
+    return filas.tobytes()
+
+
+class BarPyramid:
+    """Velas de M1 y todas sus temporalidades derivadas, con hash de contenido"""
+
+    def __init__(self, data):
+        self._columnas = _columns(data)
+        self._hasher = hashlib.blake2b(_header(self._columnas), digest_size=16)
+        self._hasher.update(_row_bytes(data, self._columnas))
+        self.base = data
+        self.frames = {tf: self._resample(data, regla) for tf, regla in TIMEFRAMES.items()}
+
+    @property
+    def key(self):
+        """Hash del contenido de las velas base"""
+        return self._hasher.hexdigest()
+
+    def __getitem__(self, timeframe):
+        if timeframe == 'M1':
+            return self.base
+        return self.frames[timeframe]
+
+    def slice(self, start, end, warmup='1D'):
+        """Vistas de todas las temporalidades entre start y end.
+
+        Las temporalidades mayores empiezan `warmup` antes para que los
+        calculos con ventana tengan historico desde la primera vela de M1.
+        """
+        desde = pd.Timestamp(start) - pd.Timedelta(warmup)
+        vistas = {tf: frame.loc[desde:end] for tf, frame in self.frames.items()}
+        vistas['M1'] = self.base.loc[start:end]
+        return vistas
+
+    @staticmethod
+    def _resample(data, regla):
+        """Agrega las velas de M1 a la regla indicada"""
+        agg = {c: f for c, f in AGREGACION.items() if c in data.columns}
+        return data.resample(regla).agg(agg).dropna(subset=['open', 'high', 'low', 'close'])
+
+    def extend(self, new_bars):
+        """Anexa velas nuevas de M1 recalculando solo la ultima vela de cada temporalidad"""
+        if not len(new_bars):
+            return self
+        if len(self.base) and new_bars.index[0] <= self.base.index[-1]:
+            raise ValueError("Las velas nuevas deben ser posteriores a la ultima vela existente")
+
+        self._hasher.update(_row_bytes(new_bars, self._columnas))
+        self.base = pd.concat([self.base, new_bars])
+
+        for tf, regla in TIMEFRAMES.items():
+            frame = self.frames[tf]
+            if not len(frame):
+                self.frames[tf] = self._resample(self.base, regla)
+                continue
+            # La ultima vela puede estar incompleta: se reconstruye desde su apertura
+            desde = frame.index[-1]
+            cola = self._resample(self.base.loc[desde:], regla)
+            self.frames[tf] = pd.concat([frame.iloc[:-1], cola])
+
+        # El contenido cambio: la piramide pasa a estar indexada por su nuevo hash
+        register(self)
+        return self
+
+
+def data_key(data):
+    """Hash del contenido de un DataFrame de velas.
+
+    Se memoriza por objeto (id y forma) mientras el DataFrame siga vivo, asi
+    que modificar valores en sitio sin cambiar la forma no cambia la clave.
+    """
+    memo = _claves.get(id(data))
+    if memo is not None and memo[0]() is data and memo[1] == data.shape:
+        return memo[2]
+
+    columnas = _columns(data)
+    key = hashlib.blake2b(_header(columnas) + _row_bytes(data, columnas), digest_size=16).hexdigest()
+    try:
+        ref = weakref.ref(data, lambda _, i=id(data): _claves.pop(i, None))
+    except TypeError:
+        return key
+    _claves[id(data)] = (ref, data.shape, key)
+    return key
+
+
+def get_pyramid(data):
+    """Devuelve la piramide compartida de `data`, construyendola solo la primera vez"""
+    key = data_key(data)
+    with _lock:
+        piramide = _cache.get(key)
+        if piramide is not None:
+            _cache.move_to_end(key)
+            return piramide
+
+    piramide = BarPyramid(data)
+    register(piramide)
+    return piramide
+
+
+def register(pyramid):
+    """Guarda (o reindexa tras un extend) una piramide en la cache compartida"""
+    with _lock:
+        for k in [k for k, p in _cache.items() if p is pyramid]:
+            del _cache[k]
+        _cache[pyramid.key] = pyramid
+        while len(_cache) > MAX_PIRAMIDES:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    """Vacia la cache de piramides"""
+    with _lock:
+        _cache.clear()
+    _claves.clear()
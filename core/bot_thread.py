@@ -0,0 +1,142 @@
+# core/bot_thread.py
+# Hilo del bot: ejecuta en vivo cualquier estrategia del registro sobre un simbolo
+#
+# Al arrancar crea la estrategia con create_strategy (parametros del simbolo
+# desde SymbolSpecCache) y la calienta con el historico de RateSync. Despues,
+# cada `interval` segundos sincroniza las velas de M1, pasa las cerradas
+# nuevas por on_bar y envia las señales a la OrderGateway con el volumen de
+# core.costs.position_size. Como en el backtest, solo hay una posicion
+# abierta por simbolo y estrategia (se reconoce por el comentario).
+
+import threading
+from concurrent.futures import wait
+
+import numpy as np
+import pandas as pd
+
+from core.costs import position_size
+from core.mt5_manager import MT5ConnectionError, RateSync, get_manager, get_specs
+from core.order_gateway import get_gateway
+from core.strategy_registry import create_strategy
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+
+class BotThread(threading.Thread):
+    """Estrategia registrada operando en vivo un simbolo en M1"""
+
+    def __init__(self, strategy, symbol, params=None, risk=0.01, manager=None, rate_sync=None,
+                 gateway=None, specs=None, interval=1.0, warmup_days=5, order_timeout=10.0):
+        super().__init__(name=f"Bot-{strategy}-{symbol}", daemon=True)
+        self.strategy_name = strategy
+        self.symbol = symbol
+        self.params = dict(params or {})
+        self.risk = risk
+        self.manager = manager if manager is not None else get_manager()
+        self.rate_sync = rate_sync if rate_sync is not None else RateSync(self.manager)
+        self.gateway = gateway if gateway is not None else get_gateway(manager=self.manager)
+        self.specs = specs if specs is not None else get_specs(manager=self.manager)
+        self.interval = interval
+        self.warmup_days = warmup_days
+        self.order_timeout = order_timeout
+        self.comment = strategy[:16]
+        self.strategy = None
+        self.last_bar = None
+        self.signals = []
+        self.orders = []
+        self._parar = threading.Event()
+
+    # ---------------- Ciclo ---------------- #
+    def prepare(self):
+        """Crea la estrategia y la calienta con el historico guardado"""
+        self.strategy = create_strategy(self.strategy_name, self.symbol,
+                                        **self.specs.strategy_params(self.symbol), **self.params)
+        self.rate_sync.sync(self.symbol, 'M1')
+        ultima = self.rate_sync.store.last_timestamp(self.symbol, 'M1')
+        if ultima is None:
+            raise MT5ConnectionError(f"Sin velas de {self.symbol} para arrancar {self.strategy_name}")
+        historico = self.rate_sync.frame(self.symbol, 'M1', start=ultima - pd.Timedelta(days=self.warmup_days),
+                                         sync=False)
+        self.strategy.warmup(historico)
+        self.last_bar = ultima
+        logger.info(f"{self.strategy_name} en {self.symbol} listo con {len(historico)} velas")
+        return self
+
+    def step(self):
+        """Procesa las velas cerradas nuevas; devuelve cuantas se procesaron"""
+        self.rate_sync.sync(self.symbol, 'M1')
+        nuevas = self.rate_sync.frame(self.symbol, 'M1', start=self.last_bar + pd.Timedelta('1min'),
+                                      sync=False)
+        if not len(nuevas):
+            return 0
+        columnas = [nuevas[c].to_numpy(dtype=np.float64) for c in ('open', 'high', 'low', 'close')]
+        ultima = len(nuevas) - 1
+        for i, fila in enumerate(zip(nuevas.index, *columnas)):
+            señal = self.strategy.on_bar(*fila)
+            if señal is None:
+                continue
+            self.signals.append(señal)
+            # Tras una desconexion solo se opera la señal de la ultima vela: las
+            # anteriores ya no son validas al precio actual
+            if i == ultima:
+                self._send(señal)
+        self.last_bar = nuevas.index[-1]
+        return len(nuevas)
+
+    def run(self):
+        try:
+            self.prepare()
+            while not self._parar.is_set():
+                try:
+                    self.step()
+                except MT5ConnectionError as e:
+                    logger.error(f"{self.name}: {e}")
+                self._parar.wait(self.interval)
+        except Exception as e:
+            logger.error(f"{self.name} detenido por un error: {e}")
+            raise
+
+    def stop(self, timeout=None):
+        self._parar.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    # ---------------- Ordenes ---------------- #
+    def _open_position(self):
+        """True si la estrategia ya tiene una posicion abierta en el simbolo.
+
+        Antes espera (como mucho order_timeout) a que terminen las ordenes enviadas;
+        si alguna sigue sin respuesta cuenta como posicion abierta.
+        """
+        en_curso = [f for f in self.orders if not f.done()]
+        if en_curso and wait(en_curso, timeout=self.order_timeout).not_done:
+            return True
+        posiciones = self.manager.positions(self.symbol) or ()
+        return any(getattr(p, 'comment', '').startswith(self.comment) for p in posiciones)
+
+    def _send(self, señal):
+        """Envia la señal a mercado con SL/TP; no hace nada si ya hay posicion"""
+        if self._open_position():
+            return None
+        sizing = self.specs.sizing_params(self.symbol)
+        if self.risk > 0:
+            cuenta = self.manager.account_info()
+            volumen = float(position_size(cuenta.balance, self.risk, señal['entrada'], señal['stop'],
+                                          **sizing))
+        else:
+            volumen = sizing['min_volume']
+        digitos = self.strategy.decimal
+        enviar = self.gateway.buy if señal['direccion'] == 1 else self.gateway.sell
+        future = enviar(self.symbol, volumen, sl=round(señal['stop'], digitos),
+                        tp=round(señal['objetivo'], digitos), comment=self.comment)
+        future.add_done_callback(self._sent)
+        self.orders.append(future)
+        return future
+
+    def _sent(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"{self.name}: orden rechazada: {error}")
@@ -0,0 +1,241 @@
+# core/chunked_backtest.py
+# Backtest por bloques para historicos que no caben en memoria
+#
+# Las velas llegan en bloques ordenados en el tiempo (del OHLCVStore, de un CSV
+# leido por partes, etc.). Entre bloques solo se conserva el estado necesario
+# para que el resultado sea identico al de strategy_class.run() en memoria:
+#   - ATR: indicador incremental (misma aritmetica que el calculo en bloque).
+#   - Ventanas de M1 y sesgo de M15: una cola con las ultimas velas de M1 que
+#     cubre `velas_1M` velas y `velas_15M` + 3 velas de M15 completas.
+#   - Posicion abierta y capital: se arrastran y la busqueda de SL/TP continua
+#     en el bloque siguiente.
+# La memoria maxima depende del tamaño del bloque y no de la longitud del historico.
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import first_exit, select_sequential, compound_equity, linear_equity
+from core.backtest import SALIDA_SL
+from core.bar_pyramid import BarPyramid, TIMEFRAMES
+from core.indicators import ATR
+from core.ledger import TradeLedger, SALIDAS, TIPOS
+from core.strategies.ict_money import strategy_class, LOTE_MINIMO
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Filas por bloque por defecto (~500k velas de M1 son casi un año)
+CHUNK_ROWS = 500_000
+
+
+def frame_chunks(data, rows=CHUNK_ROWS):
+    """Divide un DataFrame en bloques consecutivos de `rows` filas"""
+    for i in range(0, len(data), rows):
+        yield data.iloc[i:i + rows]
+
+
+class ChunkedBacktest:
+    """Ejecuta strategy_class sobre bloques de velas con el mismo resultado que en memoria.
+
+    Admite los mismos parametros que strategy_class (velas_15M, velas_1M,
+    ratio, risk, sessions, broker_tz). Las operaciones se acumulan en
+    `self.operations`, igual que en strategy_class.
+    """
+
+    def __init__(self, symbol, decimal, swap, tamcontrato, chunk_rows=CHUNK_ROWS, **params):
+        self.symbol = symbol
+        self.decimal = decimal
+        self.swap = swap
+        self.tamcontrato = tamcontrato
+        self.chunk_rows = chunk_rows
+        self.params = params
+        self.velas_m15 = params.get('velas_15M', 3)
+        self.velas_m1 = params.get('velas_1M', 30)
+        self.risk = params.get('risk', 0.0)
+
+        self.initial_cash = 100
+        self.escala = 1
+        self._reset()
+
+    def _reset(self):
+        self.cash = float(self.initial_cash)
+        self.operations = TradeLedger()
+        self.fecha_actual = None
+        self.chunks = 0
+        self._atr = ATR(14)
+        self._cola = None
+        self._abierta = None
+        self._ultima = None
+
+    # ---------------- Fuentes de datos ---------------- #
+    def run_frame(self, data):
+        """Backtest de un DataFrame procesado en bloques de `chunk_rows` filas"""
+        return self.run(frame_chunks(data, self.chunk_rows))
+
+    def run_store(self, store, timeframe='M1', start=None, end=None):
+        """Backtest leyendo las velas del OHLCVStore bloque a bloque"""
+        return self.run(store.chunks(self.symbol, timeframe, self.chunk_rows, start, end))
+
+    def run(self, chunks):
+        """Procesa un iterable de DataFrames consecutivos y devuelve las operaciones"""
+        self._reset()
+        for bloque in chunks:
+            if len(bloque):
+                self._process(bloque)
+
+        # Igual que en memoria: la posicion que sigue abierta se cierra en la ultima vela
+        if self._abierta is not None:
+            fecha, cierre = self._ultima
+            self._close(fecha, cierre, 0)
+        return self.operations
+
+    # ---------------- Bloques ---------------- #
+    def _extended(self, bloque):
+        """Bloque precedido de la cola del anterior, con ATR incremental"""
+        bloque = bloque.copy()
+        if 'ATR' not in bloque.columns:
+            bloque['ATR'] = self._atr.update_batch(bloque['high'], bloque['low'], bloque['close'])
+        if self._cola is None:
+            return bloque, 0
+        return pd.concat([self._cola, bloque[self._cola.columns]]), len(self._cola)
+
+    def _tail(self, ext):
+        """Ultimas velas necesarias para las ventanas de M1 y M15 del bloque siguiente"""
+        cubetas = ext.index.floor(TIMEFRAMES['M15'])
+        inicios = np.flatnonzero(np.r_[True, cubetas[1:] != cubetas[:-1]])
+        necesarias = self.velas_m15 + 3
+        desde = inicios[-necesarias] if len(inicios) >= necesarias else 0
+        desde = min(desde, max(len(ext) - self.velas_m1, 0))
+        return ext.iloc[desde:].copy()
+
+    def _process(self, bloque):
+        ext, t0 = self._extended(bloque)
+        m15 = BarPyramid._resample(ext, TIMEFRAMES['M15'])
+        estrategia = strategy_class(ext, self.symbol, self.decimal, self.swap, self.tamcontrato,
+                                    pyramid={'M15': m15}, copy=False, **self.params)
+        s = estrategia._signals()
+        self.escala = estrategia.escala
+
+        high, low, close = estrategia._prices()
+        index = ext.index
+        n = len(ext)
+        if self.operations.tz is None and index.tz is not None:
+            self.operations.tz = str(index.tz)
+
+        # Posicion arrastrada del bloque anterior: el SL/TP se busca desde la primera vela nueva
+        desde = t0
+        if self._abierta is not None:
+            a = self._abierta
+            salida, motivo = first_exit(high, low, [t0 - 1], [a['direccion']], [a['sl']], [a['tp']])
+            if salida[0] >= 0:
+                x = int(salida[0])
+                precio = a['sl'] if motivo[0] == SALIDA_SL else a['tp']
+                self._close(index[x], precio, int(motivo[0]))
+                desde = x + 1
+            else:
+                desde = n
+
+        entradas = np.flatnonzero(s['direccion'][desde:]) + desde
+        if len(entradas):
+            self._trades(s, entradas, high, low, close, index)
+
+        self.fecha_actual = index[-1]
+        self._ultima = (index[-1], close[-1].item())
+        self._cola = self._tail(ext)
+        self.chunks += 1
+
+    def _trades(self, s, entradas, high, low, close, index):
+        """Operaciones del bloque; la ultima puede quedar abierta para el siguiente"""
+        n = len(index)
+        direccion = s['direccion'][entradas]
+        stop = s['stop'][entradas]
+        objetivo = s['objetivo'][entradas]
+        salida, motivo = first_exit(high, low, entradas, direccion, stop, objetivo)
+
+        # Sin salida dentro del bloque: ninguna entrada posterior puede tomarse
+        salida = np.where(salida < 0, n, salida)
+        tomadas = select_sequential(entradas, salida)
+        abierta = None
+        if salida[tomadas[-1]] == n:
+            abierta, tomadas = tomadas[-1], tomadas[:-1]
+
+        if len(tomadas):
+            e = entradas[tomadas]
+            d = direccion[tomadas].astype(np.float64)
+            precio_entrada = s['entrada'][e]
+            sl = stop[tomadas]
+            tp = objetivo[tomadas]
+            x = salida[tomadas]
+            m = motivo[tomadas]
+            precio_salida = np.where(m == SALIDA_SL, sl, tp)
+
+            movimiento = d * (precio_salida - precio_entrada)
+            if self.risk > 0:
+                distancia = d * (precio_entrada - sl)
+                equity = compound_equity(self.cash, 1 + self.risk * (movimiento / distancia))
+                lotes = equity[:-1] * self.risk / (distancia / self.escala * self.tamcontrato)
+            else:
+                lotes = np.full(len(e), LOTE_MINIMO)
+                equity = linear_equity(self.cash, movimiento / self.escala * lotes * self.tamcontrato)
+
+            self.operations.extend(
+                index=index,
+                tipo=direccion[tomadas],
+                fecha_entrada=e,
+                precio_entrada=precio_entrada / self.escala,
+                sl=sl / self.escala,
+                tp=tp / self.escala,
+                lotes=lotes,
+                fecha_salida=x,
+                precio_salida=precio_salida / self.escala,
+                salida=m,
+                profit=np.diff(equity),
+                cash=equity[1:],
+            )
+            self.cash = float(equity[-1])
+
+        if abierta is not None:
+            i = entradas[abierta]
+            d = int(direccion[abierta])
+            entrada = s['entrada'][i].item()
+            sl = stop[abierta].item()
+            if self.risk > 0:
+                lotes = self.cash * self.risk / ((d * (entrada - sl)) / self.escala * self.tamcontrato)
+            else:
+                lotes = LOTE_MINIMO
+            self._abierta = {
+                'direccion': d,
+                'fecha_entrada': index[i],
+                'precio_entrada': entrada,
+                'sl': sl,
+                'tp': objetivo[abierta].item(),
+                'lotes': float(lotes),
+            }
+
+    def _close(self, fecha, precio, motivo):
+        """Cierra la posicion arrastrada con la misma aritmetica que strategy_class"""
+        a = self._abierta
+        d = a['direccion']
+        precio = precio.item() if hasattr(precio, 'item') else precio
+        movimiento = d * (precio - a['precio_entrada'])
+        if self.risk > 0:
+            distancia = d * (a['precio_entrada'] - a['sl'])
+            nuevo_cash = self.cash * (1 + self.risk * (movimiento / distancia))
+        else:
+            nuevo_cash = self.cash + movimiento / self.escala * a['lotes'] * self.tamcontrato
+
+        self.operations.append({
+            'tipo': TIPOS[a['direccion']],
+            'fecha_entrada': a['fecha_entrada'],
+            'precio_entrada': a['precio_entrada'] / self.escala,
+            'sl': a['sl'] / self.escala,
+            'tp': a['tp'] / self.escala,
+            'lotes': a['lotes'],
+            'fecha_salida': fecha,
+            'precio_salida': precio / self.escala,
+            'salida': SALIDAS[motivo],
+            'profit': float(nuevo_cash - self.cash),
+            'cash': float(nuevo_cash),
+        })
+        self.cash = float(nuevo_cash)
+        self._abierta = None
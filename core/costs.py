@@ -0,0 +1,112 @@
+# core/costs.py
+# Tamaño de posicion, valor del pip, comisiones y swaps calculados en bloque
+#
+# Todas las funciones reciben arrays (una posicion por operacion) y devuelven
+# arrays, de modo que el coste de 100k operaciones es una decena de operaciones
+# de NumPy. Los importes estan en la divisa de cotizacion del simbolo; si la
+# cuenta esta en otra divisa se pasa `conversion` (cotizacion -> cuenta).
+#
+# Swap: MT5 lo cobra en cada rollover (medianoche del servidor del broker) de
+# lunes a viernes, y el miercoles se cobra triple para cubrir el fin de semana.
+# `swap` va en puntos por lote y noche, igual que SYMBOL_SWAP_LONG/SHORT.
+
+import numpy as np
+import pandas as pd
+
+DIA_NS = 86_400 * 10**9
+
+# Noches de swap cobradas en el rollover de cada dia (lunes = 0)
+PESO_ROLLOVER = np.array([1, 1, 3, 1, 1, 0, 0], dtype=np.int64)
+_PESO_SEMANA = int(PESO_ROLLOVER.sum())
+_PESO_PREVIO = np.concatenate(([0], np.cumsum(PESO_ROLLOVER)[:-1]))
+
+# El 1970-01-01 fue jueves
+_DESFASE_EPOCH = 3
+
+
+def point(decimal):
+    """Tamaño del punto del simbolo"""
+    return 10.0 ** -decimal
+
+
+def pip_size(decimal):
+    """Tamaño del pip: 10 puntos en simbolos de 3 o 5 decimales"""
+    return point(decimal) * (10 if decimal in (3, 5) else 1)
+
+
+def pip_value(lots, decimal, tamcontrato, conversion=1.0):
+    """Valor monetario de un pip para cada volumen"""
+    return np.asarray(lots, dtype=np.float64) * tamcontrato * pip_size(decimal) * conversion
+
+
+def position_size(cash, risk, entry, stop, tamcontrato, conversion=1.0,
+                  min_volume=0.01, step=0.01, max_volume=None):
+    """Lotes que arriesgan `risk` de `cash` entre la entrada y el SL.
+
+    El volumen se redondea hacia abajo al `step` del broker y se limita a
+    [min_volume, max_volume]. Las distancias nulas devuelven min_volume.
+    """
+    distancia = np.abs(np.asarray(entry, dtype=np.float64) - np.asarray(stop, dtype=np.float64))
+    riesgo = np.asarray(cash, dtype=np.float64) * risk
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lotes = riesgo / (distancia * tamcontrato * conversion)
+    # Pequeño margen para que 0.03 / 0.01 no quede en 2.999...
+    lotes = np.floor(lotes / step + 1e-9) * step
+    lotes = np.where(np.isfinite(lotes), lotes, min_volume)
+    return np.clip(lotes, min_volume, max_volume if max_volume is not None else np.inf)
+
+
+def commission(lots, per_lot):
+    """Comision de ida y vuelta (per_lot por lote operado, en la divisa de la cuenta)"""
+    return np.asarray(lots, dtype=np.float64) * per_lot
+
+
+def _server_days(fechas_ns, broker_tz):
+    """Dia del servidor del broker (dias desde 1970-01-01) de cada fecha en ns UTC"""
+    fechas = pd.DatetimeIndex(np.asarray(fechas_ns, dtype=np.int64).view('M8[ns]'))
+    if broker_tz not in (None, 'UTC'):
+        fechas = fechas.tz_localize('UTC').tz_convert(broker_tz).tz_localize(None)
+    return fechas.as_unit('ns').asi8 // DIA_NS
+
+
+def _cumulative_nights(dias):
+    """Noches cobradas en los rollovers anteriores al dia indicado"""
+    s = dias + _DESFASE_EPOCH
+    return (s // 7) * _PESO_SEMANA + _PESO_PREVIO[s % 7]
+
+
+def rollover_nights(entry_ns, exit_ns, broker_tz='UTC'):
+    """Noches de swap (miercoles triple) entre la entrada y la salida de cada operacion"""
+    entrada = _server_days(entry_ns, broker_tz)
+    salida = _server_days(exit_ns, broker_tz)
+    return _cumulative_nights(salida) - _cumulative_nights(entrada)
+
+
+def swap_cost(direction, lots, nights, swap, decimal, tamcontrato, conversion=1.0):
+    """Swap de cada operacion. `swap` es un valor o (largo, corto) en puntos por lote"""
+    direction = np.asarray(direction)
+    largo, corto = swap if isinstance(swap, (tuple, list)) else (swap, swap)
+    puntos = np.where(direction == 1, largo, corto)
+    return puntos * point(decimal) * tamcontrato * np.asarray(lots, dtype=np.float64) \
+        * np.asarray(nights) * conversion
+
+
+def trade_costs(operations, decimal, swap, tamcontrato, commission_per_lot=0.0,
+                broker_tz='UTC', conversion=1.0):
+    """Costes de todas las operaciones de un TradeLedger (o de sus filas).
+
+    Devuelve un dict de arrays: pip_value, nights, swap, commission y
+    net_profit (profit + swap - commission).
+    """
+    filas = operations.rows if hasattr(operations, 'rows') else operations
+    lotes = filas['lotes']
+    noches = rollover_nights(filas['fecha_entrada'], filas['fecha_salida'], broker_tz)
+    swaps = swap_cost(filas['tipo'], lotes, noches, swap, decimal, tamcontrato, conversion)
+    comisiones = commission(lotes, commission_per_lot)
+    return {
+        'pip_value': pip_value(lotes, decimal, tamcontrato, conversion),
+        'nights': noches,
+        'swap': swaps,
+        'commission': comisiones,
+        'net_profit': filas['profit'] + swaps - comisiones,
+    }
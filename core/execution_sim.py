@@ -0,0 +1,334 @@
+# core/execution_sim.py
+# Simulador de ejecucion dentro de la vela para ordenes limit/stop con SL y TP
+#
+# Las ordenes pendientes y los SL/TP de las posiciones abiertas son disparadores
+# de precio guardados en dos colas de prioridad:
+#   - _up:   se disparan cuando el precio SUBE hasta el nivel (buy stop, sell
+#            limit, TP de compras, SL de ventas). Min-heap por nivel.
+#   - _down: se disparan cuando el precio BAJA hasta el nivel (sell stop, buy
+#            limit, SL de compras, TP de ventas). Max-heap por nivel.
+# Cada vela se recorre como open -> low -> high -> close si es alcista y
+# open -> high -> low -> close si es bajista. Entre eventos el simulador salta
+# directamente a la siguiente vela que alcanza algun nivel con una busqueda
+# vectorizada, por lo que el coste depende del numero de eventos y no de velas.
+
+import heapq
+import itertools
+
+import numpy as np
+
+from core.ledger import TradeLedger
+
+# Tipos de disparador
+_ENTRADA = 0
+_SL = 1
+_TP = 2
+
+# Motivos de salida (mismos codigos que core.backtest / core.ledger)
+SALIDA_FIN = 0
+SALIDA_SL = 1
+SALIDA_TP = 2
+
+# Tamaño inicial de la ventana de busqueda del siguiente evento
+_VENTANA = 256
+
+
+class Order:
+    """Orden pendiente. `rr` calcula el TP al llenarse y `risk` el volumen"""
+
+    __slots__ = ('id', 'side', 'kind', 'price', 'sl', 'tp', 'rr', 'volume', 'risk',
+                 'bar', 'expires', 'state', 'position')
+
+    def __init__(self, id, side, kind, price, sl, tp, rr, volume, risk, bar, expires):
+        self.id = id
+        self.side = side
+        self.kind = kind
+        self.price = price
+        self.sl = sl
+        self.tp = tp
+        self.rr = rr
+        self.volume = volume
+        self.risk = risk
+        self.bar = bar
+        self.expires = expires
+        self.state = 'pending'
+        self.position = None
+
+
+class Position:
+    """Posicion abierta a partir de una orden llenada"""
+
+    __slots__ = ('order', 'side', 'entry', 'sl', 'tp', 'volume', 'bar', 'open')
+
+    def __init__(self, order, side, entry, sl, tp, volume, bar):
+        self.order = order
+        self.side = side
+        self.entry = entry
+        self.sl = sl
+        self.tp = tp
+        self.volume = volume
+        self.bar = bar
+        self.open = True
+
+
+class ExecutionSimulator:
+    """Ejecuta ordenes sobre las velas de M1 (o ticks como velas de un precio)"""
+
+    def __init__(self, data, tamcontrato, cash=100, splipage=None, min_volume=0.01):
+        self.index = data.index
+        self.open = data['open'].to_numpy(dtype=np.float64)
+        self.high = data['high'].to_numpy(dtype=np.float64)
+        self.low = data['low'].to_numpy(dtype=np.float64)
+        self.close = data['close'].to_numpy(dtype=np.float64)
+        if splipage is None:
+            splipage = np.zeros(len(self.close))
+        self.splipage = np.asarray(splipage, dtype=np.float64)
+        self.splipage = np.where(np.isnan(self.splipage), 0.0, self.splipage)
+
+        self.tamcontrato = tamcontrato
+        self.cash = float(cash)
+        self.initial_cash = self.cash
+        self.min_volume = min_volume
+
+        self.operations = TradeLedger(tz=getattr(self.index, 'tz', None))
+        self.orders = {}
+        self.positions = []
+        self.bar = -1
+        # Ordenes en estado 'pending' (activadas o no): flat no recorre los heaps
+        self._pendientes = 0
+
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._up = []
+        self._down = []
+        self._activaciones = []
+        self._expiraciones = []
+
+    # ---------------- Ordenes ---------------- #
+    def submit(self, side, kind='market', price=None, sl=None, tp=None, rr=None,
+               volume=None, risk=None, bar=None, expires=None):
+        """Registra una orden que se activa en la vela `bar` (por defecto la siguiente).
+
+        side: 1 compra / -1 venta. kind: 'market', 'limit' o 'stop'.
+        Si se da `rr` el TP se coloca a rr veces la distancia al SL desde el
+        precio de llenado; si se da `risk` el volumen arriesga esa fraccion del
+        capital. `expires` es la ultima vela en que la orden puede llenarse.
+        """
+        if kind not in ('market', 'limit', 'stop'):
+            raise ValueError(f"Tipo de orden desconocido: {kind}")
+        if kind != 'market' and price is None:
+            raise ValueError("Las ordenes limit/stop necesitan precio")
+
+        bar = self.bar + 1 if bar is None else int(bar)
+        orden = Order(next(self._ids), int(side), kind, price, sl, tp, rr, volume, risk, bar, expires)
+        self.orders[orden.id] = orden
+        self._pendientes += 1
+        heapq.heappush(self._activaciones, (bar, next(self._seq), orden))
+        if expires is not None:
+            heapq.heappush(self._expiraciones, (int(expires), next(self._seq), orden))
+        return orden.id
+
+    def cancel(self, order_id):
+        """Cancela una orden pendiente (sus disparadores se descartan al salir del heap)"""
+        orden = self.orders.get(order_id)
+        if orden is not None:
+            self._resolve(orden, 'cancelled')
+
+    @property
+    def flat(self):
+        """True si no hay posiciones abiertas ni ordenes pendientes"""
+        return not self.positions and not self._pendientes
+
+    def _resolve(self, orden, estado):
+        """Saca una orden del estado 'pending'"""
+        if orden.state == 'pending':
+            self._pendientes -= 1
+            orden.state = estado
+
+    # ---------------- Disparadores ---------------- #
+    def _push(self, nivel, sube, tipo, objeto):
+        if sube:
+            heapq.heappush(self._up, (nivel, next(self._seq), tipo, objeto))
+        else:
+            heapq.heappush(self._down, (-nivel, next(self._seq), tipo, objeto))
+
+    @staticmethod
+    def _alive(tipo, objeto):
+        if tipo == _ENTRADA:
+            return objeto.state == 'pending'
+        return objeto.open
+
+    def _live_top(self, heap):
+        """Descarta disparadores muertos de la cima y devuelve la cima viva"""
+        while heap and not self._alive(heap[0][2], heap[0][3]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _activate(self, orden, i):
+        """Coloca la orden en su cola o la llena a mercado en la apertura"""
+        if orden.state != 'pending':
+            return
+        if orden.kind == 'market':
+            self._fill(orden, self.open[i] + orden.side * self.splipage[i], i)
+            return
+        # Compra stop y venta limit se disparan al subir; el resto al bajar
+        sube = (orden.kind == 'stop') == (orden.side == 1)
+        self._push(orden.price, sube, _ENTRADA, orden)
+
+    def _fill(self, orden, precio, i):
+        """Convierte la orden en posicion y coloca su SL y TP"""
+        side = orden.side
+        tp = orden.tp
+        distancia = side * (precio - orden.sl) if orden.sl is not None else None
+        if orden.rr is not None and distancia is not None:
+            tp = precio + side * orden.rr * distancia
+
+        volumen = orden.volume
+        if volumen is None:
+            if orden.risk and distancia is not None and distancia > 0:
+                volumen = self.cash * orden.risk / (distancia * self.tamcontrato)
+            elif orden.risk:
+                # El precio de llenado ya esta al otro lado del SL
+                self._resolve(orden, 'rejected')
+                return
+            else:
+                volumen = self.min_volume
+
+        self._resolve(orden, 'filled')
+        posicion = Position(orden, side, float(precio), orden.sl, tp, float(volumen), i)
+        orden.position = posicion
+        self.positions.append(posicion)
+        if orden.sl is not None:
+            self._push(orden.sl, side == -1, _SL, posicion)
+        if tp is not None:
+            self._push(tp, side == 1, _TP, posicion)
+
+    def _exit(self, posicion, precio, i, motivo):
+        """Cierra la posicion y la registra en el ledger"""
+        posicion.open = False
+        self.positions.remove(posicion)
+        profit = posicion.side * (precio - posicion.entry) * posicion.volume * self.tamcontrato
+        self.cash += profit
+        self.operations.append({
+            'tipo': 'buy' if posicion.side == 1 else 'sell',
+            'fecha_entrada': self.index[posicion.bar],
+            'precio_entrada': posicion.entry,
+            'sl': posicion.sl if posicion.sl is not None else np.nan,
+            'tp': posicion.tp if posicion.tp is not None else np.nan,
+            'lotes': posicion.volume,
+            'fecha_salida': self.index[i],
+            'precio_salida': float(precio),
+            'salida': {SALIDA_SL: 'sl', SALIDA_TP: 'tp'}.get(motivo, 'fin'),
+            'profit': float(profit),
+            'cash': self.cash,
+        })
+
+    def _fire(self, tipo, objeto, nivel, i, gap):
+        """Ejecuta un disparador alcanzado. Con gap el precio es la apertura"""
+        slip = self.splipage[i]
+        if tipo == _ENTRADA:
+            precio = self.open[i] if gap else nivel
+            if objeto.kind == 'stop':
+                precio += objeto.side * slip
+            self._fill(objeto, precio, i)
+        elif tipo == _SL:
+            precio = (self.open[i] if gap else nivel) - objeto.side * slip
+            self._exit(objeto, precio, i, SALIDA_SL)
+        else:
+            self._exit(objeto, self.open[i] if gap else nivel, i, SALIDA_TP)
+
+    def _sweep(self, precio, sube, i, gap=False):
+        """Dispara todo lo alcanzado al mover el precio hasta `precio`"""
+        disparos = 0
+        if sube:
+            while True:
+                top = self._live_top(self._up)
+                if top is None or top[0] > precio:
+                    break
+                heapq.heappop(self._up)
+                self._fire(top[2], top[3], top[0], i, gap)
+                disparos += 1
+        else:
+            while True:
+                top = self._live_top(self._down)
+                if top is None or -top[0] < precio:
+                    break
+                heapq.heappop(self._down)
+                self._fire(top[2], top[3], -top[0], i, gap)
+                disparos += 1
+        return disparos
+
+    # ---------------- Recorrido ---------------- #
+    def _process_bar(self, i):
+        """Activaciones, caducidades y recorrido del precio dentro de la vela i"""
+        while self._expiraciones and self._expiraciones[0][0] < i:
+            _, _, orden = heapq.heappop(self._expiraciones)
+            self._resolve(orden, 'expired')
+
+        while self._activaciones and self._activaciones[0][0] <= i:
+            _, _, orden = heapq.heappop(self._activaciones)
+            self._activate(orden, i)
+
+        o, h, l, c = self.open[i], self.high[i], self.low[i], self.close[i]
+
+        # Huecos en la apertura: todo lo que ya quedo atras se llena a la apertura
+        while self._sweep(o, True, i, gap=True) + self._sweep(o, False, i, gap=True):
+            pass
+
+        camino = (l, h, c) if c >= o else (h, l, c)
+        previo = o
+        for punto in camino:
+            if punto != previo:
+                self._sweep(punto, punto > previo, i)
+            previo = punto
+        self.bar = i
+
+    def _next_event(self, desde, hasta):
+        """Primera vela >= desde en la que puede ocurrir algo (o hasta + 1)"""
+        siguiente = hasta + 1
+        if self._activaciones:
+            siguiente = min(siguiente, max(desde, self._activaciones[0][0]))
+        if self._expiraciones:
+            siguiente = min(siguiente, max(desde, self._expiraciones[0][0] + 1))
+
+        arriba = self._live_top(self._up)
+        abajo = self._live_top(self._down)
+        if arriba is None and abajo is None:
+            return siguiente
+
+        nivel_up = arriba[0] if arriba is not None else np.inf
+        nivel_down = -abajo[0] if abajo is not None else -np.inf
+
+        # Busqueda vectorizada en ventanas crecientes
+        inicio = desde
+        ventana = _VENTANA
+        while inicio < siguiente:
+            fin = min(inicio + ventana, siguiente)
+            toca = (self.high[inicio:fin] >= nivel_up) | (self.low[inicio:fin] <= nivel_down)
+            k = int(toca.argmax())
+            if toca[k]:
+                return inicio + k
+            inicio = fin
+            ventana *= 2
+        return siguiente
+
+    def run(self, until=None, stop_when_flat=False):
+        """Procesa velas hasta `until` (incluida) o hasta quedar sin posiciones ni ordenes"""
+        ultima = len(self.close) - 1 if until is None else min(int(until), len(self.close) - 1)
+        i = self.bar + 1
+        while i <= ultima:
+            i = self._next_event(i, ultima)
+            if i > ultima:
+                break
+            self._process_bar(i)
+            if stop_when_flat and self.flat:
+                return self
+            i += 1
+        self.bar = max(self.bar, ultima)
+        return self
+
+    def close_all(self, bar=None):
+        """Cierra las posiciones abiertas al cierre de la vela indicada"""
+        i = self.bar if bar is None else int(bar)
+        for posicion in list(self.positions):
+            self._exit(posicion, self.close[i], i, SALIDA_FIN)
@@ -0,0 +1,41 @@
+# core/fixed_point.py
+# Precios en punto fijo: enteros int64 en millonesimas de punto del simbolo
+#
+# Representacion: un precio p con `decimal` digitos se guarda como
+# round(p * 10**decimal) * SUBPOINTS, es decir, en unidades de 1e-6 puntos.
+# Los precios de las velas son siempre un numero entero de puntos; la
+# entrada y el TP llevan ademas el slippage (una fraccion de punto derivada
+# del ATR), que se conserva con esa resolucion en lugar de redondearse.
+#
+# Compromisos:
+#   - Cada precio ocupa 8 bytes, igual que un float64: no ahorra memoria.
+#   - Solo los niveles (high/low/close, SL, entrada, TP) son enteros; los
+#     indicadores (ATR, splipage) se calculan en float y se convierten una
+#     vez al construir las señales.
+#   - A cambio, comparar niveles (SL/TP contra maximos y minimos) es una
+#     comparacion exacta de enteros y los caminos en bucle, vectorizado y por
+#     bloques dan ledgers identicos. La conversion a float se hace solo al
+#     escribir resultados (ledger, DataFrames).
+#   - Rango: con 5 decimales y SUBPOINTS = 1e6 caben precios de hasta ~9e7.
+
+import numpy as np
+
+# Unidades internas por punto: resolucion del slippage, la entrada y el TP
+SUBPOINTS = 10 ** 6
+
+
+def scale(decimal):
+    """Unidades internas por unidad de precio"""
+    return 10 ** int(decimal) * SUBPOINTS
+
+
+def to_points(values, decimal):
+    """Precios del broker (float) a unidades internas int64, redondeando al punto mas cercano"""
+    valores = np.asarray(values, dtype=np.float64)
+    return np.rint(valores * 10 ** int(decimal)).astype(np.int64) * SUBPOINTS
+
+
+def to_units(values, decimal):
+    """Distancias (float) a unidades internas int64, sin redondear al punto"""
+    valores = np.asarray(values, dtype=np.float64)
+    return np.rint(valores * scale(decimal)).astype(np.int64)
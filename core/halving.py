@@ -0,0 +1,139 @@
+# core/halving.py
+# Busqueda de parametros con successive halving / Hyperband
+#
+# En lugar de probar toda la rejilla sobre todo el historico, cada "peldaño"
+# evalua las combinaciones vivas sobre el tramo final del historico y solo
+# pasa al siguiente la mejor fraccion 1/eta. Cada peldaño usa un tramo eta
+# veces mas largo, hasta llegar al historico completo. Los peldaños se
+# reparten en el mismo pool de procesos que ParameterSweep (velas compartidas
+# una sola vez; cada tarea envia sus parametros y el tramo).
+
+import math
+import os
+
+import numpy as np
+
+from core.indicators import atr
+from core.optimizer import worker_pool, run_task
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+
+class SuccessiveHalving:
+    """Successive halving sobre una rejilla de parametros.
+
+    `min_fraction` es la fraccion del historico del primer peldaño (por
+    defecto la necesaria para que la rejilla se reduzca a una combinacion en
+    el ultimo). `history` guarda los resultados de cada peldaño.
+    """
+
+    def __init__(self, data, symbol, decimal, swap, tamcontrato, grid, eta=3,
+                 min_fraction=None, workers=None, sort_key='net_profit', strategy='ict_money'):
+        if 'ATR' not in data.columns:
+            data = data.assign(ATR=atr(data['high'], data['low'], data['close'], period=14))
+        self.data = data
+        self.symbol = symbol
+        self.decimal = decimal
+        self.swap = swap
+        self.tamcontrato = tamcontrato
+        self.grid = list(grid)
+        self.eta = eta
+        if min_fraction is None:
+            peldaños = max(0, int(math.log(max(len(self.grid), 1), eta) + 1e-9))
+            min_fraction = float(eta) ** -peldaños
+        self.min_fraction = min_fraction
+        self.workers = workers or os.cpu_count() or 1
+        self.sort_key = sort_key
+        self.strategy = strategy
+        self.history = []
+        self.ranking = []
+        # Coste de la ultima ejecucion en historicos completos (la rejilla exhaustiva cuesta len(grid))
+        self.cost = 0.0
+
+    def fractions(self):
+        """Fraccion del historico usada en cada peldaño (la ultima siempre 1)"""
+        fracciones = []
+        f = self.min_fraction
+        while f < 1:
+            fracciones.append(f)
+            f *= self.eta
+        fracciones.append(1.0)
+        return fracciones
+
+    def _rung(self, pool, configs, fraccion):
+        """Evalua las combinaciones sobre el tramo final del historico"""
+        n = len(self.data)
+        inicio = n - max(int(n * fraccion), 1)
+        tareas = [(params, (inicio, n)) for params in configs]
+        chunksize = max(1, len(tareas) // (self.workers * 8))
+        resultados = pool.map(run_task, tareas, chunksize=chunksize)
+        resultados.sort(key=lambda r: r[self.sort_key], reverse=True)
+        return resultados
+
+    def run(self, pool=None):
+        """Ejecuta todos los peldaños y devuelve el ranking del ultimo"""
+        if pool is None:
+            with worker_pool(self.data, self.symbol, self.decimal, self.swap, self.tamcontrato,
+                             self.workers, self.strategy) as pool:
+                return self.run(pool)
+
+        self.history = []
+        vivas = self.grid
+        evaluaciones = 0.0
+        for peldaño, fraccion in enumerate(self.fractions()):
+            resultados = self._rung(pool, vivas, fraccion)
+            evaluaciones += len(vivas) * fraccion
+            self.history.append({'rung': peldaño, 'fraction': fraccion, 'results': resultados})
+            logger.info(f"Peldaño {peldaño}: {len(vivas)} combinaciones sobre "
+                        f"{fraccion:.1%} del historico")
+            vivas = [r['params'] for r in resultados[:max(1, len(resultados) // self.eta)]]
+
+        self.ranking = self.history[-1]['results']
+        self.cost = evaluaciones
+        return self.ranking
+
+    def best(self, n=10):
+        return self.ranking[:n]
+
+
+def hyperband(data, symbol, decimal, swap, tamcontrato, grid, eta=3, max_rungs=None,
+              workers=None, sort_key='net_profit', seed=None, strategy='ict_money'):
+    """Hyperband: varias rondas de successive halving con distinto compromiso
+    entre numero de combinaciones y longitud del primer tramo.
+
+    Las combinaciones de cada ronda se muestrean de `grid` sin reemplazo.
+    Devuelve el ranking conjunto de todas las combinaciones evaluadas sobre el
+    historico completo, con cada combinacion una sola vez.
+    """
+    grid = list(grid)
+    rng = np.random.default_rng(seed)
+    if max_rungs is None:
+        max_rungs = max(0, int(math.log(max(len(grid), 1), eta) + 1e-9))
+    if 'ATR' not in data.columns:
+        data = data.assign(ATR=atr(data['high'], data['low'], data['close'], period=14))
+
+    # Una combinacion puede salir en varias rondas: se guarda la evaluada con mas historico
+    mejores = {}
+    with worker_pool(data, symbol, decimal, swap, tamcontrato, workers, strategy) as pool:
+        for s in range(max_rungs, -1, -1):
+            n = min(len(grid), int(math.ceil((max_rungs + 1) / (s + 1) * eta ** s)))
+            muestra = [grid[i] for i in rng.choice(len(grid), size=n, replace=False)]
+            ronda = SuccessiveHalving(data, symbol, decimal, swap, tamcontrato, muestra, eta=eta,
+                                      min_fraction=float(eta) ** -s, workers=workers,
+                                      sort_key=sort_key, strategy=strategy)
+            ronda.run(pool)
+            ultimo = ronda.history[-1]
+            for r in ultimo['results']:
+                clave = _params_key(r['params'])
+                if clave not in mejores or ultimo['fraction'] > mejores[clave][0]:
+                    mejores[clave] = (ultimo['fraction'], r)
+
+    ranking = [r for _, r in mejores.values()]
+    ranking.sort(key=lambda r: r[sort_key], reverse=True)
+    return ranking
+
+
+def _params_key(params):
+    """Clave hashable de un diccionario de parametros"""
+    return tuple(sorted((k, repr(v)) for k, v in params.items()))
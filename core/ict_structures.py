@@ -0,0 +1,250 @@
+# core/ict_structures.py
+# Deteccion de estructuras ICT: swings, fair value gaps, ruptura de estructura y order blocks
+#
+# detect() recorre todo el historico con operaciones vectorizadas y
+# StructureTracker hace lo mismo vela a vela; ambos devuelven los mismos eventos.
+#
+# Definiciones (k = lookback):
+#   Swing alto en i:  high[i] > max(high[i-k:i]) y high[i] >= max(high[i+1:i+k+1]).
+#                     Se confirma en la vela i+k. El swing bajo es simetrico.
+#   FVG alcista en j: low[j] > high[j-2]  -> zona [high[j-2], low[j]], origen j-1.
+#   FVG bajista en j: high[j] < low[j-2]  -> zona [high[j], low[j-2]], origen j-1.
+#   BOS alcista en j: primer cierre por encima del ultimo swing alto confirmado
+#                     antes de j (cada swing se rompe una sola vez).
+#   Order block:      ultima vela de color contrario anterior a la vela del BOS.
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Formato de todos los eventos
+EVENT_DTYPE = np.dtype([
+    ('index', 'i8'),       # vela en la que el evento queda confirmado
+    ('origin', 'i8'),      # vela donde esta la estructura
+    ('direction', 'i1'),   # 1 alcista / swing alto, -1 bajista / swing bajo
+    ('top', 'f8'),
+    ('bottom', 'f8'),
+])
+
+TIPOS = ('swings', 'fvgs', 'bos', 'order_blocks')
+
+
+def _events(index, origin, direction, top, bottom):
+    ev = np.empty(len(index), dtype=EVENT_DTYPE)
+    ev['index'] = index
+    ev['origin'] = origin
+    ev['direction'] = direction
+    ev['top'] = top
+    ev['bottom'] = bottom
+    return ev
+
+
+def _merge(*grupos):
+    """Une eventos ordenando por vela de confirmacion y direccion (1 antes que -1)"""
+    ev = np.concatenate(grupos) if grupos else np.empty(0, dtype=EVENT_DTYPE)
+    orden = np.lexsort((-ev['direction'], ev['index']))
+    return ev[orden]
+
+
+class Structures:
+    """Eventos detectados, consultables por tiempo"""
+
+    def __init__(self, times, swings, fvgs, bos, order_blocks):
+        self.times = times
+        self.swings = swings
+        self.fvgs = fvgs
+        self.bos = bos
+        self.order_blocks = order_blocks
+
+    def upto(self, kind, when):
+        """Eventos de `kind` confirmados hasta `when` (incluido)"""
+        ev = getattr(self, kind)
+        when = pd.Timestamp(when)
+        if when.tz is not None:
+            when = when.tz_convert('UTC').tz_localize(None)
+        confirmados = self.times[ev['index']]
+        return ev[:np.searchsorted(confirmados, when.to_datetime64(), side='right')]
+
+    def frame(self, kind):
+        """Eventos de un tipo como DataFrame con fechas"""
+        ev = getattr(self, kind)
+        df = pd.DataFrame(ev)
+        df['time'] = self.times[ev['index']]
+        df['origin_time'] = self.times[ev['origin']]
+        return df
+
+
+def _naive_times(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values
+
+
+# ---------------- Deteccion en bloque ---------------- #
+def _swings(high, low, k):
+    n = len(high)
+    if n < 2 * k + 1:
+        vacio = np.empty(0, dtype=EVENT_DTYPE)
+        return vacio, vacio
+    max_k = sliding_window_view(high, k).max(axis=1)   # max_k[s] = max(high[s:s+k])
+    min_k = sliding_window_view(low, k).min(axis=1)
+    i = np.arange(k, n - k)
+    alto = (high[i] > max_k[i - k]) & (high[i] >= max_k[i + 1])
+    bajo = (low[i] < min_k[i - k]) & (low[i] <= min_k[i + 1])
+    ia, ib = i[alto], i[bajo]
+    altos = _events(ia + k, ia, 1, high[ia], high[ia])
+    bajos = _events(ib + k, ib, -1, low[ib], low[ib])
+    return altos, bajos
+
+
+def _fvgs(high, low):
+    if len(high) < 3:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    j = np.arange(2, len(high))
+    alcista = low[j] > high[j - 2]
+    bajista = high[j] < low[j - 2]
+    ja, jb = j[alcista], j[bajista]
+    return _merge(
+        _events(ja, ja - 1, 1, low[ja], high[ja - 2]),
+        _events(jb, jb - 1, -1, low[jb - 2], high[jb]),
+    )
+
+
+def _breaks(swings, precio_cruza, n):
+    """Primera vela posterior a la confirmacion de cada swing que lo rompe.
+
+    Cada swing es el nivel vigente en las velas (confirmacion, siguiente confirmacion].
+    """
+    if not len(swings):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Nivel vigente en cada vela: el ultimo confirmado en una vela anterior
+    grupo = np.searchsorted(swings['index'], np.arange(n), side='left') - 1
+    validas = grupo >= 0
+    velas = np.flatnonzero(validas)
+    g = grupo[validas]
+    cruza = precio_cruza(velas, swings['top'][g])
+    velas, g = velas[cruza], g[cruza]
+    # Solo la primera rotura de cada swing
+    primeros, pos = np.unique(g, return_index=True)
+    return primeros, velas[pos]
+
+
+def _last_index(mask):
+    """Para cada vela, la ultima vela previa o igual que cumple `mask` (-1 si ninguna)"""
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(idx) if len(idx) else idx
+
+
+def detect(data, lookback=2):
+    """Detecta swings, FVGs, BOS y order blocks sobre todo el DataFrame"""
+    open_ = data['open'].to_numpy(dtype=np.float64)
+    high = data['high'].to_numpy(dtype=np.float64)
+    low = data['low'].to_numpy(dtype=np.float64)
+    close = data['close'].to_numpy(dtype=np.float64)
+    n = len(close)
+
+    altos, bajos = _swings(high, low, lookback)
+    fvgs = _fvgs(high, low)
+
+    # Rupturas de estructura
+    sw_a, bos_a = _breaks(altos, lambda v, nivel: close[v] > nivel, n)
+    sw_b, bos_b = _breaks(bajos, lambda v, nivel: close[v] < nivel, n)
+    bos = _merge(
+        _events(bos_a, altos['origin'][sw_a], 1, altos['top'][sw_a], altos['top'][sw_a]),
+        _events(bos_b, bajos['origin'][sw_b], -1, bajos['top'][sw_b], bajos['top'][sw_b]),
+    )
+
+    # Order blocks: ultima vela contraria antes de la vela del BOS
+    ultima_bajista = _last_index(close < open_)
+    ultima_alcista = _last_index(close > open_)
+    ob_a = ultima_bajista[bos_a - 1] if len(bos_a) else np.empty(0, dtype=np.int64)
+    ob_b = ultima_alcista[bos_b - 1] if len(bos_b) else np.empty(0, dtype=np.int64)
+    va, vb = ob_a >= 0, ob_b >= 0
+    order_blocks = _merge(
+        _events(bos_a[va], ob_a[va], 1, high[ob_a[va]], low[ob_a[va]]),
+        _events(bos_b[vb], ob_b[vb], -1, high[ob_b[vb]], low[ob_b[vb]]),
+    )
+
+    return Structures(_naive_times(data.index), _merge(altos, bajos), fvgs, bos, order_blocks)
+
+
+# ---------------- Deteccion incremental ---------------- #
+class StructureTracker:
+    """Mismas estructuras que detect(), actualizadas con cada vela cerrada en O(1)"""
+
+    def __init__(self, lookback=2):
+        self.k = lookback
+        self.n = 0
+        self._high = []
+        self._low = []
+        self._swing_alto = None     # (origen, nivel) vigente y aun no roto
+        self._swing_bajo = None
+        self._ultima_bajista = None  # (vela, high, low)
+        self._ultima_alcista = None
+        self.events = {tipo: [] for tipo in TIPOS}
+
+    def update(self, open_, high, low, close):
+        """Procesa una vela cerrada y devuelve los eventos nuevos por tipo"""
+        j = self.n
+        k = self.k
+        nuevos = {tipo: [] for tipo in TIPOS}
+
+        # Ventana de las ultimas 2k+1 velas
+        self._high.append(float(high))
+        self._low.append(float(low))
+        if len(self._high) > max(2 * k + 1, 3):
+            del self._high[0]
+            del self._low[0]
+
+        # Rupturas de los swings confirmados en velas anteriores
+        if self._swing_alto is not None and close > self._swing_alto[1]:
+            self._break(nuevos, j, 1, self._swing_alto, self._ultima_bajista)
+            self._swing_alto = None
+        if self._swing_bajo is not None and close < self._swing_bajo[1]:
+            self._break(nuevos, j, -1, self._swing_bajo, self._ultima_alcista)
+            self._swing_bajo = None
+
+        # Color de la vela para futuros order blocks
+        if close < open_:
+            self._ultima_bajista = (j, float(high), float(low))
+        elif close > open_:
+            self._ultima_alcista = (j, float(high), float(low))
+
+        # Swing de la vela j-k, confirmado ahora
+        if j >= 2 * k:
+            h = self._high[-(2 * k + 1):]
+            l = self._low[-(2 * k + 1):]
+            centro_h, centro_l = h[k], l[k]
+            if centro_h > max(h[:k]) and centro_h >= max(h[k + 1:]):
+                nuevos['swings'].append((j, j - k, 1, centro_h, centro_h))
+                self._swing_alto = (j - k, centro_h)
+            if centro_l < min(l[:k]) and centro_l <= min(l[k + 1:]):
+                nuevos['swings'].append((j, j - k, -1, centro_l, centro_l))
+                self._swing_bajo = (j - k, centro_l)
+
+        # Fair value gaps de las tres ultimas velas
+        if j >= 2:
+            h2, l2 = self._high[-3], self._low[-3]
+            if low > h2:
+                nuevos['fvgs'].append((j, j - 1, 1, float(low), h2))
+            if high < l2:
+                nuevos['fvgs'].append((j, j - 1, -1, l2, float(high)))
+
+        for tipo, lista in nuevos.items():
+            self.events[tipo].extend(lista)
+        self.n += 1
+        return nuevos
+
+    @staticmethod
+    def _break(nuevos, j, direccion, swing, ob):
+        """Registra un BOS y su order block (si hay vela contraria previa)"""
+        origen, nivel = swing
+        nuevos['bos'].append((j, origen, direccion, nivel, nivel))
+        if ob is not None:
+            nuevos['order_blocks'].append((j, ob[0], direccion, ob[1], ob[2]))
+
+    def structures(self, times):
+        """Eventos acumulados en el mismo formato que detect()"""
+        arrays = {tipo: np.array(lista, dtype=EVENT_DTYPE) for tipo, lista in self.events.items()}
+        return Structures(_naive_times(times), **arrays)
@@ -0,0 +1,273 @@
+# core/indicators.py
+# Indicadores incrementales (O(1) por vela) con calculo vectorizado equivalente
+#
+# Cada indicador tiene una funcion en bloque para calentar con el historico y una
+# clase de estado que recibe una vela (update) o un lote de velas (update_batch).
+# Ambos caminos hacen exactamente las mismas operaciones de coma flotante, por lo
+# que devuelven los mismos numeros.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+
+def _ewm_step(prev, x, alpha, huecos=0):
+    """Un paso de media exponencial, con la misma aritmetica que pandas.ewm(adjust=False).
+
+    `huecos` es el numero de muestras NaN anteriores a x: como en pandas, cada
+    una reduce el peso del valor previo.
+    """
+    if prev == x:
+        return prev
+    beta = 1.0 - alpha
+    peso = beta
+    for _ in range(huecos):
+        peso *= beta
+    return (peso * prev + alpha * x) / (peso + alpha)
+
+
+def _seeded_ewm(values, period, alpha):
+    """Media exponencial sembrada con la media simple de las primeras `period` muestras.
+
+    Los NaN anteriores a la siembra se saltan (la semilla son las primeras
+    `period` muestras validas); los posteriores mantienen el valor anterior,
+    como en pandas.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    validos = np.flatnonzero(~np.isnan(values))
+    if len(validos) < period:
+        return out
+    inicio = validos[period - 1]
+
+    # cumsum suma en orden, igual que el acumulador del camino incremental
+    semilla = np.cumsum(values[validos[:period]])[-1] / period
+    serie = values[inicio:].copy()
+    serie[0] = semilla
+    out[inicio:] = pd.Series(serie).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def _continue_ewm(prev, values, alpha, huecos=0):
+    """Continua una media exponencial ya sembrada sobre un lote de valores.
+
+    `huecos` son las muestras NaN pendientes del lote anterior.
+    """
+    serie = np.concatenate(([prev], np.full(huecos, np.nan), np.asarray(values, dtype=np.float64)))
+    return pd.Series(serie).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1 + huecos:]
+
+
+def true_range(high, low, close):
+    """Rango verdadero; la primera vela usa high - low"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    prev = np.concatenate(([np.nan], close[:-1]))
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return tr
+
+
+# ---------------- Calculo en bloque ---------------- #
+def ema(values, period):
+    """EMA sembrada con SMA"""
+    return _seeded_ewm(values, period, 2.0 / (period + 1))
+
+
+def atr(high, low, close, period=14):
+    """ATR de Wilder"""
+    return _seeded_ewm(true_range(high, low, close), period, 1.0 / period)
+
+
+def _rsi_from_averages(gain, loss):
+    total = gain + loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, 100.0 * gain / total, np.where(np.isnan(total), np.nan, 50.0))
+
+
+def rsi(close, period=14):
+    """RSI de Wilder; el primer valor aparece en la vela `period`"""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) < 2:
+        return out
+    cambio = np.diff(close)
+    gain = _seeded_ewm(np.maximum(cambio, 0.0), period, 1.0 / period)
+    loss = _seeded_ewm(np.maximum(-cambio, 0.0), period, 1.0 / period)
+    out[1:] = _rsi_from_averages(gain, loss)
+    return out
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD, linea de señal e histograma"""
+    linea = ema(close, fast) - ema(close, slow)
+    senal = np.full(len(linea), np.nan)
+    validos = np.flatnonzero(~np.isnan(linea))
+    if len(validos):
+        senal[validos[0]:] = ema(linea[validos[0]:], signal)
+    return linea, senal, linea - senal
+
+
+# ---------------- Estado incremental ---------------- #
+class EMA:
+    """EMA incremental; trata los NaN igual que el calculo en bloque"""
+
+    def __init__(self, period, alpha=None):
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.value = NAN
+        self._n = 0
+        self._sum = 0.0
+        self._huecos = 0
+
+    @property
+    def ready(self):
+        return self._n >= self.period
+
+    def update(self, x):
+        """Añade una muestra y devuelve el valor actual"""
+        x = float(x)
+        if math.isnan(x):
+            # Durante la siembra se ignora; despues se acumula como hueco
+            # para el siguiente paso
+            if self.ready:
+                self._huecos += 1
+            return self.value
+        if self._n < self.period:
+            self._n += 1
+            self._sum += x
+            if self._n == self.period:
+                self.value = self._sum / self.period
+            return self.value
+        self.value = _ewm_step(self.value, x, self.alpha, self._huecos)
+        self._huecos = 0
+        return self.value
+
+    def update_batch(self, values):
+        """Añade un lote de muestras y devuelve un valor por muestra"""
+        values = np.asarray(values, dtype=np.float64)
+        out = np.empty(len(values))
+
+        # Siembra muestra a muestra y el resto en bloque
+        k = 0
+        while k < len(values) and not self.ready:
+            out[k] = self.update(values[k])
+            k += 1
+        if k < len(values):
+            resto = values[k:]
+            out[k:] = _continue_ewm(self.value, resto, self.alpha, self._huecos)
+            self.value = float(out[-1])
+            validos = np.flatnonzero(~np.isnan(resto))
+            self._huecos = len(resto) - 1 - validos[-1] if len(validos) else self._huecos + len(resto)
+        return out
+
+
+class ATR:
+    """ATR de Wilder incremental"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._media = EMA(period, alpha=1.0 / period)
+        self._prev_close = NAN
+
+    @property
+    def value(self):
+        return self._media.value
+
+    def update(self, high, low, close):
+        high, low = float(high), float(low)
+        prev = self._prev_close
+        tr = high - low
+        if not math.isnan(prev):
+            tr = max(tr, abs(high - prev), abs(low - prev))
+        self._prev_close = float(close)
+        return self._media.update(tr)
+
+    def update_batch(self, high, low, close):
+        close = np.asarray(close, dtype=np.float64)
+        if not len(close):
+            return np.empty(0)
+        tr = self._true_range(high, low, close)
+        self._prev_close = float(close[-1])
+        return self._media.update_batch(tr)
+
+    def _true_range(self, high, low, close):
+        """Rango verdadero del lote enlazado con el cierre anterior"""
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        prev = np.concatenate(([self._prev_close], close[:-1]))
+        return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+class RSI:
+    """RSI de Wilder incremental"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._gain = EMA(period, alpha=1.0 / period)
+        self._loss = EMA(period, alpha=1.0 / period)
+        self._prev_close = NAN
+        self.value = NAN
+
+    def update(self, close):
+        close = float(close)
+        prev = self._prev_close
+        self._prev_close = close
+        if math.isnan(prev):
+            return self.value
+        cambio = close - prev
+        gain = self._gain.update(max(cambio, 0.0))
+        loss = self._loss.update(max(-cambio, 0.0))
+        self.value = float(_rsi_from_averages(gain, loss))
+        return self.value
+
+    def update_batch(self, close):
+        close = np.asarray(close, dtype=np.float64)
+        out = np.full(len(close), np.nan)
+        if not len(close):
+            return out
+        cambio = np.diff(np.concatenate(([self._prev_close], close)))
+        inicio = 1 if math.isnan(self._prev_close) else 0
+        self._prev_close = float(close[-1])
+        if inicio < len(close):
+            gain = self._gain.update_batch(np.maximum(cambio[inicio:], 0.0))
+            loss = self._loss.update_batch(np.maximum(-cambio[inicio:], 0.0))
+            out[inicio:] = _rsi_from_averages(gain, loss)
+        out[:inicio] = self.value
+        self.value = float(out[-1])
+        return out
+
+
+class MACD:
+    """MACD incremental: devuelve (macd, señal, histograma)"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close):
+        f = self._fast.update(close)
+        s = self._slow.update(close)
+        if not self._slow.ready:
+            return self.value
+        linea = f - s
+        senal = self._signal.update(linea)
+        self.value = (linea, senal, linea - senal)
+        return self.value
+
+    def update_batch(self, close):
+        close = np.asarray(close, dtype=np.float64)
+        f = self._fast.update_batch(close)
+        s = self._slow.update_batch(close)
+        linea = f - s
+        senal = np.full(len(close), np.nan)
+        validos = np.flatnonzero(~np.isnan(linea))
+        if len(validos):
+            senal[validos[0]:] = self._signal.update_batch(linea[validos[0]:])
+        if len(close):
+            self.value = (float(linea[-1]), float(senal[-1]), float(linea[-1] - senal[-1]))
+        return linea, senal, linea - senal
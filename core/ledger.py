@@ -0,0 +1,192 @@
+# core/ledger.py
+# Registro compacto de operaciones sobre un array estructurado de NumPy
+
+import numpy as np
+import pandas as pd
+
+# Campos de cada operacion
+DTYPE = np.dtype([
+    ('tipo', 'i1'),             # 1 compra, -1 venta
+    ('fecha_entrada', 'i8'),    # ns UTC
+    ('precio_entrada', 'f8'),
+    ('sl', 'f8'),
+    ('tp', 'f8'),
+    ('lotes', 'f8'),
+    ('fecha_salida', 'i8'),
+    ('precio_salida', 'f8'),
+    ('salida', 'i1'),           # 1 sl, 2 tp, 0 fin de datos
+    ('profit', 'f8'),
+    ('cash', 'f8'),
+])
+
+TIPOS = {1: 'buy', -1: 'sell'}
+SALIDAS = {1: 'sl', 2: 'tp', 0: 'fin'}
+_TIPO_COD = {v: k for k, v in TIPOS.items()}
+_SALIDA_COD = {v: k for k, v in SALIDAS.items()}
+
+
+class TradeLedger:
+    """Lista de operaciones con crecimiento amortizado y estadisticas vectorizadas.
+
+    Se comporta como la antigua lista de dicts (len, indice, iteracion), pero
+    guarda las operaciones en un array estructurado preasignado. Los dicts solo
+    se construyen al leer una operacion y el DataFrame solo en to_frame().
+    """
+
+    def __init__(self, capacity=256, tz=None):
+        self._rows = np.empty(max(1, capacity), dtype=DTYPE)
+        self._n = 0
+        # Siempre como nombre: igual que al deducirla de las fechas y serializable en JSON
+        self.tz = None if tz is None else str(tz)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def rows(self):
+        """Vista de las operaciones registradas"""
+        return self._rows[:self._n]
+
+    def _reserve(self, extra):
+        """Duplica la capacidad cuando hace falta"""
+        necesario = self._n + extra
+        if necesario <= len(self._rows):
+            return
+        nuevo = np.empty(max(necesario, 2 * len(self._rows)), dtype=DTYPE)
+        nuevo[:self._n] = self._rows[:self._n]
+        self._rows = nuevo
+
+    def _ns(self, fecha):
+        fecha = pd.Timestamp(fecha)
+        if fecha.tz is not None:
+            if self.tz is None:
+                self.tz = str(fecha.tz)
+            fecha = fecha.tz_convert('UTC').tz_localize(None)
+        return fecha.as_unit('ns').value
+
+    def _ts(self, ns):
+        fecha = pd.Timestamp(int(ns))
+        if self.tz is not None:
+            fecha = fecha.tz_localize('UTC').tz_convert(self.tz)
+        return fecha
+
+    # ---------------- Escritura ---------------- #
+    def append(self, op):
+        """Añade una operacion con el formato de dict de strategy_class"""
+        self._reserve(1)
+        fila = self._rows[self._n]
+        fila['tipo'] = _TIPO_COD[op['tipo']]
+        fila['fecha_entrada'] = self._ns(op['fecha_entrada'])
+        fila['precio_entrada'] = op['precio_entrada']
+        fila['sl'] = op['sl']
+        fila['tp'] = op['tp']
+        fila['lotes'] = op['lotes']
+        fila['fecha_salida'] = self._ns(op['fecha_salida'])
+        fila['precio_salida'] = op['precio_salida']
+        fila['salida'] = _SALIDA_COD[op['salida']]
+        fila['profit'] = op['profit']
+        fila['cash'] = op['cash']
+        self._n += 1
+
+    def extend(self, index=None, **columns):
+        """Añade un bloque de operaciones a partir de arrays (una entrada por campo).
+
+        Si se pasa `index`, las fechas pueden darse como posiciones dentro de el.
+        """
+        n = len(columns['precio_entrada'])
+        self._reserve(n)
+        bloque = self._rows[self._n:self._n + n]
+        fechas = _index_ns(index) if index is not None else None
+        for campo in DTYPE.names:
+            valores = columns[campo]
+            if fechas is not None and campo.startswith('fecha'):
+                valores = fechas[np.asarray(valores)]
+            bloque[campo] = valores
+        if index is not None and getattr(index, 'tz', None) is not None and self.tz is None:
+            self.tz = str(index.tz)
+        self._n += n
+
+    def clear(self):
+        self._n = 0
+
+    # ---------------- Lectura ---------------- #
+    def _record(self, fila):
+        return {
+            'tipo': TIPOS[int(fila['tipo'])],
+            'fecha_entrada': self._ts(fila['fecha_entrada']),
+            'precio_entrada': float(fila['precio_entrada']),
+            'sl': float(fila['sl']),
+            'tp': float(fila['tp']),
+            'lotes': float(fila['lotes']),
+            'fecha_salida': self._ts(fila['fecha_salida']),
+            'precio_salida': float(fila['precio_salida']),
+            'salida': SALIDAS[int(fila['salida'])],
+            'profit': float(fila['profit']),
+            'cash': float(fila['cash']),
+        }
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._record(f) for f in self.rows[i]]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._record(self._rows[i])
+
+    def __iter__(self):
+        for fila in self.rows:
+            yield self._record(fila)
+
+    def __eq__(self, other):
+        if isinstance(other, TradeLedger):
+            return np.array_equal(self.rows, other.rows)
+        return list(self) == list(other)
+
+    def to_frame(self):
+        """Operaciones como DataFrame (solo se construye al pedirlo)"""
+        filas = self.rows
+        df = pd.DataFrame({campo: filas[campo] for campo in DTYPE.names})
+        df['tipo'] = df['tipo'].map(TIPOS)
+        df['salida'] = df['salida'].map(SALIDAS)
+        for campo in ('fecha_entrada', 'fecha_salida'):
+            fechas = pd.to_datetime(filas[campo], unit='ns')
+            df[campo] = fechas.tz_localize('UTC').tz_convert(self.tz) if self.tz else fechas
+        return df
+
+    # ---------------- Estadisticas ---------------- #
+    def equity(self, initial_cash):
+        """Curva de capital incluyendo el saldo inicial"""
+        return np.concatenate(([float(initial_cash)], self.rows['cash']))
+
+    def drawdown(self, initial_cash):
+        """Drawdown (fraccion del maximo previo) despues de cada operacion"""
+        equity = self.equity(initial_cash)
+        pico = np.maximum.accumulate(equity)
+        return (pico - equity) / pico
+
+    def stats(self, initial_cash):
+        """Resumen de la ejecucion calculado sobre los arrays"""
+        profit = self.rows['profit']
+        ganancias = profit[profit > 0].sum()
+        perdidas = -profit[profit < 0].sum()
+        if perdidas > 0:
+            profit_factor = float(ganancias / perdidas)
+        else:
+            profit_factor = float('inf') if ganancias > 0 else 0.0
+        return {
+            'net_profit': float(self.equity(initial_cash)[-1] - initial_cash),
+            'max_drawdown': float(self.drawdown(initial_cash).max()),
+            'trades': self._n,
+            'win_rate': float((profit > 0).mean()) if self._n else 0.0,
+            'profit_factor': profit_factor,
+            'avg_profit': float(profit.mean()) if self._n else 0.0,
+        }
+
+
+def _index_ns(index):
+    """Fechas de un DatetimeIndex como int64 ns UTC"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8
@@ -0,0 +1,128 @@
+# core/monte_carlo.py
+# Analisis Monte Carlo de la curva de capital a partir de las operaciones de un backtest
+#
+# Cada simulacion es una fila de una matriz (simulaciones x operaciones): el
+# orden barajado, el remuestreo bootstrap y el slippage aleatorio se generan de
+# una vez con NumPy y la curva de capital, el drawdown y la ruina se calculan
+# por filas con cumprod / cumsum / maximum.accumulate. Las simulaciones se
+# procesan en bloques para acotar la memoria.
+
+import numpy as np
+
+# Numero maximo de celdas (simulaciones x operaciones) de cada bloque
+MAX_CELDAS = 4_000_000
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class MonteCarlo:
+    """Distribuciones de capital final, drawdown y ruina de un conjunto de operaciones.
+
+    Con `compound=True` cada operacion se trata como un rendimiento sobre el
+    capital previo (estrategias con `risk`); si no, como un beneficio fijo
+    (lote fijo). `ruin` es la fraccion del capital inicial por debajo de la
+    cual la cuenta se considera arruinada.
+    """
+
+    def __init__(self, operations, initial_cash, compound=True, ruin=0.5, tamcontrato=None, seed=None):
+        filas = operations.rows if hasattr(operations, 'rows') else operations
+        self.initial_cash = float(initial_cash)
+        self.compound = compound
+        self.ruin = ruin
+        self.tamcontrato = tamcontrato
+        self.rng = np.random.default_rng(seed)
+
+        self.profit = np.asarray(filas['profit'], dtype=np.float64)
+        self.lotes = np.asarray(filas['lotes'], dtype=np.float64)
+        self.cash_previo = np.asarray(filas['cash'], dtype=np.float64) - self.profit
+        self.returns = self.profit / self.cash_previo
+
+    # ---------------- Metodos ---------------- #
+    def shuffle(self, simulations=10_000):
+        """Mismas operaciones en orden aleatorio"""
+        def generar(b):
+            return self.rng.permuted(np.broadcast_to(self._pnl(), (b, len(self.profit))), axis=1)
+        return self._simulate(simulations, generar)
+
+    def bootstrap(self, simulations=10_000):
+        """Operaciones remuestreadas con reemplazo"""
+        pnl = self._pnl()
+
+        def generar(b):
+            return pnl[self.rng.integers(0, len(pnl), size=(b, len(pnl)))]
+        return self._simulate(simulations, generar)
+
+    def slippage(self, simulations=10_000, sigma=0.0001):
+        """Operaciones en su orden con slippage adverso |N(0, sigma)| en la entrada y en la salida.
+
+        `sigma` va en unidades de precio; hace falta `tamcontrato` para
+        convertirlo en dinero.
+        """
+        if self.tamcontrato is None:
+            raise ValueError("El slippage necesita tamcontrato")
+        coste_precio = self.lotes * self.tamcontrato
+
+        def generar(b):
+            deslizamiento = np.abs(self.rng.normal(0.0, sigma, size=(b, len(self.profit), 2))).sum(axis=2)
+            profit = self.profit - deslizamiento * coste_precio
+            # Con interes compuesto el slippage se mide sobre el capital previo original
+            return profit / self.cash_previo if self.compound else profit
+        return self._simulate(simulations, generar)
+
+    def run(self, simulations=10_000, sigma=None):
+        """Resumen de todos los metodos disponibles"""
+        resultado = {
+            'shuffle': self.summary(self.shuffle(simulations)),
+            'bootstrap': self.summary(self.bootstrap(simulations)),
+        }
+        if sigma is not None and self.tamcontrato is not None:
+            resultado['slippage'] = self.summary(self.slippage(simulations, sigma))
+        return resultado
+
+    # ---------------- Calculo por bloques ---------------- #
+    def _pnl(self):
+        return self.returns if self.compound else self.profit
+
+    def _simulate(self, simulations, generar):
+        """Capital final, drawdown maximo y ruina de cada simulacion"""
+        n = len(self.profit)
+        final = np.empty(simulations)
+        drawdown = np.empty(simulations)
+        ruina = np.empty(simulations, dtype=bool)
+        if not n:
+            final[:] = self.initial_cash
+            drawdown[:] = 0.0
+            ruina[:] = False
+            return {'final': final, 'max_drawdown': drawdown, 'ruined': ruina}
+
+        lote = max(1, MAX_CELDAS // n)
+        for a in range(0, simulations, lote):
+            b = min(lote, simulations - a)
+            equity = self._equity(generar(b))
+            pico = np.maximum.accumulate(equity, axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dd = np.where(pico > 0, (pico - equity) / pico, 1.0)
+            final[a:a + b] = equity[:, -1]
+            drawdown[a:a + b] = dd.max(axis=1)
+            ruina[a:a + b] = equity.min(axis=1) <= self.ruin * self.initial_cash
+        return {'final': final, 'max_drawdown': drawdown, 'ruined': ruina}
+
+    def _equity(self, pnl):
+        """Curvas de capital (una por fila) incluyendo el capital inicial"""
+        b = len(pnl)
+        if self.compound:
+            curva = np.cumprod(1.0 + pnl, axis=1) * self.initial_cash
+        else:
+            curva = np.cumsum(pnl, axis=1) + self.initial_cash
+        return np.hstack((np.full((b, 1), self.initial_cash), curva))
+
+    # ---------------- Resumen ---------------- #
+    def summary(self, resultado):
+        """Percentiles de capital final y drawdown y probabilidad de ruina"""
+        return {
+            'simulations': len(resultado['final']),
+            'final': dict(zip(PERCENTILES, np.percentile(resultado['final'], PERCENTILES).tolist())),
+            'max_drawdown': dict(zip(PERCENTILES, np.percentile(resultado['max_drawdown'], PERCENTILES).tolist())),
+            'ruin_probability': float(resultado['ruined'].mean()),
+            'loss_probability': float((resultado['final'] < self.initial_cash).mean()),
+        }
@@ -0,0 +1,637 @@
+# core/mt5_manager.py
+# Gestion de la conexion con MetaTrader 5
+#
+# MT5Manager mantiene una unica sesion con el terminal durante toda la vida de
+# la aplicacion. Cada llamada pasa por call(): si el backend devuelve None y
+# el terminal ya no responde, se reconecta con espera exponencial acotada y,
+# solo si la llamada es de lectura (READ_ONLY), se repite una vez.
+#
+# El backend es cualquier objeto con la API del modulo MetaTrader5
+# (initialize, shutdown, terminal_info, account_info, copy_rates_*, ...):
+#   - MetaTraderBackend: el terminal real (solo Windows, paquete MetaTrader5).
+#   - core.mt5_sim.SimulatedBroker: broker local determinista para CI y pruebas.
+
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.ohlcv_store import OHLCVStore
+from core.sessions import market_time
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Codigos de temporalidad de MT5
+TIMEFRAMES = {
+    'M1': 1, 'M2': 2, 'M3': 3, 'M5': 5, 'M10': 10, 'M15': 15, 'M30': 30,
+    'H1': 0x4001, 'H2': 0x4002, 'H4': 0x4004, 'H6': 0x4006, 'H12': 0x400C,
+    'D1': 0x4018, 'W1': 0x8001, 'MN1': 0xC001,
+}
+
+SECRETS = Path("config/secrets.json")
+
+# Llamadas de solo lectura que se pueden repetir tras una reconexion. El resto
+# (order_send, order_check...) se hace una sola vez: repetir un envio puede
+# duplicar una orden que el servidor ya ejecuto.
+READ_ONLY = frozenset({
+    'terminal_info', 'version', 'account_info', 'symbols_total', 'symbols_get', 'symbol_info',
+    'symbol_info_tick', 'symbol_select', 'copy_rates_range', 'copy_rates_from', 'copy_rates_from_pos',
+    'copy_ticks_range', 'copy_ticks_from', 'positions_total', 'positions_get', 'orders_total',
+    'orders_get', 'history_orders_total', 'history_orders_get', 'history_deals_total',
+    'history_deals_get', 'order_calc_margin', 'order_calc_profit',
+})
+
+# Cache de especificaciones de simbolos y su validez (segundos)
+SPECS_FILE = Path("storage/symbol_specs.json")
+SPECS_TTL = 24 * 3600
+
+# Campos de symbol_info que se guardan
+SPEC_FIELDS = (
+    'name', 'digits', 'point', 'trade_contract_size', 'trade_tick_size', 'trade_tick_value',
+    'volume_min', 'volume_max', 'volume_step', 'swap_mode', 'swap_long', 'swap_short',
+    'swap_rollover3days', 'spread', 'trade_stops_level', 'currency_base', 'currency_profit',
+    'currency_margin', 'trade_mode',
+)
+
+# Velas por peticion al sincronizar (el limite habitual de "Max bars in chart" es mayor)
+BATCH_BARS = 100_000
+
+
+class MT5ConnectionError(ConnectionError):
+    """No se pudo establecer (o recuperar) la conexion con el terminal"""
+
+
+class MetaTraderBackend:
+    """Backend con el terminal real: delega en el modulo MetaTrader5"""
+
+    def __init__(self):
+        try:
+            import MetaTrader5
+        except ImportError as e:
+            raise ImportError("El paquete MetaTrader5 no esta instalado (solo disponible en Windows); "
+                              "usa core.mt5_sim.SimulatedBroker como backend") from e
+        self._mt5 = MetaTrader5
+
+    def __getattr__(self, nombre):
+        return getattr(self._mt5, nombre)
+
+
+def timeframe_code(timeframe):
+    """Codigo de MT5 de una temporalidad ('M1', 'H4'...) o el propio codigo si ya es numero"""
+    if isinstance(timeframe, str):
+        try:
+            return TIMEFRAMES[timeframe.upper()]
+        except KeyError:
+            raise ValueError(f"Temporalidad desconocida: {timeframe}") from None
+    return int(timeframe)
+
+
+def timeframe_seconds(timeframe):
+    """Duracion de una vela en segundos (MN1 se toma como 30 dias)"""
+    codigo = timeframe_code(timeframe)
+    if codigo < 0x4000:
+        return 60 * codigo
+    if codigo & 0x8000:
+        return 7 * 86400 if codigo == TIMEFRAMES['W1'] else 30 * 86400
+    return 3600 * (codigo & 0x3FFF)
+
+
+def timeframe_name(timeframe):
+    """Nombre ('M1', 'H4'...) de una temporalidad dada por nombre o codigo"""
+    codigo = timeframe_code(timeframe)
+    for nombre, valor in TIMEFRAMES.items():
+        if valor == codigo:
+            return nombre
+    raise ValueError(f"Temporalidad desconocida: {timeframe}")
+
+
+def rates_frame(rates):
+    """Array de velas de MT5 a DataFrame con indice de fechas (UTC sin zona), listo para strategy_class"""
+    if rates is None or not len(rates):
+        return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume'],
+                            index=pd.DatetimeIndex([], name='time'))
+    rates = np.asarray(rates)
+    index = pd.DatetimeIndex(pd.to_datetime(rates['time'], unit='s'), name='time')
+    columnas = [c for c in rates.dtype.names if c != 'time']
+    return pd.DataFrame({c: rates[c] for c in columnas}, index=index)
+
+
+class MT5Manager:
+    """Sesion persistente con el terminal y reconexion con espera exponencial acotada.
+
+    Todas las llamadas al backend se serializan con un lock (el modulo de MT5
+    no es seguro entre hilos). `max_retries` limita los intentos de cada
+    reconexion y la espera entre intentos crece como base_delay * 2**n hasta
+    max_delay, con un pequeño jitter.
+    """
+
+    def __init__(self, backend=None, login=None, password=None, server=None, path=None,
+                 timeout=60_000, max_retries=5, base_delay=0.5, max_delay=30.0, sleep=time.sleep):
+        self.backend = backend if backend is not None else MetaTraderBackend()
+        self.login = login
+        self.password = password
+        self.server = server
+        self.path = path
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.RLock()
+        self.connected = False
+        self.reconnects = 0
+        self.last_error = None
+
+    @classmethod
+    def from_secrets(cls, secrets_file=SECRETS, backend=None, **kwargs):
+        """Crea el manager con la seccion "mt5" de config/secrets.json"""
+        try:
+            with open(secrets_file, 'r', encoding='utf-8') as f:
+                mt5 = json.load(f).get('mt5', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            mt5 = {}
+        login = mt5.get('login')
+        return cls(backend=backend,
+                   login=int(login) if str(login or '').isdigit() else None,
+                   password=mt5.get('password'), server=mt5.get('server'),
+                   path=mt5.get('path'), **kwargs)
+
+    # ---------------- Conexion ---------------- #
+    def _initialize(self):
+        kwargs = {'timeout': self.timeout}
+        if self.path:
+            kwargs['path'] = self.path
+        if self.login is not None:
+            kwargs.update(login=self.login, password=self.password, server=self.server)
+        return self.backend.initialize(**kwargs)
+
+    def _delay(self, intento):
+        espera = min(self.max_delay, self.base_delay * (2 ** intento))
+        return espera * (0.8 + 0.4 * random.random())
+
+    def connect(self):
+        """Abre la sesion con el terminal reintentando con espera exponencial"""
+        with self._lock:
+            if self.connected:
+                return True
+            for intento in range(self.max_retries):
+                if self._initialize():
+                    self.connected = True
+                    self.last_error = None
+                    logger.info("Conectado con el terminal MT5")
+                    return True
+                self.last_error = self.backend.last_error()
+                if intento + 1 < self.max_retries:
+                    espera = self._delay(intento)
+                    logger.warning(f"Fallo al conectar con MT5 {self.last_error}; "
+                                   f"reintento {intento + 1}/{self.max_retries - 1} en {espera:.1f}s")
+                    self._sleep(espera)
+            raise MT5ConnectionError(f"No se pudo conectar con MT5 tras {self.max_retries} intentos: "
+                                     f"{self.last_error}")
+
+    def reconnect(self):
+        """Cierra la sesion rota y vuelve a conectar"""
+        with self._lock:
+            logger.warning("Conexion con MT5 perdida, reconectando")
+            try:
+                self.backend.shutdown()
+            except Exception:
+                pass
+            self.connected = False
+            self.reconnects += 1
+            return self.connect()
+
+    def alive(self):
+        """True si el terminal responde"""
+        with self._lock:
+            return self.connected and self.backend.terminal_info() is not None
+
+    def shutdown(self):
+        with self._lock:
+            if self.connected:
+                self.backend.shutdown()
+                self.connected = False
+                logger.info("Sesion MT5 cerrada")
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    # ---------------- Llamadas ---------------- #
+    def call(self, metodo, *args, **kwargs):
+        """Llama a un metodo del backend; si falla por conexion, reconecta.
+
+        Las llamadas de READ_ONLY se repiten una vez tras reconectar; el resto
+        devuelve None aunque la reconexion funcione (el llamador decide).
+        """
+        with self._lock:
+            if not self.connected:
+                self.connect()
+            funcion = getattr(self.backend, metodo)
+            resultado = funcion(*args, **kwargs)
+            if resultado is None and self.backend.terminal_info() is None:
+                error = self.backend.last_error()
+                self.reconnect()
+                if metodo not in READ_ONLY:
+                    self.last_error = error
+                    return None
+                resultado = funcion(*args, **kwargs)
+            if resultado is None:
+                self.last_error = self.backend.last_error()
+            return resultado
+
+    def account_info(self):
+        return self.call('account_info')
+
+    def symbol_info(self, symbol):
+        return self.call('symbol_info', symbol)
+
+    def symbol_tick(self, symbol):
+        return self.call('symbol_info_tick', symbol)
+
+    def positions(self, symbol=None):
+        """Posiciones abiertas (todas o las de un simbolo)"""
+        if symbol is None:
+            return self.call('positions_get') or ()
+        return self.call('positions_get', symbol=symbol) or ()
+
+    def order_send(self, request):
+        """Envia la orden una sola vez; None si no hubo respuesta (puede haberse ejecutado)"""
+        return self.call('order_send', request)
+
+    def rates(self, symbol, timeframe, start, end):
+        """Velas entre start y end como DataFrame"""
+        return rates_frame(self.call('copy_rates_range', symbol, timeframe_code(timeframe), start, end))
+
+    def last_rates(self, symbol, timeframe, count):
+        """Ultimas `count` velas (la vela en curso incluida) como DataFrame"""
+        return rates_frame(self.call('copy_rates_from_pos', symbol, timeframe_code(timeframe), 0, count))
+
+
+# Sesion compartida por toda la aplicacion
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager(**kwargs):
+    """Devuelve el MT5Manager de la aplicacion, creandolo desde secrets.json la primera vez"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = MT5Manager.from_secrets(**kwargs)
+        return _manager
+
+
+def set_manager(manager):
+    """Sustituye el manager compartido (por ejemplo por uno con SimulatedBroker)"""
+    global _manager
+    with _manager_lock:
+        _manager = manager
+    return manager
+
+
+# ---------------- Sincronizacion de historicos ---------------- #
+def _weekday_seconds(desde, hasta):
+    """Segundos de lunes a viernes entre cada par de instantes (ns); el fin de semana no cuenta"""
+    desde = np.asarray(desde, dtype='M8[ns]')
+    hasta = np.asarray(hasta, dtype='M8[ns]')
+    dia0 = desde.astype('M8[D]')
+    dia1 = hasta.astype('M8[D]')
+    habil0 = np.is_busday(dia0)
+    habil1 = np.is_busday(dia1)
+    un_dia = np.timedelta64(1, 'D')
+
+    completos = np.where(dia1 > dia0, np.busday_count(np.minimum(dia0 + un_dia, dia1), dia1), 0) * 86400.0
+    inicio = np.where(habil0, ((dia0 + un_dia) - desde) / np.timedelta64(1, 's'), 0.0)
+    fin = np.where(habil1, (hasta - dia1) / np.timedelta64(1, 's'), 0.0)
+    mismo_dia = np.where(habil0, (hasta - desde) / np.timedelta64(1, 's'), 0.0)
+    return np.where(dia0 == dia1, mismo_dia, completos + inicio + fin)
+
+
+class RateSync:
+    """Cache local de velas sincronizada de forma incremental con el broker.
+
+    Las velas se guardan en un OHLCVStore por simbolo y temporalidad. Cada
+    sync() solo pide al broker lo que falta:
+      - la cola: desde la ultima vela guardada hasta la ultima vela cerrada;
+      - la cabeza: si se pide un inicio anterior al ya sincronizado;
+      - los huecos: saltos de mas de `max_gap` segundos entre velas guardadas
+        sin contar el fin de semana del mercado (del viernes al domingo a las
+        17:00 de Nueva York; las fechas guardadas estan en `broker_tz`). Un
+        hueco que el broker tampoco tiene (festivos, mercado sin ticks) se
+        apunta en meta.json y no se vuelve a pedir.
+    Las peticiones se hacen en lotes de `batch_bars` velas y la vela en curso
+    nunca se guarda. frame() sirve DataFrames listos para strategy_class
+    directamente de los archivos mapeados.
+    """
+
+    def __init__(self, manager=None, store=None, batch_bars=BATCH_BARS, history_days=365, max_gap=None,
+                 broker_tz='UTC'):
+        self.manager = manager if manager is not None else get_manager()
+        self.store = store if store is not None else OHLCVStore()
+        self.batch_bars = batch_bars
+        self.history_days = history_days
+        self.max_gap = max_gap
+        self.broker_tz = broker_tz
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _serie_lock(self, symbol, timeframe):
+        with self._lock:
+            return self._series.setdefault((symbol.upper(), timeframe), threading.Lock())
+
+    def _last_closed(self, symbol, timeframe, paso):
+        """Apertura de la ultima vela cerrada segun la hora del broker.
+
+        Sin tick del terminal se toma la ultima vela guardada (no se pide nada
+        nuevo); la hora local del equipo no sirve porque no es la del servidor.
+        """
+        tick = self.manager.symbol_tick(symbol)
+        if tick is not None and tick.time:
+            ahora = int(tick.time)
+            return pd.Timestamp((ahora // paso * paso - paso) * 10**9)
+        ultima = self.store.last_timestamp(symbol, timeframe)
+        if ultima is None:
+            raise MT5ConnectionError(f"Sin hora del servidor para {symbol}: {self.manager.last_error}")
+        return ultima
+
+    def _fetch(self, symbol, timeframe, desde, hasta):
+        """Velas entre desde y hasta (incluidos) pedidas en lotes de batch_bars"""
+        paso = pd.Timedelta(seconds=timeframe_seconds(timeframe))
+        lote = paso * self.batch_bars
+        piezas = []
+        inicio = pd.Timestamp(desde)
+        while inicio <= hasta:
+            fin = min(inicio + lote - paso, hasta)
+            # MT5 interpreta las fechas sin zona como hora local: se pasan en UTC explicito
+            rates = self.manager.call('copy_rates_range', symbol, timeframe_code(timeframe),
+                                      inicio.tz_localize('UTC').to_pydatetime(),
+                                      fin.tz_localize('UTC').to_pydatetime())
+            if rates is None:
+                raise MT5ConnectionError(f"Fallo al descargar {symbol} {timeframe}: {self.manager.last_error}")
+            if len(rates):
+                piezas.append(rates_frame(rates))
+            inicio = fin + paso
+        if not piezas:
+            return rates_frame(None)
+        data = pd.concat(piezas) if len(piezas) > 1 else piezas[0]
+        data = data[(data.index >= desde) & (data.index <= hasta)]
+        return data[~data.index.duplicated(keep='last')]
+
+    def _gaps(self, symbol, timeframe, meta):
+        """Huecos entre velas guardadas que aun no se han pedido al broker: [(desde, hasta)]"""
+        paso = timeframe_seconds(timeframe)
+        max_gap = self.max_gap if self.max_gap is not None else max(3600, 3 * paso)
+        tiempo = self.store.arrays(symbol, timeframe)['time']
+        if len(tiempo) < 2:
+            return []
+        salto = np.diff(tiempo) > max_gap * 10**9
+        i = np.flatnonzero(salto)
+        if not len(i):
+            return []
+        desde = market_time(tiempo[i] + paso * 10**9, self.broker_tz)
+        hasta = market_time(tiempo[i + 1], self.broker_tz)
+        i = i[_weekday_seconds(desde.values, hasta.values) > max_gap]
+        revisados = {tuple(h) for h in meta.get('gaps_checked', [])}
+        return [(int(tiempo[k]), int(tiempo[k + 1])) for k in i
+                if (int(tiempo[k]), int(tiempo[k + 1])) not in revisados]
+
+    def sync(self, symbol, timeframe='M1', start=None, end=None):
+        """Completa la cache de symbol/timeframe hasta `end` (por defecto la ultima vela cerrada).
+
+        Devuelve el numero de velas nuevas descargadas.
+        """
+        timeframe = timeframe_name(timeframe)
+        paso = pd.Timedelta(seconds=timeframe_seconds(timeframe))
+        with self._serie_lock(symbol, timeframe):
+            ultima_cerrada = self._last_closed(symbol, timeframe, int(paso.total_seconds()))
+            end = ultima_cerrada if end is None else min(pd.Timestamp(end), ultima_cerrada)
+            meta = self.store.meta(symbol, timeframe)
+
+            # Cache vacia: descarga completa desde start
+            if meta is None or not meta['rows']:
+                if start is None:
+                    start = end - pd.Timedelta(days=self.history_days)
+                start = pd.Timestamp(start)
+                data = self._fetch(symbol, timeframe, start, end)
+                if not len(data):
+                    return 0
+                self.store.write(symbol, timeframe, data)
+                self.store.update_meta(symbol, timeframe, synced_from=str(start), gaps_checked=[])
+                logger.info(f"{symbol} {timeframe}: {len(data)} velas descargadas")
+                return len(data)
+
+            primera = self.store.first_timestamp(symbol, timeframe)
+            ultima = self.store.last_timestamp(symbol, timeframe)
+            sincronizado = pd.Timestamp(meta.get('synced_from', primera))
+            nuevas = 0
+
+            # Cola: velas posteriores a la ultima guardada (se anexan sin reescribir)
+            if ultima + paso <= end:
+                cola = self._fetch(symbol, timeframe, ultima + paso, end)
+                if len(cola):
+                    self.store.append(symbol, timeframe, cola)
+                    nuevas += len(cola)
+
+            # Cabeza y huecos: requieren reescribir la serie
+            piezas = []
+            if start is not None and pd.Timestamp(start) < sincronizado:
+                start = pd.Timestamp(start)
+                cabeza = self._fetch(symbol, timeframe, start, primera - paso)
+                piezas.append(cabeza)
+                sincronizado = start
+
+            revisados = list(meta.get('gaps_checked', []))
+            for a, b in self._gaps(symbol, timeframe, meta):
+                hueco = self._fetch(symbol, timeframe, pd.Timestamp(a) + paso, pd.Timestamp(b) - paso)
+                piezas.append(hueco)
+                if not len(hueco):
+                    revisados.append([a, b])
+
+            piezas = [p for p in piezas if len(p)]
+            if piezas:
+                guardado = self.store.frame(symbol, timeframe)
+                data = pd.concat([guardado.copy()] + [p[guardado.columns.intersection(p.columns)] for p in piezas])
+                data = data[~data.index.duplicated(keep='first')].sort_index()
+                self.store.write(symbol, timeframe, data)
+                nuevas += sum(len(p) for p in piezas)
+
+            self.store.update_meta(symbol, timeframe, synced_from=str(sincronizado), gaps_checked=revisados)
+            if nuevas:
+                logger.info(f"{symbol} {timeframe}: {nuevas} velas nuevas")
+            return nuevas
+
+    def sync_many(self, symbols, timeframes=('M1',), start=None, end=None):
+        """Sincroniza varios simbolos y temporalidades; devuelve {(simbolo, tf): velas nuevas}"""
+        resultado = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                try:
+                    resultado[(symbol, timeframe)] = self.sync(symbol, timeframe, start, end)
+                except MT5ConnectionError as e:
+                    logger.error(f"No se pudo sincronizar {symbol} {timeframe}: {e}")
+                    resultado[(symbol, timeframe)] = None
+        return resultado
+
+    def frame(self, symbol, timeframe='M1', start=None, end=None, sync=True):
+        """Velas entre start y end servidas desde la cache (sincronizada antes si `sync`)"""
+        timeframe = timeframe_name(timeframe)
+        if sync:
+            self.sync(symbol, timeframe, start, end)
+        if not self.store.exists(symbol, timeframe):
+            return rates_frame(None)
+        return self.store.frame(symbol, timeframe, start, end)
+
+
+# ---------------- Especificaciones de simbolos ---------------- #
+class SymbolSpecCache:
+    """Especificaciones de todos los simbolos del broker, en memoria y en disco.
+
+    Se cargan todas con una sola llamada (symbols_get) y se guardan en
+    `path`. Mientras no pase `ttl` se sirven del disco sin tocar el terminal;
+    caducadas, se siguen sirviendo y se refrescan en un hilo en segundo plano.
+    get() es una busqueda en un dict; el refresco sustituye el dict completo,
+    asi que los lectores nunca ven una carga a medias.
+    """
+
+    def __init__(self, manager=None, path=SPECS_FILE, ttl=SPECS_TTL, clock=time.time):
+        self._manager = manager
+        self.path = Path(path)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._specs = {}
+        self.loaded_at = 0.0
+        self._load()
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            self._manager = get_manager()
+        return self._manager
+
+    # ---------------- Disco ---------------- #
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                guardado = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self._specs = guardado.get('specs', {})
+        self.loaded_at = float(guardado.get('saved_at', 0.0))
+
+    def _save(self, specs, momento):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': momento, 'specs': specs}, f, indent=2)
+        tmp.replace(self.path)
+
+    # ---------------- Refresco ---------------- #
+    @staticmethod
+    def _spec(info):
+        campos = info._asdict() if hasattr(info, '_asdict') else vars(info)
+        return {c: campos[c] for c in SPEC_FIELDS if c in campos}
+
+    def refresh(self):
+        """Descarga todas las especificaciones en una llamada; devuelve cuantas hay"""
+        simbolos = self.manager.call('symbols_get')
+        if simbolos is None:
+            raise MT5ConnectionError(f"No se pudieron leer los simbolos: {self.manager.last_error}")
+        specs = {s.name: self._spec(s) for s in simbolos}
+        momento = self._clock()
+        with self._lock:
+            self._specs = specs
+            self.loaded_at = momento
+            self._save(specs, momento)
+        logger.info(f"Especificaciones de {len(specs)} simbolos actualizadas")
+        return len(specs)
+
+    def refresh_async(self):
+        """Refresca en segundo plano (un solo hilo a la vez); devuelve el hilo"""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return self._hilo
+            self._hilo = threading.Thread(target=self._refresh_safe, name="SymbolSpecRefresh", daemon=True)
+            self._hilo.start()
+            return self._hilo
+
+    def _refresh_safe(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Fallo al refrescar las especificaciones: {e}")
+
+    def expired(self):
+        return self._clock() - self.loaded_at > self.ttl
+
+    # ---------------- Consultas ---------------- #
+    def get(self, symbol):
+        """Especificacion de un simbolo (dict con los campos de SPEC_FIELDS)"""
+        spec = self._specs.get(symbol)
+        if spec is not None:
+            if self.expired():
+                self.refresh_async()
+            return spec
+
+        # Sin datos: carga completa; si sigue sin estar, consulta solo ese simbolo
+        if not self._specs:
+            self.refresh()
+            spec = self._specs.get(symbol)
+        if spec is None:
+            info = self.manager.symbol_info(symbol)
+            if info is None:
+                raise KeyError(f"Simbolo desconocido: {symbol}")
+            spec = self._spec(info)
+            with self._lock:
+                self._specs = {**self._specs, symbol: spec}
+        return spec
+
+    def __getitem__(self, symbol):
+        return self.get(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self._specs
+
+    def symbols(self):
+        return sorted(self._specs)
+
+    def strategy_params(self, symbol):
+        """decimal, swap (largo, corto) y tamcontrato para strategy_class / create_strategy"""
+        spec = self.get(symbol)
+        return {
+            'decimal': spec['digits'],
+            'swap': (spec.get('swap_long', 0.0), spec.get('swap_short', 0.0)),
+            'tamcontrato': spec['trade_contract_size'],
+        }
+
+    def sizing_params(self, symbol):
+        """Argumentos de core.costs.position_size para el simbolo"""
+        spec = self.get(symbol)
+        return {
+            'tamcontrato': spec['trade_contract_size'],
+            'min_volume': spec.get('volume_min', 0.01),
+            'step': spec.get('volume_step', 0.01),
+            'max_volume': spec.get('volume_max'),
+        }
+
+
+_specs = None
+
+
+def get_specs(**kwargs):
+    """Cache de especificaciones compartida por la aplicacion"""
+    global _specs
+    with _manager_lock:
+        if _specs is None:
+            _specs = SymbolSpecCache(**kwargs)
+        return _specs
@@ -0,0 +1,561 @@
+# core/mt5_sim.py
+# Broker simulado con la misma API que el modulo MetaTrader5
+#
+# Sirve para CI en Linux y pruebas de carga sin terminal. Todo es
+# determinista: el precio medio de cada simbolo es una funcion del tiempo
+# (suma de ondas con fase propia del simbolo + ruido obtenido de un hash del
+# instante), de modo que cualquier rango de velas o ticks se calcula en
+# bloque y siempre da los mismos valores para la misma semilla. Las ordenes
+# a mercado se llenan al bid/ask del reloj del broker.
+#
+# Simplificaciones: el mercado abre 24/7, los ticks llegan cada
+# TICK_SEGUNDOS y el SL/TP de las posiciones se comprueba con el precio
+# actual cada vez que se consultan las posiciones o la cuenta.
+
+import fnmatch
+import itertools
+import threading
+import time as _time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+# Codigos de MetaTrader5 usados por el simulador
+TRADE_ACTION_DEAL = 1
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_POSITION_CLOSED = 10036
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+RES_S_OK = 1
+RES_E_NOT_FOUND = -1
+RES_E_INTERNAL_FAIL_INIT = -10005
+RES_E_NO_CONNECTION = -10004
+
+# Intervalo entre ticks simulados
+TICK_SEGUNDOS = 5
+_TICKS_MINUTO = 60 // TICK_SEGUNDOS
+
+# Minutos procesados en cada bloque al generar velas
+_BLOQUE_MINUTOS = 100_000
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+# Especificaciones por defecto (precio base, digitos, spread en puntos)
+SIMBOLOS = {
+    'EURUSD': (1.0850, 5, 8),
+    'GBPUSD': (1.2650, 5, 10),
+    'USDJPY': (149.50, 3, 9),
+    'USDCHF': (0.8800, 5, 12),
+    'AUDUSD': (0.6550, 5, 9),
+    'USDCAD': (1.3600, 5, 12),
+    'NZDUSD': (0.6100, 5, 14),
+    'EURJPY': (162.20, 3, 15),
+    'GBPJPY': (189.10, 3, 22),
+    'EURGBP': (0.8580, 5, 11),
+    'XAUUSD': (2350.0, 2, 25),
+}
+
+
+def _hash01(claves):
+    """Hash splitmix64 de enteros a [0, 1)"""
+    z = np.asarray(claves).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def _ns(**campos):
+    return SimpleNamespace(**campos)
+
+
+class _Symbol:
+    """Especificacion y generador de precios de un simbolo"""
+
+    # Periodos de las ondas (segundos) y su amplitud relativa
+    ONDAS = ((5 * 86400, 0.004), (86400, 0.0015), (4 * 3600, 0.0008), (1800, 0.0003))
+
+    def __init__(self, name, base, digits, spread, seed):
+        self.name = name
+        self.base = base
+        self.digits = digits
+        self.point = 10.0 ** -digits
+        self.spread = spread
+        self.semilla = zlib.crc32(f"{seed}:{name}".encode())
+        fases = _hash01(np.arange(len(self.ONDAS)) + self.semilla * 16)
+        self.fases = fases * 2 * np.pi
+        self.info = _ns(
+            name=name, description=f"{name} simulado", digits=digits, point=self.point,
+            spread=spread, trade_contract_size=100.0 if name.startswith('XAU') else 100000.0,
+            volume_min=0.01, volume_max=100.0, volume_step=0.01,
+            swap_long=-5.0, swap_short=1.5, swap_rollover3days=3,
+            currency_base=name[:3], currency_profit=name[3:], trade_mode=4, visible=True,
+        )
+
+    def mid(self, segundos):
+        """Precio medio en los instantes indicados (segundos desde 1970, multiplos de TICK_SEGUNDOS)"""
+        s = np.asarray(segundos, dtype=np.float64)
+        onda = np.zeros_like(s)
+        for (periodo, amplitud), fase in zip(self.ONDAS, self.fases):
+            onda += amplitud * np.sin(2 * np.pi * s / periodo + fase)
+        pasos = (np.asarray(segundos, dtype=np.int64) // TICK_SEGUNDOS) ^ ((self.semilla & 0x7FFFFFFF) << 32)
+        ruido = (_hash01(pasos) - 0.5) * 6 * self.point
+        return np.round(self.base * (1 + onda) + ruido, self.digits)
+
+    def quote(self, segundos):
+        """(bid, ask) en los instantes indicados"""
+        bid = self.mid(segundos)
+        return bid, np.round(bid + self.spread * self.point, self.digits)
+
+    def m1(self, desde, minutos, hasta=None):
+        """Velas de M1 a partir del minuto `desde` (segundos) construidas con los ticks.
+
+        Con `hasta` solo se usan los ticks hasta ese instante: la vela en curso
+        queda cortada y las posteriores sin ticks (tick_volume 0).
+        """
+        velas = np.empty(minutos, dtype=RATES_DTYPE)
+        for a in range(0, minutos, _BLOQUE_MINUTOS):
+            b = min(a + _BLOQUE_MINUTOS, minutos)
+            inicio = desde + 60 * np.arange(a, b, dtype=np.int64)
+            tiempos = inicio[:, None] + TICK_SEGUNDOS * np.arange(_TICKS_MINUTO)
+            ticks = self.mid(tiempos)
+            v = velas[a:b]
+            v['time'] = inicio
+            v['open'] = ticks[:, 0]
+            if hasta is None:
+                v['high'] = ticks.max(axis=1)
+                v['low'] = ticks.min(axis=1)
+                v['close'] = ticks[:, -1]
+                v['tick_volume'] = _TICKS_MINUTO
+            else:
+                validos = tiempos <= hasta
+                n = validos.sum(axis=1)
+                v['high'] = np.where(validos, ticks, -np.inf).max(axis=1)
+                v['low'] = np.where(validos, ticks, np.inf).min(axis=1)
+                v['close'] = ticks[np.arange(len(ticks)), np.maximum(n - 1, 0)]
+                v['tick_volume'] = n
+            v['spread'] = self.spread
+            v['real_volume'] = 0
+        return velas
+
+
+class SimulatedBroker:
+    """Sustituto determinista del terminal MT5 con la API del modulo MetaTrader5.
+
+    `clock` devuelve la hora del broker en segundos (por defecto time.time);
+    `fail_connects` hace fallar los primeros initialize() para probar la
+    reconexion y `latency` añade una espera a cada llamada.
+    """
+
+    def __init__(self, seed=0, clock=None, balance=10000.0, leverage=100, currency='USD',
+                 symbols=None, fail_connects=0, latency=0.0):
+        self.seed = seed
+        self.clock = clock or _time.time
+        self.latency = latency
+        self._lock = threading.RLock()
+        self._conectado = False
+        self._fallos = fail_connects
+        self._error = (RES_S_OK, 'Success')
+        self._tickets = itertools.count(1)
+        self._simbolos = {}
+        for nombre, (base, digitos, spread) in (symbols or SIMBOLOS).items():
+            self._simbolos[nombre] = _Symbol(nombre, base, digitos, spread, seed)
+
+        self.login = 10_000_000 + seed
+        self.balance = float(balance)
+        self.leverage = leverage
+        self.currency = currency
+        self.positions = {}
+        self.deals = []
+        self.calls = 0
+
+    # ---------------- Conexion ---------------- #
+    def _call(self):
+        """Contabiliza la llamada; devuelve False si no hay conexion"""
+        self.calls += 1
+        if self.latency:
+            _time.sleep(self.latency)
+        if not self._conectado:
+            self._error = (RES_E_NO_CONNECTION, 'No IPC connection')
+            return False
+        return True
+
+    def initialize(self, path=None, login=None, password=None, server=None, timeout=None, portable=False):
+        with self._lock:
+            self.calls += 1
+            if self._fallos > 0:
+                self._fallos -= 1
+                self._error = (RES_E_INTERNAL_FAIL_INIT, 'Terminal: Initialization failed')
+                return False
+            if login is not None:
+                self.login = int(login)
+            self._conectado = True
+            self._error = (RES_S_OK, 'Success')
+            return True
+
+    def shutdown(self):
+        with self._lock:
+            self._conectado = False
+            return True
+
+    def drop_connection(self, fail_connects=0):
+        """Simula una caida del terminal (y opcionalmente reintentos fallidos)"""
+        with self._lock:
+            self._conectado = False
+            self._fallos = fail_connects
+
+    def last_error(self):
+        return self._error
+
+    def version(self):
+        return (500, 4000, 'simulated')
+
+    def terminal_info(self):
+        with self._lock:
+            if not self._call():
+                return None
+            return _ns(connected=True, trade_allowed=True, name='SimulatedBroker',
+                       company='Local', path='', build=4000)
+
+    # ---------------- Cuenta ---------------- #
+    def account_info(self):
+        with self._lock:
+            if not self._call():
+                return None
+            self._check_stops()
+            flotante = sum(self._profit(p) for p in self.positions.values())
+            margen = sum(self._margin(p.symbol, p.volume, p.price_open) for p in self.positions.values())
+            equity = self.balance + flotante
+            return _ns(login=self.login, balance=self.balance, equity=equity, profit=flotante,
+                       margin=margen, margin_free=equity - margen, leverage=self.leverage,
+                       currency=self.currency, server='Simulated-Server', trade_allowed=True)
+
+    # ---------------- Simbolos ---------------- #
+    def _symbol(self, nombre):
+        sim = self._simbolos.get(nombre)
+        if sim is None:
+            self._error = (RES_E_NOT_FOUND, f'Unknown symbol {nombre}')
+        return sim
+
+    def symbols_total(self):
+        return len(self._simbolos)
+
+    def symbols_get(self, group=None):
+        with self._lock:
+            if not self._call():
+                return None
+            return tuple(s.info for s in self._simbolos.values())
+
+    def symbol_info(self, symbol):
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            bid, ask = (float(x) for x in sim.quote(self._now()))
+            return _ns(**vars(sim.info), bid=bid, ask=ask)
+
+    def symbol_select(self, symbol, enable=True):
+        with self._lock:
+            return self._call() and symbol in self._simbolos
+
+    def _now(self):
+        """Hora del broker redondeada al ultimo tick"""
+        ahora = int(self.clock())
+        return ahora - ahora % TICK_SEGUNDOS
+
+    def symbol_info_tick(self, symbol):
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            t = self._now()
+            bid, ask = (float(x) for x in sim.quote(t))
+            return _ns(time=t, bid=bid, ask=ask, last=0.0, volume=0, time_msc=t * 1000,
+                       flags=6, volume_real=0.0)
+
+    # ---------------- Historico ---------------- #
+    @staticmethod
+    def _seconds(fecha):
+        if isinstance(fecha, (int, float, np.integer, np.floating)):
+            return int(fecha)
+        fecha = pd.Timestamp(fecha)
+        if fecha.tz is not None:
+            fecha = fecha.tz_convert('UTC').tz_localize(None)
+        return int(fecha.value // 10**9)
+
+    def _rates(self, sim, timeframe, desde, velas, hasta=None):
+        """`velas` velas de `timeframe` minutos desde el instante `desde` (alineado).
+
+        `hasta` corta la ultima vela en ese instante (la vela en curso no ve
+        ticks futuros).
+        """
+        minutos = _minutes(timeframe)
+        m1 = sim.m1(desde, velas * minutos, hasta)
+        if minutos == 1:
+            return m1
+        grupos = m1.reshape(velas, minutos)
+        con_ticks = np.maximum((grupos['tick_volume'] > 0).sum(axis=1) - 1, 0)
+        r = np.empty(velas, dtype=RATES_DTYPE)
+        r['time'] = grupos['time'][:, 0]
+        r['open'] = grupos['open'][:, 0]
+        r['high'] = grupos['high'].max(axis=1)
+        r['low'] = grupos['low'].min(axis=1)
+        r['close'] = grupos['close'][np.arange(velas), con_ticks]
+        r['tick_volume'] = grupos['tick_volume'].sum(axis=1)
+        r['spread'] = sim.spread
+        r['real_volume'] = 0
+        return r
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        """Velas cerradas cuya apertura esta entre date_from y date_to (incluidas)"""
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            paso = 60 * _minutes(timeframe)
+            ultima = self._now() // paso * paso - paso
+            desde = -(-self._seconds(date_from) // paso) * paso
+            hasta = min(self._seconds(date_to) // paso * paso, ultima)
+            velas = max(0, (hasta - desde) // paso + 1)
+            return self._rates(sim, timeframe, desde, velas)
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        """`count` velas cerradas que terminan en date_from"""
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            paso = 60 * _minutes(timeframe)
+            hasta = min(self._seconds(date_from) // paso * paso, self._now() // paso * paso - paso)
+            return self._rates(sim, timeframe, hasta - (count - 1) * paso, count)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        """`count` velas contando hacia atras desde la posicion `start_pos` (0 = vela en curso)"""
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            paso = 60 * _minutes(timeframe)
+            ahora = self._now()
+            actual = ahora // paso * paso
+            return self._rates(sim, timeframe, actual - (start_pos + count - 1) * paso, count, ahora)
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=0):
+        """Ticks entre date_from y date_to (segundos o fechas)"""
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            desde = -(-self._seconds(date_from) // TICK_SEGUNDOS) * TICK_SEGUNDOS
+            hasta = min(self._seconds(date_to), self._now())
+            tiempos = np.arange(desde, hasta + 1, TICK_SEGUNDOS, dtype=np.int64)
+            return self._ticks(sim, tiempos)
+
+    def copy_ticks_from(self, symbol, date_from, count, flags=0):
+        """Hasta `count` ticks desde date_from"""
+        with self._lock:
+            if not self._call():
+                return None
+            sim = self._symbol(symbol)
+            if sim is None:
+                return None
+            desde = -(-self._seconds(date_from) // TICK_SEGUNDOS) * TICK_SEGUNDOS
+            hasta = min(desde + (count - 1) * TICK_SEGUNDOS, self._now())
+            tiempos = np.arange(desde, hasta + 1, TICK_SEGUNDOS, dtype=np.int64)
+            return self._ticks(sim, tiempos)
+
+    @staticmethod
+    def _ticks(sim, tiempos):
+        bid, ask = sim.quote(tiempos)
+        ticks = np.zeros(len(tiempos), dtype=TICKS_DTYPE)
+        ticks['time'] = tiempos
+        ticks['bid'] = bid
+        ticks['ask'] = ask
+        ticks['time_msc'] = tiempos * 1000
+        ticks['flags'] = 6
+        return ticks
+
+    # ---------------- Ordenes ---------------- #
+    def _margin(self, symbol, volume, price):
+        info = self._simbolos[symbol].info
+        return volume * info.trade_contract_size * price / self.leverage
+
+    def _profit(self, p, bid=None, ask=None):
+        sim = self._simbolos[p.symbol]
+        if bid is None:
+            bid, ask = (float(x) for x in sim.quote(self._now()))
+        cierre = bid if p.type == ORDER_TYPE_BUY else ask
+        signo = 1 if p.type == ORDER_TYPE_BUY else -1
+        # Beneficio en la divisa de cotizacion (se asume igual a la de la cuenta)
+        return signo * (cierre - p.price_open) * p.volume * sim.info.trade_contract_size
+
+    def _check_stops(self):
+        """Cierra las posiciones cuyo SL o TP alcanza el precio actual"""
+        t = self._now()
+        for p in list(self.positions.values()):
+            bid, ask = (float(x) for x in self._simbolos[p.symbol].quote(t))
+            precio = bid if p.type == ORDER_TYPE_BUY else ask
+            sube = p.type == ORDER_TYPE_BUY
+            toca_sl = p.sl and (precio <= p.sl if sube else precio >= p.sl)
+            toca_tp = p.tp and (precio >= p.tp if sube else precio <= p.tp)
+            if toca_sl or toca_tp:
+                self._close_position(p, precio, t, 'sl' if toca_sl else 'tp')
+
+    def _close_position(self, p, precio, t, comentario):
+        sim = self._simbolos[p.symbol]
+        signo = 1 if p.type == ORDER_TYPE_BUY else -1
+        profit = signo * (precio - p.price_open) * p.volume * sim.info.trade_contract_size
+        self.balance += profit
+        del self.positions[p.ticket]
+        return self._deal(p, 1 - p.type, DEAL_ENTRY_OUT, precio, t, comentario, profit)
+
+    def _deal(self, p, tipo, entrada, precio, t, comentario, profit=0.0):
+        ticket = next(self._tickets)
+        deal = _ns(ticket=ticket, order=ticket, position_id=p.ticket, symbol=p.symbol, type=tipo,
+                   entry=entrada, volume=p.volume, price=precio, profit=profit, time=t,
+                   magic=p.magic, comment=comentario)
+        self.deals.append(deal)
+        return deal
+
+    def _result(self, retcode, request, comment, **campos):
+        base = dict(retcode=retcode, deal=0, order=0, volume=0.0, price=0.0, bid=0.0, ask=0.0,
+                    comment=comment, request=request, request_id=0, retcode_external=0)
+        base.update(campos)
+        return _ns(**base)
+
+    def order_check(self, request):
+        with self._lock:
+            if not self._call():
+                return None
+            return self._validate(request) or self._result(0, request, 'Done')
+
+    def _validate(self, request):
+        """Resultado de error si la orden no es valida, None si se puede ejecutar"""
+        sim = self._symbol(request.get('symbol'))
+        if sim is None:
+            return self._result(10013, request, 'Invalid request')
+        volumen = float(request.get('volume', 0))
+        info = sim.info
+        pasos = round(volumen / info.volume_step, 6)
+        if volumen < info.volume_min or volumen > info.volume_max or pasos != int(pasos):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+        return None
+
+    def order_send(self, request):
+        """Ejecuta una orden a mercado (TRADE_ACTION_DEAL); con 'position' cierra esa posicion"""
+        with self._lock:
+            if not self._call():
+                return None
+            self._check_stops()
+            error = self._validate(request)
+            if error is not None:
+                return error
+
+            sim = self._simbolos[request['symbol']]
+            t = self._now()
+            bid, ask = (float(x) for x in sim.quote(t))
+            tipo = int(request.get('type', ORDER_TYPE_BUY))
+            precio = ask if tipo == ORDER_TYPE_BUY else bid
+            volumen = float(request['volume'])
+
+            ticket_posicion = request.get('position')
+            if ticket_posicion:
+                p = self.positions.get(int(ticket_posicion))
+                if p is None:
+                    return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position closed')
+                deal = self._close_position(p, precio, t, request.get('comment', ''))
+                return self._result(TRADE_RETCODE_DONE, request, 'Request executed', deal=deal.ticket,
+                                    order=deal.ticket, volume=p.volume, price=precio, bid=bid, ask=ask)
+
+            cuenta = self.account_info()
+            if self._margin(sim.name, volumen, precio) > cuenta.margin_free:
+                return self._result(TRADE_RETCODE_NO_MONEY, request, 'No money')
+
+            ticket = next(self._tickets)
+            p = self.positions[ticket] = _ns(
+                ticket=ticket, symbol=sim.name, type=tipo, volume=volumen, price_open=precio,
+                sl=float(request.get('sl', 0.0) or 0.0), tp=float(request.get('tp', 0.0) or 0.0),
+                time=t, magic=int(request.get('magic', 0)), comment=request.get('comment', ''),
+            )
+            deal = self._deal(p, tipo, DEAL_ENTRY_IN, precio, t, p.comment)
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed', deal=deal.ticket,
+                                order=ticket, volume=volumen, price=precio, bid=bid, ask=ask)
+
+    def positions_total(self):
+        with self._lock:
+            if not self._call():
+                return None
+            self._check_stops()
+            return len(self.positions)
+
+    def positions_get(self, symbol=None, ticket=None):
+        with self._lock:
+            if not self._call():
+                return None
+            self._check_stops()
+            resultado = []
+            for p in self.positions.values():
+                if symbol is not None and p.symbol != symbol:
+                    continue
+                if ticket is not None and p.ticket != ticket:
+                    continue
+                resultado.append(_ns(**vars(p), profit=self._profit(p)))
+            return tuple(resultado)
+
+    def history_deals_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        """Operaciones ejecutadas (filtro por fechas y grupo de simbolos, por ticket o por posicion)"""
+        with self._lock:
+            if not self._call():
+                return None
+            desde = None if date_from is None else self._seconds(date_from)
+            hasta = None if date_to is None else self._seconds(date_to)
+            resultado = []
+            for d in self.deals:
+                if ticket is not None and d.ticket != ticket:
+                    continue
+                if position is not None and d.position_id != position:
+                    continue
+                if desde is not None and d.time < desde or hasta is not None and d.time > hasta:
+                    continue
+                if group is not None and not fnmatch.fnmatch(d.symbol, group):
+                    continue
+                resultado.append(d)
+            return tuple(resultado)
+
+
+def _minutes(timeframe):
+    """Minutos de una temporalidad con codigo de MT5 (1..30 minutos, 0x4000 | horas, ...)"""
+    timeframe = int(timeframe)
+    if timeframe < 0x4000:
+        return timeframe
+    if timeframe & 0x8000:
+        return 7 * 1440 if timeframe == 0x8001 else 30 * 1440
+    horas = timeframe & 0x3FFF
+    return 60 * horas
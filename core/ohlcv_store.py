@@ -0,0 +1,227 @@
+# core/ohlcv_store.py
+# Almacen columnar de velas en disco, leido con memoria mapeada
+#
+# Estructura:  <root>/<SIMBOLO>/<TF>/time.bin, open.bin, high.bin, ...  + meta.json
+# Cada columna es un archivo binario contiguo (int64 para el tiempo en ns UTC,
+# float64 para el resto). Abrir un rango solo mapea los archivos y hace una
+# busqueda binaria sobre el tiempo: no se copia nada y las paginas se comparten
+# entre todos los procesos que lean el mismo simbolo.
+
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Columnas que se guardan si existen en el DataFrame
+COLUMNAS = ('open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume', 'ATR')
+
+
+class OHLCVStore:
+    """Velas por simbolo y temporalidad en archivos columnar mapeados en memoria"""
+
+    def __init__(self, root="storage/ohlcv"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._mapas = {}
+
+    def _dir(self, symbol, timeframe):
+        return self.root / symbol.upper() / timeframe.upper()
+
+    def _load_meta(self, symbol, timeframe):
+        """Lee el meta.json del simbolo (None si no existe)"""
+        try:
+            with open(self._dir(symbol, timeframe) / "meta.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_meta(self, symbol, timeframe, meta):
+        ruta = self._dir(symbol, timeframe) / "meta.json"
+        tmp = ruta.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        tmp.replace(ruta)
+
+    def exists(self, symbol, timeframe):
+        return self._load_meta(symbol, timeframe) is not None
+
+    def meta(self, symbol, timeframe):
+        """Metadatos del simbolo (filas, columnas y los campos añadidos con update_meta)"""
+        return self._load_meta(symbol, timeframe)
+
+    def update_meta(self, symbol, timeframe, **campos):
+        """Guarda campos extra en meta.json (se pierden si se reescribe el simbolo con write)"""
+        with self._lock:
+            meta = self._load_meta(symbol, timeframe)
+            if meta is None:
+                raise KeyError(f"No hay datos de {symbol} {timeframe}")
+            meta.update(campos)
+            self._save_meta(symbol, timeframe, meta)
+
+    # ---------------- Escritura ---------------- #
+    def write(self, symbol, timeframe, data):
+        """Reemplaza todas las velas guardadas del simbolo"""
+        carpeta = self._dir(symbol, timeframe)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        columnas = [c for c in COLUMNAS if c in data.columns]
+        with self._lock:
+            self._mapas.pop((symbol.upper(), timeframe.upper()), None)
+            self._write_column(carpeta / "time.bin", _utc_ns(data.index))
+            for c in columnas:
+                self._write_column(carpeta / f"{c}.bin", data[c].to_numpy(dtype=np.float64))
+            self._save_meta(symbol, timeframe, {'rows': len(data), 'columns': columnas})
+
+    def append(self, symbol, timeframe, data):
+        """Anexa velas posteriores a la ultima guardada sin reescribir los archivos.
+
+        meta.json se guarda al final: si el proceso muere a mitad, las filas
+        sobrantes de las columnas se descartan en el siguiente append.
+        """
+        meta = self._load_meta(symbol, timeframe)
+        if meta is None:
+            return self.write(symbol, timeframe, data)
+        if not len(data):
+            return
+
+        tiempo = _utc_ns(data.index)
+        ultimo = self._last_ns(symbol, timeframe)
+        if ultimo is not None and tiempo[0] <= ultimo:
+            nuevas = tiempo > ultimo
+            data, tiempo = data[nuevas], tiempo[nuevas]
+            if not len(data):
+                return
+
+        carpeta = self._dir(symbol, timeframe)
+        with self._lock:
+            self._mapas.pop((symbol.upper(), timeframe.upper()), None)
+            filas = meta['rows']
+            self._append_column(carpeta / "time.bin", tiempo, filas)
+            for c in meta['columns']:
+                valores = data[c].to_numpy(dtype=np.float64) if c in data.columns \
+                    else np.full(len(data), np.nan)
+                self._append_column(carpeta / f"{c}.bin", valores, filas)
+            meta['rows'] = filas + len(data)
+            self._save_meta(symbol, timeframe, meta)
+
+    @staticmethod
+    def _append_column(ruta, valores, filas):
+        """Añade al final de la columna tras recortarla a las `filas` de meta.json"""
+        valores = np.ascontiguousarray(valores)
+        with open(ruta, 'r+b') as f:
+            f.truncate(filas * valores.itemsize)
+            f.seek(0, 2)
+            f.write(valores.tobytes())
+
+    @staticmethod
+    def _write_column(ruta, valores):
+        # Al reescribir se sustituye el archivo en lugar de truncarlo: los memmaps
+        # abiertos sobre la version anterior siguen siendo validos
+        destino = ruta.with_suffix(".tmp")
+        with open(destino, 'wb') as f:
+            f.write(np.ascontiguousarray(valores).tobytes())
+        destino.replace(ruta)
+
+    # ---------------- Lectura ---------------- #
+    def _maps(self, symbol, timeframe):
+        """Memmaps de todas las columnas, abiertos una sola vez"""
+        clave = (symbol.upper(), timeframe.upper())
+        with self._lock:
+            mapas = self._mapas.get(clave)
+            if mapas is not None:
+                return mapas
+
+            meta = self._load_meta(symbol, timeframe)
+            if meta is None:
+                raise KeyError(f"No hay datos de {symbol} {timeframe}")
+            carpeta = self._dir(symbol, timeframe)
+            filas = meta['rows']
+            mapas = {'time': _memmap(carpeta / "time.bin", np.int64, filas)}
+            for c in meta['columns']:
+                mapas[c] = _memmap(carpeta / f"{c}.bin", np.float64, filas)
+            self._mapas[clave] = mapas
+            return mapas
+
+    def _last_ns(self, symbol, timeframe):
+        """Ultima vela guardada en ns UTC (None si no hay datos)"""
+        meta = self._load_meta(symbol, timeframe)
+        if not meta or not meta['rows']:
+            return None
+        return int(self._maps(symbol, timeframe)['time'][-1])
+
+    def last_timestamp(self, symbol, timeframe):
+        """Fecha de la ultima vela guardada en UTC sin zona (None si no hay datos)"""
+        ultimo = self._last_ns(symbol, timeframe)
+        return None if ultimo is None else pd.Timestamp(ultimo)
+
+    def first_timestamp(self, symbol, timeframe):
+        """Fecha de la primera vela guardada (None si no hay datos)"""
+        meta = self._load_meta(symbol, timeframe)
+        if not meta or not meta['rows']:
+            return None
+        tiempo = self._maps(symbol, timeframe)['time']
+        return pd.Timestamp(int(tiempo[0]), tz='UTC').tz_localize(None)
+
+    def arrays(self, symbol, timeframe, start=None, end=None):
+        """Vistas de solo lectura de cada columna entre start y end (ambos incluidos)"""
+        mapas = self._maps(symbol, timeframe)
+        tiempo = mapas['time']
+        i0 = 0 if start is None else int(np.searchsorted(tiempo, _ts_ns(start), side='left'))
+        i1 = len(tiempo) if end is None else int(np.searchsorted(tiempo, _ts_ns(end), side='right'))
+        return {c: m[i0:i1] for c, m in mapas.items()}
+
+    def frame(self, symbol, timeframe, start=None, end=None):
+        """DataFrame listo para strategy_class cuyas columnas apuntan al archivo mapeado"""
+        vistas = self.arrays(symbol, timeframe, start, end)
+        tiempo = vistas.pop('time')
+        index = pd.DatetimeIndex(tiempo.view('M8[ns]'), copy=False, name='time')
+        return pd.DataFrame(vistas, index=index, copy=False)
+
+    def chunks(self, symbol, timeframe, rows, start=None, end=None):
+        """DataFrames consecutivos de `rows` filas entre start y end, para recorrer historicos largos"""
+        vistas = self.arrays(symbol, timeframe, start, end)
+        tiempo = vistas.pop('time')
+        for i in range(0, len(tiempo), rows):
+            index = pd.DatetimeIndex(tiempo[i:i + rows].view('M8[ns]'), copy=False, name='time')
+            yield pd.DataFrame({c: v[i:i + rows] for c, v in vistas.items()}, index=index, copy=False)
+
+    def descriptor(self, symbol, timeframe, start=None, end=None):
+        """Referencia serializable a un rango; cada proceso lo abre con open_descriptor"""
+        return {
+            'store': str(self.root),
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'start': None if start is None else str(pd.Timestamp(start)),
+            'end': None if end is None else str(pd.Timestamp(end)),
+        }
+
+
+def open_descriptor(descriptor):
+    """Abre el rango descrito por OHLCVStore.descriptor en este proceso"""
+    store = OHLCVStore(descriptor['store'])
+    return store.frame(descriptor['symbol'], descriptor['timeframe'],
+                       descriptor['start'], descriptor['end'])
+
+
+def _memmap(ruta, dtype, filas):
+    """Memmap de solo lectura (array vacio si no hay filas)"""
+    if not filas:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(ruta, dtype=dtype, mode='r', shape=(filas,))
+
+
+def _utc_ns(index):
+    """Fechas del indice como int64 en ns UTC"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8
+
+
+def _ts_ns(fecha):
+    fecha = pd.Timestamp(fecha)
+    if fecha.tz is not None:
+        fecha = fecha.tz_convert('UTC').tz_localize(None)
+    return fecha.as_unit('ns').value
@@ -0,0 +1,151 @@
+# core/optimizer.py
+# Barrido de parametros de strategy_class en paralelo con un pool de procesos
+
+import bisect
+import itertools
+import os
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+from core.backtest import summarize
+from core.bar_pyramid import get_pyramid
+from core.ohlcv_store import open_descriptor
+from core.shared_frame import SharedFrame, attach_frame
+from core.strategy_registry import create_strategy
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Estado de cada proceso del pool (se rellena una sola vez en _init_worker)
+_worker = {}
+
+
+def param_grid(**ranges):
+    """Producto cartesiano de los valores de cada parametro"""
+    nombres = list(ranges)
+    return [dict(zip(nombres, valores)) for valores in itertools.product(*ranges.values())]
+
+
+def _init_worker(descriptor, symbol, decimal, swap, tamcontrato, strategy='ict_money'):
+    """Se ejecuta una vez por proceso: enlaza las velas compartidas y arma la piramide"""
+    if 'store' in descriptor:
+        # Velas del almacen en disco: cada proceso mapea los mismos archivos
+        data, shm = open_descriptor(descriptor), None
+    else:
+        data, shm = attach_frame(descriptor)
+    _worker.update({
+        'data': data,
+        'shm': shm,
+        'pyramid': get_pyramid(data),
+        'symbol': symbol,
+        'decimal': decimal,
+        'swap': swap,
+        'tamcontrato': tamcontrato,
+        'strategy': strategy,
+    })
+
+
+def evaluate(data, symbol, decimal, swap, tamcontrato, params, pyramid=None, strategy='ict_money'):
+    """Ejecuta un backtest vectorizado de la estrategia registrada y devuelve sus metricas"""
+    estrategia = create_strategy(strategy, symbol, decimal, swap, tamcontrato, **params)
+    operaciones = estrategia.backtest(data, pyramid=pyramid)
+    resultado = summarize(operaciones, estrategia.initial_cash)
+    resultado['params'] = params
+    return resultado
+
+
+def run_task(task):
+    """Tarea del pool: un dict de parametros o (parametros, (inicio, fin)) para un tramo"""
+    params, tramo = task if isinstance(task, tuple) else (task, None)
+    w = _worker
+    data, pyramid = w['data'], w['pyramid']
+    if tramo is not None:
+        # Vista del tramo: las velas mayores salen de la piramide ya calculada
+        data = data.iloc[tramo[0]:tramo[1]]
+        pyramid = pyramid.slice(data.index[0], data.index[-1])
+    return evaluate(data, w['symbol'], w['decimal'], w['swap'], w['tamcontrato'],
+                    params, pyramid=pyramid, strategy=w['strategy'])
+
+
+@contextmanager
+def worker_pool(data, symbol, decimal, swap, tamcontrato, workers=None, strategy='ict_money'):
+    """Pool de procesos que comparten las velas de `data`.
+
+    `data` puede ser un DataFrame (se copia una vez a memoria compartida) o el
+    descriptor de un rango de OHLCVStore (cada proceso mapea los archivos).
+    """
+    if isinstance(data, dict):
+        with _pool(data, symbol, decimal, swap, tamcontrato, workers, strategy) as pool:
+            yield pool
+        return
+
+    columnas = [c for c in data.columns if data[c].dtype.kind in 'fiub']
+    with SharedFrame(data[columnas]) as compartido:
+        with _pool(compartido.descriptor, symbol, decimal, swap, tamcontrato, workers, strategy) as pool:
+            yield pool
+
+
+def _pool(descriptor, symbol, decimal, swap, tamcontrato, workers, strategy='ict_money'):
+    initargs = (descriptor, symbol, decimal, swap, tamcontrato, strategy)
+    return get_context().Pool(workers or os.cpu_count() or 1,
+                              initializer=_init_worker, initargs=initargs)
+
+
+class ParameterSweep:
+    """Reparte una rejilla de parametros entre procesos y ordena los resultados al llegar.
+
+    Las velas se copian una sola vez a memoria compartida (o se mapean desde
+    OHLCVStore si `data` es un descriptor); cada tarea solo envia su dict de
+    parametros. `ranking` se mantiene ordenado por `sort_key`
+    (descendente) mientras `run()` va entregando resultados.
+    """
+
+    def __init__(self, data, symbol, decimal, swap, tamcontrato, grid,
+                 workers=None, sort_key='net_profit', chunksize=None, strategy='ict_money'):
+        self.data = data
+        self.symbol = symbol
+        self.decimal = decimal
+        self.swap = swap
+        self.tamcontrato = tamcontrato
+        self.grid = list(grid)
+        self.workers = workers or os.cpu_count() or 1
+        self.sort_key = sort_key
+        self.chunksize = chunksize
+        self.strategy = strategy
+        self.ranking = []
+        self._claves = []
+
+    def _add(self, resultado):
+        """Inserta un resultado manteniendo el ranking ordenado"""
+        clave = -resultado[self.sort_key]
+        pos = bisect.bisect_right(self._claves, clave)
+        self._claves.insert(pos, clave)
+        self.ranking.insert(pos, resultado)
+
+    def run(self):
+        """Generador: devuelve cada resultado en cuanto termina"""
+        self.ranking, self._claves = [], []
+
+        # Lotes pequeños para repartir bien la carga entre todos los nucleos
+        chunksize = self.chunksize or max(1, len(self.grid) // (self.workers * 8))
+        logger.info(f"Barrido de {len(self.grid)} combinaciones en {self.workers} procesos")
+
+        with worker_pool(self.data, self.symbol, self.decimal, self.swap, self.tamcontrato,
+                         self.workers, self.strategy) as pool:
+            for resultado in pool.imap_unordered(run_task, self.grid, chunksize=chunksize):
+                self._add(resultado)
+                yield resultado
+
+    def best(self, n=10):
+        """Las n mejores combinaciones evaluadas hasta ahora"""
+        return self.ranking[:n]
+
+
+def optimize(data, symbol, decimal, swap, tamcontrato, grid, workers=None, sort_key='net_profit',
+             strategy='ict_money'):
+    """Ejecuta el barrido completo y devuelve el ranking"""
+    barrido = ParameterSweep(data, symbol, decimal, swap, tamcontrato, grid,
+                             workers=workers, sort_key=sort_key, strategy=strategy)
+    for _ in barrido.run():
+        pass
+    return barrido.ranking
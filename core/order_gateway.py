@@ -0,0 +1,307 @@
+# core/order_gateway.py
+# Pasarela de ordenes asincrona hacia MT5
+#
+# Cualquier hilo (la GUI, el bot) encola ordenes y recibe un Future al
+# momento; un hilo dedicado las ejecuta contra el terminal respetando el
+# limite de peticiones del broker. El bucle de Tk nunca espera la respuesta
+# del servidor: consulta future.done() con after().
+#
+# "Cerrar todo" se resuelve en un solo paso del hilo: una lectura de las
+# posiciones y todas las ordenes de cierre seguidas, sin volver a la cola
+# entre una y otra. Un cierre que falla no detiene el resto.
+#
+# Cada orden se envia una sola vez. Si el terminal no responde, tras la
+# reconexion se busca la orden por magic y comentario (cada envio lleva una
+# etiqueta unica en el comentario) en las posiciones y en el historial para
+# saber si llego a ejecutarse.
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from core.mt5_manager import MT5ConnectionError, get_manager
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Constantes de MT5
+TRADE_ACTION_DEAL = 1
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_IOC = 1
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+# Longitud maxima del comentario de una orden en MT5
+COMMENT_LENGTH = 31
+# Margen de fechas al buscar en el historial (la hora del servidor no es la local)
+HISTORY_WINDOW = 2 * 86400
+
+# Espera maxima al detener el hilo (segundos)
+STOP_TIMEOUT = 2.0
+
+# Peticiones por segundo y rafaga maxima permitidas por defecto
+MAX_REQUESTS = 10.0
+BURST = 5
+
+
+class OrderError(RuntimeError):
+    """El servidor rechazo la orden; `result` es la respuesta de order_send"""
+
+    def __init__(self, result, message=None):
+        self.result = result
+        retcode = getattr(result, 'retcode', None)
+        comentario = getattr(result, 'comment', '')
+        super().__init__(message or f"Orden rechazada ({retcode}): {comentario}")
+
+
+class RateLimiter:
+    """Token bucket: `rate` peticiones por segundo con rafagas de hasta `burst`"""
+
+    def __init__(self, rate=MAX_REQUESTS, burst=BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._ultimo = clock()
+
+    def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        while True:
+            ahora = self._clock()
+            self._tokens = min(self.burst, self._tokens + (ahora - self._ultimo) * self.rate)
+            self._ultimo = ahora
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            self._sleep((1 - self._tokens) / self.rate)
+
+
+class OrderGateway(threading.Thread):
+    """Cola de ordenes con un hilo ejecutor; cada metodo devuelve un Future"""
+
+    def __init__(self, manager=None, rate=MAX_REQUESTS, burst=BURST, deviation=20, magic=0,
+                 filling=ORDER_FILLING_IOC, limiter=None):
+        super().__init__(name="OrderGateway", daemon=True)
+        self.manager = manager if manager is not None else get_manager()
+        self.limiter = limiter if limiter is not None else RateLimiter(rate, burst)
+        self.deviation = deviation
+        self.magic = magic
+        self.filling = filling
+        self._cola = queue.Queue()
+        self._cerrado = False
+        self._cierre = threading.Lock()
+        # Etiquetas de comentario unicas por sesion para reconocer cada envio
+        self._sesion = f"{int(time.time()) & 0xFFFFF:x}"
+        self._contador = itertools.count(1)
+
+    # ---------------- Entrada (cualquier hilo) ---------------- #
+    def _enqueue(self, tarea, *args):
+        future = Future()
+        # Mismo lock que stop(): ninguna orden puede quedar detras del centinela
+        with self._cierre:
+            if self._cerrado:
+                raise RuntimeError("La pasarela de ordenes esta detenida")
+            self._cola.put((tarea, args, future))
+        return future
+
+    def submit(self, request):
+        """Envia una peticion de order_send tal cual; el Future da la respuesta"""
+        return self._enqueue(self._send, dict(request))
+
+    def buy(self, symbol, volume, sl=0.0, tp=0.0, comment=''):
+        return self._enqueue(self._market, symbol, ORDER_TYPE_BUY, volume, sl, tp, comment)
+
+    def sell(self, symbol, volume, sl=0.0, tp=0.0, comment=''):
+        return self._enqueue(self._market, symbol, ORDER_TYPE_SELL, volume, sl, tp, comment)
+
+    def close(self, ticket, comment=''):
+        """Cierra una posicion por su ticket"""
+        return self._enqueue(self._close_ticket, ticket, comment)
+
+    def close_all(self, symbol=None, comment=''):
+        """Cierra todas las posiciones (o las de un simbolo); el Future da la lista de respuestas"""
+        return self._enqueue(self._close_all, symbol, comment)
+
+    def pending(self):
+        return self._cola.qsize()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Deja de aceptar ordenes y cancela las encoladas; la que este en curso termina.
+
+        Espera al hilo como mucho `timeout` segundos para no bloquear la
+        interfaz si el terminal no responde; devuelve cuantas se cancelaron.
+        """
+        canceladas = 0
+        with self._cierre:
+            self._cerrado = True
+            while True:
+                try:
+                    item = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and item[2].cancel():
+                    canceladas += 1
+            self._cola.put(None)
+        if canceladas:
+            logger.warning(f"{canceladas} ordenes pendientes canceladas al detener la pasarela")
+        if self.is_alive():
+            self.join(timeout)
+        return canceladas
+
+    # ---------------- Hilo ejecutor ---------------- #
+    def run(self):
+        while True:
+            item = self._cola.get()
+            if item is None:
+                break
+            tarea, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(tarea(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _tag(self, comment):
+        """Comentario con una etiqueta unica al final (#sesion-n)"""
+        etiqueta = f"#{self._sesion}-{next(self._contador):x}"
+        return f"{comment or ''}"[:COMMENT_LENGTH - len(etiqueta)] + etiqueta
+
+    def _order_send(self, request):
+        """order_send con limite de peticiones, enviado una sola vez.
+
+        Sin respuesta del terminal se comprueba si la orden se ejecuto; si no
+        hay rastro de ella se lanza MT5ConnectionError.
+        """
+        request.setdefault('magic', self.magic)
+        request['comment'] = self._tag(request.get('comment'))
+        self.limiter.acquire()
+        resultado = self.manager.order_send(request)
+        if resultado is not None:
+            return resultado
+        error = self.manager.last_error
+        resultado = self._reconcile(request)
+        if resultado is None:
+            raise MT5ConnectionError(f"Sin respuesta del terminal, la orden no se ejecuto: {error}")
+        logger.warning(f"Orden {request['comment']} sin respuesta pero ejecutada (deal {resultado.deal})")
+        return resultado
+
+    def _reconcile(self, request):
+        """Respuesta reconstruida de una orden sin respuesta que si se ejecuto (None si no)"""
+        magic = request['magic']
+        comentario = request['comment']
+        posicion = request.get('position')
+        if posicion:
+            deals = self.manager.call('history_deals_get', position=int(posicion)) or ()
+            entrada = DEAL_ENTRY_OUT
+        else:
+            abiertas = self.manager.call('positions_get', symbol=request['symbol']) or ()
+            for p in abiertas:
+                if p.magic == magic and p.comment == comentario:
+                    return self._recovered(request, deal=0, order=p.ticket, volume=p.volume,
+                                           price=p.price_open)
+            ahora = time.time()
+            deals = self.manager.call('history_deals_get', int(ahora - HISTORY_WINDOW),
+                                      int(ahora + HISTORY_WINDOW), group=request['symbol']) or ()
+            entrada = DEAL_ENTRY_IN
+        for d in deals:
+            if d.magic == magic and d.comment == comentario and d.entry == entrada:
+                return self._recovered(request, deal=d.ticket, order=d.order, volume=d.volume, price=d.price)
+        return None
+
+    @staticmethod
+    def _recovered(request, **campos):
+        return SimpleNamespace(retcode=TRADE_RETCODE_DONE, comment='Recuperada tras reconexion',
+                               request=request, bid=0.0, ask=0.0, request_id=0, retcode_external=0,
+                               **campos)
+
+    def _send(self, request):
+        resultado = self._order_send(request)
+        if resultado.retcode not in (TRADE_RETCODE_DONE, TRADE_RETCODE_DONE_PARTIAL):
+            raise OrderError(resultado)
+        return resultado
+
+    def _request(self, symbol, tipo, volume, comment, **campos):
+        tick = self.manager.symbol_tick(symbol)
+        if tick is None:
+            raise MT5ConnectionError(f"Sin precio para {symbol}: {self.manager.last_error}")
+        request = {
+            'action': TRADE_ACTION_DEAL,
+            'symbol': symbol,
+            'volume': float(volume),
+            'type': tipo,
+            'price': tick.ask if tipo == ORDER_TYPE_BUY else tick.bid,
+            'deviation': self.deviation,
+            'magic': self.magic,
+            'comment': comment,
+            'type_time': ORDER_TIME_GTC,
+            'type_filling': self.filling,
+        }
+        request.update(campos)
+        return request
+
+    def _market(self, symbol, tipo, volume, sl, tp, comment):
+        request = self._request(symbol, tipo, volume, comment, sl=float(sl or 0.0), tp=float(tp or 0.0))
+        resultado = self._send(request)
+        logger.info(f"Orden {'BUY' if tipo == ORDER_TYPE_BUY else 'SELL'} {volume} {symbol} "
+                    f"ejecutada a {resultado.price}")
+        return resultado
+
+    def _close_request(self, p, comment):
+        opuesto = ORDER_TYPE_SELL if p.type == ORDER_TYPE_BUY else ORDER_TYPE_BUY
+        return self._request(p.symbol, opuesto, p.volume, comment, position=p.ticket)
+
+    def _close_ticket(self, ticket, comment):
+        posiciones = self.manager.call('positions_get', ticket=int(ticket))
+        if not posiciones:
+            raise KeyError(f"No existe la posicion {ticket}")
+        return self._send(self._close_request(posiciones[0], comment))
+
+    def _close_all(self, symbol, comment):
+        # Una lectura fallida no es "nada que cerrar": se informa como error
+        if symbol is None:
+            posiciones = self.manager.call('positions_get')
+        else:
+            posiciones = self.manager.call('positions_get', symbol=symbol)
+        if posiciones is None:
+            raise MT5ConnectionError(f"No se pudieron leer las posiciones: {self.manager.last_error}")
+        resultados = []
+        for p in posiciones:
+            try:
+                resultados.append(self._order_send(self._close_request(p, comment)))
+            except MT5ConnectionError as e:
+                logger.error(f"No se pudo cerrar la posicion {p.ticket}: {e}")
+                resultados.append(None)
+        cerradas, rechazadas, fallidas = close_summary(resultados)
+        logger.info(f"Cerrar todo: {cerradas}/{len(posiciones)} posiciones cerradas, "
+                    f"{rechazadas} rechazadas, {fallidas} sin respuesta")
+        return resultados
+
+
+def close_summary(resultados):
+    """(cerradas, rechazadas, sin respuesta) de la lista que devuelve close_all"""
+    cerradas = sum(r is not None and r.retcode == TRADE_RETCODE_DONE for r in resultados)
+    fallidas = sum(r is None for r in resultados)
+    return cerradas, len(resultados) - cerradas - fallidas, fallidas
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway(**kwargs):
+    """Pasarela de ordenes de la aplicacion (arrancada la primera vez)"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = OrderGateway(**kwargs)
+            _gateway.start()
+        return _gateway
@@ -0,0 +1,189 @@
+# core/portfolio.py
+# Backtest de cartera: señales por simbolo en paralelo y una sola cuenta comun
+
+import os
+from multiprocessing import get_context
+
+import numpy as np
+
+from core.costs import trade_costs
+from core.ledger import TradeLedger
+from core.shared_frame import SharedFrame, attach_frame
+from core.strategies.ict_money import strategy_class
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Estado de cada proceso del pool
+_worker = {}
+
+
+def _init_worker(descriptors):
+    """Enlaza una sola vez las velas compartidas de todos los simbolos"""
+    for simbolo, descriptor in descriptors.items():
+        data, shm = attach_frame(descriptor)
+        _worker[simbolo] = (data, shm)
+
+
+def _symbol_trades(task):
+    """Genera las operaciones de un simbolo con lote fijo; el tamaño real se decide al fusionar"""
+    simbolo, spec, params = task
+    data, _ = _worker[simbolo]
+    params = dict(params, risk=0.0)
+    estrategia = strategy_class(data, simbolo, spec['decimal'], spec['swap'], spec['tamcontrato'],
+                                copy=False, **params)
+    filas = estrategia.run(vectorized=True).rows
+    return simbolo, filas.copy()
+
+
+class PortfolioBacktest:
+    """Varios simbolos operados sobre un mismo balance y margen.
+
+    `symbols` es un dict simbolo -> {'data', 'decimal', 'swap', 'tamcontrato'}.
+    Cada simbolo se procesa en un proceso distinto sobre memoria compartida y
+    despues las entradas y salidas se recorren en orden cronologico: el
+    volumen de cada entrada se calcula con el balance comun en ese momento
+    (`risk` por operacion, o lote minimo si risk es 0) y solo se abre si el
+    margen libre lo permite. Se asume que la divisa de cotizacion de cada
+    simbolo es la de la cuenta.
+    """
+
+    def __init__(self, symbols, params=None, cash=10000, risk=0.01, leverage=100,
+                 min_volume=0.01, workers=None):
+        self.symbols = symbols
+        self.params = params or {}
+        self.initial_cash = float(cash)
+        self.cash = self.initial_cash
+        self.risk = risk
+        self.leverage = leverage
+        self.min_volume = min_volume
+        self.workers = workers or min(len(symbols), os.cpu_count() or 1)
+
+        self.operations = TradeLedger()
+        self.trade_symbols = []
+        self.rejected = 0
+
+    # ---------------- Señales en paralelo ---------------- #
+    def _generate(self):
+        """Operaciones candidatas de cada simbolo calculadas en paralelo"""
+        compartidos = {}
+        try:
+            for simbolo, spec in self.symbols.items():
+                data = spec['data']
+                columnas = [c for c in data.columns if data[c].dtype.kind in 'fiub']
+                compartidos[simbolo] = SharedFrame(data[columnas])
+
+            descriptores = {s: c.descriptor for s, c in compartidos.items()}
+            tareas = [(s, {k: v for k, v in spec.items() if k != 'data'}, self.params)
+                      for s, spec in self.symbols.items()]
+            with get_context().Pool(self.workers, initializer=_init_worker,
+                                    initargs=(descriptores,)) as pool:
+                return dict(pool.imap_unordered(_symbol_trades, tareas))
+        finally:
+            for c in compartidos.values():
+                c.close()
+
+    # ---------------- Cuenta comun ---------------- #
+    def run(self):
+        """Ejecuta la cartera y devuelve el ledger de la cuenta"""
+        logger.info(f"Backtest de cartera con {len(self.symbols)} simbolos en {self.workers} procesos")
+        por_simbolo = self._generate()
+
+        self.cash = self.initial_cash
+        self.operations = TradeLedger()
+        self.trade_symbols = []
+        self.rejected = 0
+        if not por_simbolo:
+            return self.operations
+
+        nombres = sorted(por_simbolo)
+        bloques = [por_simbolo[s] for s in nombres]
+        codigos = np.concatenate([np.full(len(b), k) for k, b in enumerate(bloques)])
+        todas = np.concatenate(bloques)
+        if not len(todas):
+            return self.operations
+
+        # Eventos: salidas antes que entradas cuando coinciden en el tiempo
+        n = len(todas)
+        tiempos = np.concatenate((todas['fecha_entrada'], todas['fecha_salida']))
+        es_entrada = np.concatenate((np.ones(n, dtype=np.int8), np.zeros(n, dtype=np.int8)))
+        trade = np.concatenate((np.arange(n), np.arange(n)))
+        orden = np.lexsort((es_entrada, tiempos))
+
+        tc = np.array([self.symbols[s]['tamcontrato'] for s in nombres], dtype=np.float64)[codigos]
+        lotes = np.zeros(n)
+        abiertas = np.zeros(n, dtype=bool)
+        margen_usado = 0.0
+        cerradas = []
+
+        # El bucle es por evento (dos por operacion), no por vela
+        for e in orden:
+            k = trade[e]
+            t = todas[k]
+            if es_entrada[e]:
+                distancia = abs(t['precio_entrada'] - t['sl'])
+                if self.risk > 0 and distancia > 0:
+                    volumen = self.cash * self.risk / (distancia * tc[k])
+                else:
+                    volumen = self.min_volume
+                margen = volumen * tc[k] * t['precio_entrada'] / self.leverage
+                if margen_usado + margen > self.cash:
+                    self.rejected += 1
+                    continue
+                lotes[k] = volumen
+                abiertas[k] = True
+                margen_usado += margen
+            elif abiertas[k]:
+                abiertas[k] = False
+                margen_usado -= lotes[k] * tc[k] * t['precio_entrada'] / self.leverage
+                movimiento = int(t['tipo']) * (t['precio_salida'] - t['precio_entrada'])
+                # El beneficio es la variacion del saldo, igual que en strategy_class
+                nuevo_cash = self.cash + movimiento * lotes[k] * tc[k]
+                cerradas.append((k, nuevo_cash - self.cash, nuevo_cash))
+                self.cash = nuevo_cash
+
+        if cerradas:
+            idx, profit, cash = (np.array(v) for v in zip(*cerradas))
+            filas = todas[idx]
+            self.operations.extend(
+                tipo=filas['tipo'],
+                fecha_entrada=filas['fecha_entrada'],
+                precio_entrada=filas['precio_entrada'],
+                sl=filas['sl'],
+                tp=filas['tp'],
+                lotes=lotes[idx],
+                fecha_salida=filas['fecha_salida'],
+                precio_salida=filas['precio_salida'],
+                salida=filas['salida'],
+                profit=profit,
+                cash=cash,
+            )
+            self.trade_symbols = [nombres[c] for c in codigos[idx]]
+        return self.operations
+
+    def stats(self):
+        """Estadisticas de la cuenta comun"""
+        resultado = self.operations.stats(self.initial_cash)
+        resultado['rejected'] = self.rejected
+        return resultado
+
+    def costs(self, commission_per_lot=0.0, broker_tz='UTC'):
+        """Swap, comision y beneficio neto de cada operacion, calculados por simbolo en bloque"""
+        filas = self.operations.rows
+        simbolos = np.asarray(self.trade_symbols, dtype=object)
+        resultado = {c: np.zeros(len(filas)) for c in ('pip_value', 'nights', 'swap', 'commission', 'net_profit')}
+        for simbolo, spec in self.symbols.items():
+            sel = np.flatnonzero(simbolos == simbolo)
+            if not len(sel):
+                continue
+            costes = trade_costs(filas[sel], spec['decimal'], spec['swap'], spec['tamcontrato'],
+                                 commission_per_lot, broker_tz)
+            for c, valores in costes.items():
+                resultado[c][sel] = valores
+        return resultado
+
+    def to_frame(self):
+        """Operaciones de la cartera con su simbolo"""
+        df = self.operations.to_frame()
+        df.insert(0, 'symbol', self.trade_symbols)
+        return df
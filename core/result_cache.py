@@ -0,0 +1,226 @@
+# core/result_cache.py
+# Cache persistente de resultados de backtest con expulsion LRU por tamaño
+
+import ast
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.bar_pyramid import data_key
+from core.ledger import DTYPE, TradeLedger
+from core.strategy_registry import create_strategy, get_strategy
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+CORE = Path(__file__).parent
+
+# Estrategia por defecto cuando no se indica el archivo
+_ESTRATEGIA = CORE / "strategies" / "ict_money.py"
+
+_importados = {}   # archivo -> (mtime_ns, modulos de core que importa directamente)
+_versiones = {}    # (archivo, mtime_ns, tamaño) de todas las dependencias -> hash
+
+
+def _module_file(nombre):
+    """Archivo de un modulo `core.*` (None si no es de core o no existe)"""
+    if nombre != 'core' and not nombre.startswith('core.'):
+        return None
+    ruta = CORE.joinpath(*nombre.split('.')[1:])
+    for candidato in (ruta.with_suffix('.py'), ruta / '__init__.py'):
+        if candidato.is_file():
+            return candidato.resolve()
+    return None
+
+
+def _direct_imports(ruta, mtime):
+    """Modulos de core importados por un archivo, releido solo si cambio su mtime"""
+    memo = _importados.get(ruta)
+    if memo is not None and memo[0] == mtime:
+        return memo[1]
+    nombres = []
+    for nodo in ast.walk(ast.parse(ruta.read_bytes())):
+        if isinstance(nodo, ast.Import):
+            nombres += [a.name for a in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+            # `from core import ledger` importa el submodulo core.ledger
+            nombres += [nodo.module] + [f"{nodo.module}.{a.name}" for a in nodo.names]
+    archivos = {a for a in map(_module_file, nombres) if a is not None}
+    _importados[ruta] = (mtime, archivos)
+    return archivos
+
+
+def dependencies(strategy_file=None):
+    """Archivo de la estrategia y todos los modulos de core que importa, transitivamente.
+
+    Devuelve {archivo: (mtime_ns, tamaño)}.
+    """
+    pendientes = [Path(strategy_file or _ESTRATEGIA).resolve()]
+    vistos = {}
+    while pendientes:
+        ruta = pendientes.pop()
+        if ruta in vistos:
+            continue
+        st = ruta.stat()
+        vistos[ruta] = (st.st_mtime_ns, st.st_size)
+        pendientes.extend(_direct_imports(ruta, st.st_mtime_ns))
+    return vistos
+
+
+def code_version(strategy_file=None):
+    """Hash del codigo de la estrategia y de los modulos de core de los que depende.
+
+    Solo se vuelve a leer el contenido si cambia el mtime o el tamaño de algun archivo.
+    """
+    firma = tuple(sorted((str(r), *m) for r, m in dependencies(strategy_file).items()))
+    version = _versiones.get(firma)
+    if version is None:
+        h = hashlib.blake2b(digest_size=8)
+        for ruta, *_ in firma:
+            h.update(Path(ruta).read_bytes())
+        version = _versiones[firma] = h.hexdigest()
+    return version
+
+
+def fingerprint(data, symbol, params, mode='vectorized', strategy_file=None):
+    """Clave de un backtest: simbolo, rango, contenido de las velas, parametros y version"""
+    h = hashlib.blake2b(digest_size=16)
+    contenido = data_key(data)
+    if 'ATR' in data.columns:
+        contenido += hashlib.blake2b(data['ATR'].to_numpy(dtype=np.float64).tobytes(),
+                                     digest_size=8).hexdigest()
+    clave = {
+        'symbol': symbol,
+        'start': str(data.index[0]) if len(data) else None,
+        'end': str(data.index[-1]) if len(data) else None,
+        'rows': len(data),
+        'data': contenido,
+        'params': {k: params.get(k) for k in sorted(params)},
+        'mode': mode,
+        'code': code_version(strategy_file),
+    }
+    h.update(json.dumps(clave, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Operaciones y curva de capital guardadas en disco por huella del backtest.
+
+    Cada entrada son dos archivos (<clave>.npy con las filas del ledger y
+    <clave>.json con los metadatos). La fecha de modificacion se actualiza en
+    cada acierto y, al superar `max_bytes`, se borran las entradas usadas hace
+    mas tiempo.
+    """
+
+    def __init__(self, cache_dir="storage/backtest_cache", max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key):
+        return self.cache_dir / f"{key}.npy", self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """Devuelve (ledger, meta) o None si no esta en cache"""
+        filas_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            filas = np.load(filas_path, allow_pickle=False)
+        except (FileNotFoundError, ValueError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        if filas.dtype != DTYPE:
+            self.misses += 1
+            return None
+
+        # Marca de uso para la expulsion LRU
+        ahora = time.time()
+        for ruta in (filas_path, meta_path):
+            try:
+                os.utime(ruta, (ahora, ahora))
+            except OSError:
+                pass
+
+        ledger = TradeLedger(capacity=len(filas), tz=meta.get('tz'))
+        ledger.extend(**{campo: filas[campo] for campo in DTYPE.names})
+        self.hits += 1
+        return ledger, meta
+
+    def put(self, key, ledger, meta):
+        """Guarda un resultado y aplica el limite de tamaño"""
+        filas_path, meta_path = self._paths(key)
+        meta = dict(meta, tz=ledger.tz)
+        with self._lock:
+            tmp = filas_path.with_suffix(".tmp.npy")
+            np.save(tmp, ledger.rows, allow_pickle=False)
+            tmp.replace(filas_path)
+            tmp = meta_path.with_suffix(".tmp.json")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2, default=str)
+            os.replace(tmp, meta_path)
+            self._evict()
+
+    def _evict(self):
+        """Borra las entradas menos usadas hasta quedar por debajo de max_bytes"""
+        entradas = {}
+        for ruta in self.cache_dir.iterdir():
+            if ruta.suffix not in ('.npy', '.json'):
+                continue
+            st = ruta.stat()
+            total, usado = entradas.get(ruta.stem, (0, 0))
+            entradas[ruta.stem] = (total + st.st_size, max(usado, st.st_mtime))
+
+        ocupado = sum(t for t, _ in entradas.values())
+        for clave, (tamaño, _) in sorted(entradas.items(), key=lambda e: e[1][1]):
+            if ocupado <= self.max_bytes:
+                break
+            for ruta in self._paths(clave):
+                try:
+                    ruta.unlink()
+                except FileNotFoundError:
+                    pass
+            ocupado -= tamaño
+
+    def clear(self):
+        with self._lock:
+            for ruta in self.cache_dir.iterdir():
+                if ruta.suffix in ('.npy', '.json'):
+                    ruta.unlink()
+
+    # ---------------- Ejecucion con cache ---------------- #
+    def run(self, data, symbol, decimal, swap, tamcontrato, mode='vectorized', strategy='ict_money', **params):
+        """Ejecuta la estrategia registrada solo si el resultado no esta en cache.
+
+        Devuelve (operaciones, meta); meta incluye 'cash' final e 'initial_cash'.
+        La curva de capital se obtiene con operaciones.equity(meta['initial_cash']).
+        """
+        cls = get_strategy(strategy)
+        clave_params = dict(cls.defaults(), **params, decimal=decimal, swap=swap, tamcontrato=tamcontrato,
+                            strategy=strategy)
+        key = fingerprint(data, symbol, clave_params, mode, inspect.getsourcefile(cls))
+        encontrado = self.get(key)
+        if encontrado is not None:
+            return encontrado
+
+        estrategia = create_strategy(strategy, symbol, decimal, swap, tamcontrato, **params)
+        operaciones = estrategia.backtest(data, mode=mode)
+
+        meta = {
+            'symbol': symbol,
+            'params': clave_params,
+            'mode': mode,
+            'initial_cash': estrategia.initial_cash,
+            'cash': estrategia.cash,
+        }
+        self.put(key, operaciones, meta)
+        return operaciones, meta
@@ -0,0 +1,167 @@
+# core/sessions.py
+# Calendario de sesiones / kill zones precalculado como columna de enteros
+#
+# Las kill zones de ICT se definen en hora de Nueva York, por lo que el horario
+# de verano de EEUU se aplica solo al convertir. Las velas de MT5 vienen en la
+# hora del servidor del broker (broker_tz). Cada vela se convierte una sola vez
+# a minuto del dia en Nueva York y se traduce a un ID con una tabla de 1440
+# posiciones: filtrar por sesion queda en una comparacion de arrays.
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import time
+
+import numpy as np
+import pandas as pd
+
+# IDs de sesion
+NONE = 0
+ASIA = 1
+LONDON = 2
+NEW_YORK = 3
+LONDON_CLOSE = 4
+
+# Horario de cada kill zone en hora de Nueva York (inicio incluido, fin excluido)
+SESSIONS = {
+    'asia': (ASIA, time(20, 0), time(0, 0)),
+    'london': (LONDON, time(2, 0), time(5, 0)),
+    'new_york': (NEW_YORK, time(7, 0), time(10, 0)),
+    'london_close': (LONDON_CLOSE, time(10, 0), time(12, 0)),
+}
+
+REFERENCE_TZ = 'America/New_York'
+
+# Cambio de dia del mercado en hora de Nueva York: la semana va del domingo a
+# las 17:00 al viernes a las 17:00
+ROLLOVER_HOUR = 17
+
+# Numero maximo de calendarios guardados
+MAX_CALENDARIOS = 64
+
+
+def _build_table(sessions):
+    """ID de sesion para cada minuto del dia"""
+    tabla = np.zeros(24 * 60, dtype=np.int8)
+    for sesion_id, inicio, fin in sessions.values():
+        a = inicio.hour * 60 + inicio.minute
+        b = fin.hour * 60 + fin.minute
+        if a < b:
+            tabla[a:b] = sesion_id
+        else:
+            # La sesion cruza la medianoche
+            tabla[a:] = sesion_id
+            tabla[:b] = sesion_id
+    return tabla
+
+
+_TABLA = _build_table(SESSIONS)
+
+# Errores de tz_localize al no poder deducir una hora repetida: pandas >= 3
+# lanza ValueError; las versiones anteriores, AmbiguousTimeError de pytz
+try:
+    from pytz.exceptions import AmbiguousTimeError
+    _ERRORES_TZ = (ValueError, AmbiguousTimeError)
+except ImportError:
+    _ERRORES_TZ = (ValueError,)
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _localize(index, broker_tz):
+    """Indice con zona horaria: las fechas sin zona se interpretan en hora del broker"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        return index
+    try:
+        return index.tz_localize(broker_tz, ambiguous='infer', nonexistent='shift_forward')
+    except _ERRORES_TZ:
+        # Horas repetidas imposibles de deducir al atrasar el reloj
+        return index.tz_localize(broker_tz, ambiguous='NaT', nonexistent='shift_forward')
+
+
+def index_key(index):
+    """Hash del contenido del indice de fechas (mismo criterio que bar_pyramid.data_key)"""
+    index = pd.DatetimeIndex(index)
+    tiempos = np.ascontiguousarray(index.as_unit('ns').asi8)
+    return str(index.tz), hashlib.blake2b(tiempos.tobytes(), digest_size=16).hexdigest()
+
+
+def session_ids(index, broker_tz='UTC', symbol=None):
+    """Array int8 con el ID de sesion de cada vela.
+
+    Si se indica `symbol` el resultado se guarda en cache por simbolo,
+    contenido del indice y zona horaria del broker.
+    """
+    clave = None
+    if symbol is not None and len(index):
+        clave = (symbol, broker_tz) + index_key(index)
+        with _lock:
+            ids = _cache.get(clave)
+            if ids is not None:
+                _cache.move_to_end(clave)
+                return ids
+
+    local = _localize(index, broker_tz).tz_convert(REFERENCE_TZ)
+    minuto = np.asarray(local.hour * 60 + local.minute, dtype=np.float64)
+    validos = ~np.isnan(minuto)
+    ids = np.full(len(minuto), NONE, dtype=np.int8)
+    ids[validos] = _TABLA[minuto[validos].astype(np.int64)]
+    ids.flags.writeable = False
+
+    if clave is not None:
+        with _lock:
+            _cache[clave] = ids
+            while len(_cache) > MAX_CALENDARIOS:
+                _cache.popitem(last=False)
+    return ids
+
+
+def session_mask(index, sessions, broker_tz='UTC', symbol=None):
+    """Mascara booleana de las velas que caen en alguna de las sesiones indicadas"""
+    ids = session_ids(index, broker_tz, symbol)
+    buscados = [SESSIONS[s][0] if isinstance(s, str) else int(s) for s in sessions]
+    return np.isin(ids, buscados)
+
+
+class DaySessions:
+    """Filtro de sesiones vela a vela.
+
+    La mascara se calcula de una vez para los 1440 minutos del dia de la
+    vela (con session_mask, mismo resultado que para la vela sola) y cada
+    consulta es un acceso por minuto. Las fechas con zona se pasan a UTC.
+    """
+
+    def __init__(self, sessions, broker_tz='UTC'):
+        self.sessions = sessions
+        self.broker_tz = broker_tz
+        self._dia = None
+        self._mascara = None
+
+    def __call__(self, time):
+        time = pd.Timestamp(time)
+        zona = self.broker_tz
+        if time.tz is not None:
+            time, zona = time.tz_convert('UTC').tz_localize(None), 'UTC'
+        dia = (time.normalize(), zona)
+        if dia != self._dia:
+            minutos = pd.date_range(dia[0], periods=24 * 60, freq='1min')
+            self._mascara = session_mask(minutos, self.sessions, zona)
+            self._dia = dia
+        return bool(self._mascara[time.hour * 60 + time.minute])
+
+
+def market_time(index, broker_tz='UTC'):
+    """Fechas sin zona desplazadas para que cada dia de mercado empiece a medianoche.
+
+    Tras el desplazamiento la semana de mercado cae de lunes a viernes y el
+    cierre del fin de semana es el sabado y el domingo del calendario.
+    """
+    local = _localize(index, broker_tz).tz_convert(REFERENCE_TZ).tz_localize(None)
+    return local + pd.Timedelta(hours=24 - ROLLOVER_HOUR)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,77 @@
+# core/shared_frame.py
+# DataFrame de velas de solo lectura compartido entre procesos con memoria compartida
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def _attach(name):
+    """Abre un bloque existente sin que el proceso hijo lo registre como propio"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: los hijos del pool comparten el resource_tracker del padre,
+        # que es quien borra el bloque en close()
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrame:
+    """Copia un DataFrame numerico una sola vez a memoria compartida.
+
+    El bloque guarda primero el indice (int64) y despues las columnas en una
+    matriz float64. `descriptor` es un dict pequeño y serializable con el que
+    cualquier proceso reconstruye el DataFrame sin copiar los datos.
+    """
+
+    def __init__(self, data):
+        columnas = list(data.columns)
+        n, k = len(data), len(columnas)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * n * (k + 1)))
+
+        indice = np.ndarray((n,), dtype=np.int64, buffer=self._shm.buf)
+        indice[:] = data.index.asi8
+        bloque = np.ndarray((n, k), dtype=np.float64, buffer=self._shm.buf, offset=8 * n)
+        bloque[:] = data.to_numpy(dtype=np.float64)
+
+        self.descriptor = {
+            'name': self._shm.name,
+            'rows': n,
+            'columns': columnas,
+            'index_dtype': str(data.index.values.dtype),
+            'tz': str(data.index.tz) if data.index.tz is not None else None,
+        }
+
+    def close(self):
+        """Libera el bloque; solo debe llamarlo el proceso que lo creo"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_frame(descriptor):
+    """Reconstruye el DataFrame compartido a partir de su descriptor.
+
+    Devuelve (DataFrame, shm). El DataFrame apunta al bloque de memoria
+    compartida, por lo que `shm` debe mantenerse vivo mientras se use.
+    """
+    shm = _attach(descriptor['name'])
+    n = descriptor['rows']
+    columnas = descriptor['columns']
+
+    indice = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+    bloque = np.ndarray((n, len(columnas)), dtype=np.float64, buffer=shm.buf, offset=8 * n)
+    bloque.flags.writeable = False
+
+    index = pd.DatetimeIndex(indice.view(descriptor['index_dtype']), copy=False)
+    if descriptor['tz']:
+        index = index.tz_localize('UTC').tz_convert(descriptor['tz'])
+    return pd.DataFrame(bloque, index=index, columns=columnas, copy=False), shm
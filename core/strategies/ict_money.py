@@ -1,38 +1,468 @@
-# Estrategia de ICT 
-#import talib
-from datetime import time
+# Estrategia de ICT
+from collections import deque
+import inspect
 import math
 
+import numpy as np
+import pandas as pd
+
+from core.bar_pyramid import get_pyramid
+from core.indicators import atr, ATR
+from core.ledger import TradeLedger
+from core.execution_sim import ExecutionSimulator
+from core.fixed_point import scale, to_points, to_units
+from core.ict_structures import detect
+from core.sessions import DaySessions, session_mask
+from core.strategy_registry import Strategy
+from core.backtest import (
+    first_exit, select_sequential, compound_equity, linear_equity,
+    SALIDA_SL, SALIDA_TP,
+)
+
+# Lote usado cuando no se arriesga un porcentaje del capital
+LOTE_MINIMO = 0.01
+
+_M1_NS = 60 * 10**9
+_M15_NS = 15 * _M1_NS
+
 
 class strategy_class:
-    def __init__(self, data, symbol, decimal, swap, tamcontrato, velas_15M=3, velas_1M=30, ratio=2, risk=0.0):
-        self.data = data.copy()
+    def __init__(self, data, symbol, decimal, swap, tamcontrato, velas_15M=3, velas_1M=30, ratio=2, risk=0.0, pyramid=None, copy=True,
+                 sessions=None, broker_tz='UTC', fixed_point=False):
+        # Con copy=False las velas del llamador se comparten y no se modifican:
+        # las columnas derivadas viven en self._overlay y se calculan al usarse
+        self.data = data.copy() if copy else data
+        self._overlay = {}
 
         #Parametros
         self.velas_m15 = velas_15M
         self.velas_m1 = velas_1M
         self.ratio = ratio
         self.risk = risk
+        self.sessions = sessions
+        self.broker_tz = broker_tz
+        # En punto fijo los precios internos son enteros (precio * escala, fracciones de punto)
+        self.fixed_point = fixed_point
+        self.escala = scale(decimal) if fixed_point else 1
 
         #Configuraciones
         self.cash = 100
         self.initial_cash = self.cash
-        self.operations = []
+        self.operations = TradeLedger()
         self.symbol = symbol
         self.fecha_actual = None
         self.decimal = decimal
+        self.swap = swap
         self.tamcontrato = tamcontrato
         self.position = 0
 
         #Esplipage
-        #self.data['ATR'] = talib.ATR(self.data['high'], self.data['low'], self.data['close'], timeperiod=14)
-        self.data['splipage'] = self.data['ATR'] * 0.003
+        if copy:
+            if 'ATR' not in self.data.columns:
+                self.data['ATR'] = atr(self.data['high'], self.data['low'], self.data['close'], period=14)
+            self.data['splipage'] = self.data['ATR'] * 0.003
+
+
+        #Velas de m15 tomadas de la piramide compartida (se calculan una sola vez por historico)
+        if pyramid is None:
+            pyramid = get_pyramid(data)
+        self.data_m15 = pyramid['M15']
+
+    def _column(self, nombre):
+        """Columna de las velas como array, o columna derivada calculada una sola vez"""
+        if nombre in self._overlay:
+            return self._overlay[nombre]
+        if nombre in self.data.columns:
+            return self.data[nombre].to_numpy(dtype=np.float64)
+
+        if nombre == 'ATR':
+            valores = atr(self.data['high'], self.data['low'], self.data['close'], period=14)
+        elif nombre == 'splipage':
+            valores = self._column('ATR') * 0.003
+        else:
+            raise KeyError(nombre)
+        self._overlay[nombre] = valores
+        return valores
+
+    def _prices(self):
+        """high, low y close en las unidades internas (float o enteros de core.fixed_point)"""
+        precios = [self.data[c].to_numpy(dtype=np.float64) for c in ('high', 'low', 'close')]
+        if self.fixed_point:
+            precios = [to_points(p, self.decimal) for p in precios]
+        return precios
+
+    def structures(self, timeframe='M15', lookback=2):
+        """Swings, FVGs, BOS y order blocks de las velas de M15 o M1"""
+        velas = self.data_m15 if timeframe == 'M15' else self.data
+        return detect(velas, lookback=lookback)
+
+    # ---------------- Señales ---------------- #
+    def _bias_m15(self):
+        """Sesgo de estructura de M15 (1 alcista, -1 bajista, 0 neutro) para cada vela de M1"""
+        m15 = self.data_m15
+        max_prev = m15['high'].rolling(self.velas_m15).max().shift(1)
+        min_prev = m15['low'].rolling(self.velas_m15).min().shift(1)
+        sesgo = np.where(m15['close'] > max_prev, 1, np.where(m15['close'] < min_prev, -1, 0))
+
+        # Solo se usa la ultima vela de M15 ya cerrada al cierre de cada vela de M1
+        cierre_m15 = (m15.index + pd.Timedelta('15min')).values
+        cierre_m1 = (self.data.index + pd.Timedelta('1min')).values
+        k = np.searchsorted(cierre_m15, cierre_m1, side='right') - 1
+        return np.where(k >= 0, sesgo[np.maximum(k, 0)], 0).astype(np.int8)
+
+    def _signals(self):
+        """Calcula direccion, precio de entrada, SL y TP de cada vela de M1"""
+        high = self.data['high']
+        low = self.data['low']
+        close = self.data['close'].to_numpy(dtype=np.float64)
+        sesgo = self._bias_m15()
+
+        # Confirmacion en M1: ruptura del rango de las ultimas velas
+        max_prev = high.rolling(self.velas_m1).max().shift(1).to_numpy()
+        min_prev = low.rolling(self.velas_m1).min().shift(1).to_numpy()
+        largo = (sesgo == 1) & (close > max_prev)
+        corto = (sesgo == -1) & (close < min_prev)
+        direccion = np.where(largo, 1, np.where(corto, -1, 0)).astype(np.int8)
+
+        # El SL va al extremo del rango de confirmacion
+        stop = np.where(largo, low.rolling(self.velas_m1).min().to_numpy(),
+                        high.rolling(self.velas_m1).max().to_numpy())
+        entrada = close + direccion * self._column('splipage')
+        distancia = direccion * (entrada - stop)
+        objetivo = entrada + direccion * self.ratio * distancia
+
+        validas = (direccion != 0) & np.isfinite(entrada) & (distancia > 0)
+        if self.sessions:
+            # Solo se opera dentro de las kill zones indicadas
+            validas &= session_mask(self.data.index, self.sessions, self.broker_tz, self.symbol)
+        direccion[~validas] = 0
+        if self.fixed_point:
+            return self._fixed_signals(direccion, close, stop)
+        return {
+            'direccion': direccion,
+            'entrada': entrada,
+            'stop': stop,
+            'objetivo': objetivo,
+        }
+
+    def _fixed_signals(self, direccion, close, stop):
+        """Señales en punto fijo: el SL es un precio de las velas (exacto) y la entrada y el TP
+        se redondean a la unidad interna (1/SUBPOINTS de punto), sin perder el slippage"""
+        validas = direccion != 0
+        slip = to_units(np.nan_to_num(self._column('splipage')), self.decimal)
+        stop = to_points(np.where(validas, stop, 0.0), self.decimal)
+        entrada = to_points(close, self.decimal) + direccion * slip
+        distancia = direccion * (entrada - stop)
+        objetivo = entrada + direccion * np.rint(self.ratio * distancia).astype(np.int64)
+
+        # El redondeo puede dejar la entrada sobre el SL
+        direccion = np.where(validas & (distancia > 0), direccion, 0).astype(np.int8)
+        return {
+            'direccion': direccion,
+            'entrada': entrada,
+            'stop': stop,
+            'objetivo': objetivo,
+        }
+
+    # ---------------- Ejecucion vela a vela ---------------- #
+    def run(self, vectorized=False):
+        """Ejecuta el backtest y devuelve la lista de operaciones"""
+        if vectorized:
+            return self._run_vectorized()
+
+        s = self._signals()
+        high, low, close = self._prices()
+        index = self.data.index
+
+        self._reset()
+        abierta = None
+        for i in range(len(index)):
+            self.fecha_actual = index[i]
+
+            # Gestion de la posicion abierta
+            if self.position != 0:
+                if self.position == 1:
+                    toca_sl = low[i] <= abierta['sl']
+                    toca_tp = high[i] >= abierta['tp']
+                else:
+                    toca_sl = high[i] >= abierta['sl']
+                    toca_tp = low[i] <= abierta['tp']
+
+                if toca_sl:
+                    self._close(abierta, i, abierta['sl'], 'sl')
+                elif toca_tp:
+                    self._close(abierta, i, abierta['tp'], 'tp')
+                continue
+
+            # Nueva entrada
+            if s['direccion'][i] != 0:
+                abierta = self._open(i, s)
+
+        if self.position != 0:
+            self._close(abierta, len(index) - 1, close[-1], 'fin')
+
+        return self.operations
+
+    def _reset(self):
+        """Reinicia el estado de la cuenta antes de una ejecucion"""
+        self.cash = self.initial_cash
+        self.operations = TradeLedger(tz=getattr(self.data.index, 'tz', None))
+        self.position = 0
+
+    def _open(self, i, s):
+        """Abre una posicion en la vela i (precios en unidades internas)"""
+        direccion = int(s['direccion'][i])
+        entrada = s['entrada'][i].item()
+        stop = s['stop'][i].item()
+        distancia = direccion * (entrada - stop)
+        if self.risk > 0:
+            lotes = self.cash * self.risk / (distancia / self.escala * self.tamcontrato)
+        else:
+            lotes = LOTE_MINIMO
+
+        self.position = direccion
+        return {
+            'tipo': 'buy' if direccion == 1 else 'sell',
+            'fecha_entrada': self.data.index[i],
+            'precio_entrada': entrada,
+            'sl': stop,
+            'tp': s['objetivo'][i].item(),
+            'lotes': float(lotes),
+        }
+
+    def _close(self, op, i, precio, motivo):
+        """Cierra la posicion abierta, actualiza el capital y pasa los precios a float"""
+        direccion = 1 if op['tipo'] == 'buy' else -1
+        precio = precio.item() if hasattr(precio, 'item') else precio
+        movimiento = direccion * (precio - op['precio_entrada'])
+        if self.risk > 0:
+            distancia = direccion * (op['precio_entrada'] - op['sl'])
+            nuevo_cash = self.cash * (1 + self.risk * (movimiento / distancia))
+        else:
+            nuevo_cash = self.cash + movimiento / self.escala * op['lotes'] * self.tamcontrato
+
+        op.update({
+            'precio_entrada': op['precio_entrada'] / self.escala,
+            'sl': op['sl'] / self.escala,
+            'tp': op['tp'] / self.escala,
+            'fecha_salida': self.data.index[i],
+            'precio_salida': precio / self.escala,
+            'salida': motivo,
+            'profit': float(nuevo_cash - self.cash),
+            'cash': float(nuevo_cash),
+        })
+        self.cash = float(nuevo_cash)
+        self.operations.append(op)
+        self.position = 0
+
+    # ---------------- Ejecucion dentro de la vela ---------------- #
+    def run_intrabar(self):
+        """Backtest con llenado a mercado en la apertura siguiente y SL/TP recorridos dentro de la vela"""
+        s = self._signals()
+        n = len(self.data.index)
+        sim = ExecutionSimulator(self.data, self.tamcontrato, cash=self.initial_cash,
+                                 splipage=self._column('splipage'), min_volume=LOTE_MINIMO)
+
+        self._reset()
+        candidatas = np.flatnonzero(s['direccion'])
+        k = 0
+        while k < len(candidatas) and candidatas[k] + 1 < n:
+            i = candidatas[k]
+            # El TP se recalcula con `ratio` desde el precio realmente llenado
+            sim.submit(int(s['direccion'][i]), 'market', sl=s['stop'][i].item() / self.escala, rr=self.ratio,
+                       risk=self.risk or None, bar=i + 1)
+            sim.run(stop_when_flat=True)
+            k = int(np.searchsorted(candidatas, sim.bar, side='right'))
+
+        if sim.positions:
+            sim.close_all(n - 1)
+
+        self.operations = sim.operations
+        self.cash = sim.cash
+        self.fecha_actual = self.data.index[-1] if n else None
+        return self.operations
+
+    # ---------------- Ejecucion vectorizada ---------------- #
+    def _run_vectorized(self):
+        """Mismo backtest que run() calculado en bloque sobre arrays de NumPy"""
+        s = self._signals()
+        high, low, close = self._prices()
+        index = self.data.index
+        n = len(index)
+
+        self._reset()
+        entradas = np.flatnonzero(s['direccion'])
+        if not len(entradas):
+            return self.operations
+
+        direccion = s['direccion'][entradas]
+        stop = s['stop'][entradas]
+        objetivo = s['objetivo'][entradas]
+        salida, motivo = first_exit(high, low, entradas, direccion, stop, objetivo)
+
+        # Las posiciones sin SL ni TP se cierran en la ultima vela
+        salida = np.where(salida < 0, n - 1, salida)
+        tomadas = select_sequential(entradas, salida)
+
+        e = entradas[tomadas]
+        d = direccion[tomadas].astype(np.float64)
+        precio_entrada = s['entrada'][e]
+        sl = stop[tomadas]
+        tp = objetivo[tomadas]
+        x = salida[tomadas]
+        m = motivo[tomadas]
+        precio_salida = np.where(m == SALIDA_SL, sl, np.where(m == SALIDA_TP, tp, close[x]))
+
+        # Capital y lotes de cada operacion
+        movimiento = d * (precio_salida - precio_entrada)
+        if self.risk > 0:
+            distancia = d * (precio_entrada - sl)
+            equity = compound_equity(self.initial_cash, 1 + self.risk * (movimiento / distancia))
+            lotes = equity[:-1] * self.risk / (distancia / self.escala * self.tamcontrato)
+        else:
+            lotes = np.full(len(e), LOTE_MINIMO)
+            equity = linear_equity(self.initial_cash, movimiento / self.escala * lotes * self.tamcontrato)
+        profit = np.diff(equity)
+
+        self.operations.extend(
+            index=index,
+            tipo=direccion[tomadas],
+            fecha_entrada=e,
+            precio_entrada=precio_entrada / self.escala,
+            sl=sl / self.escala,
+            tp=tp / self.escala,
+            lotes=lotes,
+            fecha_salida=x,
+            precio_salida=precio_salida / self.escala,
+            salida=m,
+            profit=profit,
+            cash=equity[1:],
+        )
+
+        self.cash = float(equity[-1])
+        self.fecha_actual = index[-1]
+        return self.operations
+
+
+class ICTMoney(Strategy):
+    """strategy_class con la interfaz del registro de estrategias.
+
+    El camino en bloque delega en strategy_class. on_bar reproduce _signals()
+    vela a vela: sesgo de la ultima vela de M15 cerrada, ruptura del rango de
+    las ultimas `velas_1M` velas de M1 y splipage con el ATR incremental.
+    """
+
+    @classmethod
+    def defaults(cls):
+        """Los parametros son los de strategy_class"""
+        return {
+            nombre: p.default
+            for nombre, p in inspect.signature(strategy_class.__init__).parameters.items()
+            if nombre not in cls._NO_PARAMETROS and p.default is not inspect.Parameter.empty
+        }
+
+    def __init__(self, symbol, decimal, swap, tamcontrato, **params):
+        super().__init__(symbol, decimal, swap, tamcontrato, **params)
+        valores = dict(self.defaults(), **params)
+        self.velas_m15 = valores['velas_15M']
+        self.velas_m1 = valores['velas_1M']
+        self.ratio = valores['ratio']
+        self.sessions = valores['sessions']
+        self.broker_tz = valores['broker_tz']
+        self.initial_cash = 100
+        self.cash = self.initial_cash
+        self.reset()
+
+    # ---------------- Bloque ---------------- #
+    def strategy(self, data, pyramid=None, copy=True):
+        return strategy_class(data, self.symbol, self.decimal, self.swap, self.tamcontrato,
+                              pyramid=pyramid, copy=copy, **self.params)
+
+    def signals(self, data):
+        return self.strategy(data, copy=False)._signals()
+
+    def backtest(self, data, mode='vectorized', pyramid=None):
+        estrategia = self.strategy(data, pyramid=pyramid, copy=False)
+        if mode == 'intrabar':
+            operaciones = estrategia.run_intrabar()
+        else:
+            operaciones = estrategia.run(vectorized=(mode == 'vectorized'))
+        self.initial_cash = estrategia.initial_cash
+        self.cash = estrategia.cash
+        return operaciones
+
+    # ---------------- Streaming ---------------- #
+    def reset(self):
+        """Vacia el estado de la señal vela a vela"""
+        self._atr = ATR(14)
+        self._highs = deque(maxlen=self.velas_m1)
+        self._lows = deque(maxlen=self.velas_m1)
+        self._m15 = None                                  # [etiqueta ns, open, high, low, close]
+        self._m15_previas = deque(maxlen=self.velas_m15)  # (high, low) de las velas cerradas
+        self._sesgo = 0
+        # Mascara de sesiones calculada una vez por dia
+        self._en_sesion = DaySessions(self.sessions, self.broker_tz) if self.sessions else None
+
+    def _close_m15(self):
+        """Cierra la vela de M15 en curso y actualiza el sesgo"""
+        _, _, high, low, close = self._m15
+        previas = self._m15_previas
+        self._sesgo = 0
+        if len(previas) == self.velas_m15:
+            if close > max(h for h, _ in previas):
+                self._sesgo = 1
+            elif close < min(l for _, l in previas):
+                self._sesgo = -1
+        previas.append((high, low))
+        self._m15 = None
+
+    def on_bar(self, time, open_, high, low, close):
+        """Procesa una vela de M1 cerrada y devuelve su señal (dict) o None"""
+        time = pd.Timestamp(time)
+        high, low, close = float(high), float(low), float(close)
+
+        # Vela de M15 en curso; se cierra al cambiar de bloque o en su ultimo minuto
+        ns = time.value
+        etiqueta = ns - ns % _M15_NS
+        if self._m15 is not None and self._m15[0] != etiqueta:
+            self._close_m15()
+        if self._m15 is None:
+            self._m15 = [etiqueta, float(open_), high, low, close]
+        else:
+            self._m15[2] = max(self._m15[2], high)
+            self._m15[3] = min(self._m15[3], low)
+            self._m15[4] = close
+        if etiqueta + _M15_NS == ns + _M1_NS:
+            self._close_m15()
+
+        splipage = self._atr.update(high, low, close) * 0.003
+
+        # Ruptura del rango de las velas anteriores en la direccion del sesgo
+        direccion = 0
+        if len(self._highs) == self.velas_m1:
+            if self._sesgo == 1 and close > max(self._highs):
+                direccion = 1
+            elif self._sesgo == -1 and close < min(self._lows):
+                direccion = -1
+        self._highs.append(high)
+        self._lows.append(low)
+        if direccion == 0:
+            return None
+
+        stop = min(self._lows) if direccion == 1 else max(self._highs)
+        entrada = close + direccion * splipage
+        distancia = direccion * (entrada - stop)
+        if not math.isfinite(entrada) or not distancia > 0:
+            return None
+        if self._en_sesion is not None and not self._en_sesion(time):
+            return None
+        return {
+            'time': time,
+            'direccion': direccion,
+            'entrada': entrada,
+            'stop': stop,
+            'objetivo': entrada + direccion * self.ratio * distancia,
+        }
 
 
-        #Calculamos las velas de m15
-        data_m15 = data.resample('15min').agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last'
-        }).dropna()
\ No newline at end of file
+STRATEGY = ICTMoney
@@ -0,0 +1,136 @@
+# core/strategy_registry.py
+# Registro de estrategias con carga diferida
+#
+# Cada modulo de core/strategies es una estrategia cuyo nombre es el del
+# archivo. Al arrancar solo se listan los archivos (pkgutil, sin importar
+# nada); el modulo se importa la primera vez que se pide la estrategia y debe
+# exponer `STRATEGY`, una subclase de Strategy. Los modulos que empiezan por
+# "_" se ignoran.
+
+import importlib
+import inspect
+import pkgutil
+import threading
+from pathlib import Path
+
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+PAQUETE = "core.strategies"
+CARPETA = Path(__file__).parent / "strategies"
+
+
+class Strategy:
+    """Interfaz comun de las estrategias.
+
+    - Bloque: signals(data) devuelve arrays (direccion, entrada, stop,
+      objetivo) para todo el historico y backtest(data) las operaciones.
+    - Streaming: on_bar(...) recibe cada vela de M1 cerrada y devuelve la
+      señal de esa vela (o None); warmup(data) carga el historico previo.
+    Ambos caminos deben dar la misma señal para la misma vela.
+    """
+
+    name = None
+
+    # Argumentos de __init__ que no son parametros de la estrategia
+    _NO_PARAMETROS = ('self', 'symbol', 'decimal', 'swap', 'tamcontrato', 'data', 'pyramid', 'copy')
+
+    @classmethod
+    def defaults(cls):
+        """Valores por defecto de los parametros de la estrategia"""
+        return {
+            nombre: p.default
+            for nombre, p in inspect.signature(cls.__init__).parameters.items()
+            if nombre not in cls._NO_PARAMETROS and p.default is not inspect.Parameter.empty
+        }
+
+    def __init__(self, symbol, decimal, swap, tamcontrato, **params):
+        self.symbol = symbol
+        self.decimal = decimal
+        self.swap = swap
+        self.tamcontrato = tamcontrato
+        self.params = params
+
+    def signals(self, data):
+        raise NotImplementedError
+
+    def backtest(self, data, mode='vectorized', pyramid=None):
+        raise NotImplementedError
+
+    def on_bar(self, time, open_, high, low, close):
+        raise NotImplementedError
+
+    def warmup(self, data):
+        """Pasa un historico por on_bar para dejar el estado listo para operar en vivo"""
+        columnas = [data[c].to_numpy(dtype=float) for c in ('open', 'high', 'low', 'close')]
+        for fila in zip(data.index, *columnas):
+            self.on_bar(*fila)
+        return self
+
+
+class StrategyRegistry:
+    """Nombres de estrategia -> clase, importando cada modulo solo al usarlo"""
+
+    def __init__(self, package=PAQUETE, folder=CARPETA):
+        self.package = package
+        self.folder = Path(folder)
+        self._lock = threading.Lock()
+        self._clases = {}
+        self._modulos = None
+
+    def _discover(self):
+        """Modulos disponibles en la carpeta de estrategias (sin importarlos)"""
+        if self._modulos is None:
+            self._modulos = sorted(
+                m.name for m in pkgutil.iter_modules([str(self.folder)])
+                if not m.name.startswith('_')
+            )
+        return self._modulos
+
+    def available(self):
+        """Nombres de todas las estrategias (descubiertas y registradas a mano)"""
+        return sorted(set(self._discover()) | set(self._clases))
+
+    def register(self, name, cls):
+        """Registra una estrategia que no vive en core/strategies"""
+        with self._lock:
+            self._clases[name] = cls
+        return cls
+
+    def get(self, name):
+        """Clase de la estrategia; importa su modulo la primera vez"""
+        with self._lock:
+            cls = self._clases.get(name)
+            if cls is not None:
+                return cls
+            if name not in self._discover():
+                raise KeyError(f"Estrategia desconocida: {name}")
+            modulo = importlib.import_module(f"{self.package}.{name}")
+            cls = getattr(modulo, 'STRATEGY', None)
+            if cls is None:
+                raise TypeError(f"El modulo {modulo.__name__} no define STRATEGY")
+            cls.name = cls.name or name
+            self._clases[name] = cls
+            logger.info(f"Estrategia cargada: {name}")
+            return cls
+
+    def create(self, name, symbol, decimal, swap, tamcontrato, **params):
+        """Instancia de la estrategia con sus parametros"""
+        return self.get(name)(symbol, decimal, swap, tamcontrato, **params)
+
+
+# Registro compartido por el bot y el backtester
+registry = StrategyRegistry()
+
+
+def available():
+    return registry.available()
+
+
+def get_strategy(name):
+    return registry.get(name)
+
+
+def create_strategy(name, symbol, decimal, swap, tamcontrato, **params):
+    return registry.create(name, symbol, decimal, swap, tamcontrato, **params)
@@ -0,0 +1,234 @@
+# core/tick_stream.py
+# Ingesta de ticks en vivo con buffers circulares por simbolo
+#
+# Un unico hilo (TickStream) pide al terminal los ticks nuevos de todos los
+# simbolos suscritos con copy_ticks_from y los copia en bloque en un TickRing:
+# un array estructurado de NumPy preasignado (mismo formato que devuelve MT5)
+# de tamaño potencia de dos. No se crea ningun objeto Python por tick.
+#
+# Los consumidores (bot, graficos, alertas) leen por numero de secuencia con un
+# TickCursor, sin locks ni copias: read() devuelve una vista del buffer. Hay un
+# solo escritor; antes de escribir reserva las posiciones (`head`) y despues
+# publica la secuencia (`seq`). Una lectura es valida mientras su primera
+# secuencia no haya sido alcanzada por `head` (ring.valid(seq)).
+
+import threading
+
+import numpy as np
+
+from core.mt5_manager import MT5ConnectionError, get_manager
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Formato de los ticks de copy_ticks_from
+TICK_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+COPY_TICKS_ALL = -1
+
+# Ticks por simbolo que caben en el buffer y ticks maximos por peticion
+RING_CAPACITY = 1 << 16
+TICK_BATCH = 10_000
+
+
+class TickRing:
+    """Buffer circular de ticks de un simbolo con un solo escritor"""
+
+    def __init__(self, symbol, capacity=RING_CAPACITY):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("La capacidad debe ser una potencia de dos")
+        self.symbol = symbol
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.data = np.zeros(capacity, dtype=TICK_DTYPE)
+        # seq: ticks publicados; head: ticks reservados por el escritor (>= seq)
+        self.seq = 0
+        self.head = 0
+
+    def write(self, ticks):
+        """Anexa un bloque de ticks (solo desde el hilo escritor)"""
+        n = len(ticks)
+        if not n:
+            return self.seq
+        if n > self.capacity:
+            ticks = ticks[-self.capacity:]
+            self.seq = self.head = self.seq + n - self.capacity
+            n = self.capacity
+        if ticks.dtype != TICK_DTYPE:
+            ticks = _as_ticks(ticks)
+
+        inicio = self.seq
+        self.head = inicio + n
+        pos = inicio & self._mask
+        primera = min(n, self.capacity - pos)
+        self.data[pos:pos + primera] = ticks[:primera]
+        if primera < n:
+            self.data[:n - primera] = ticks[primera:]
+        self.seq = inicio + n
+        return self.seq
+
+    def oldest(self):
+        """Primera secuencia que sigue en el buffer"""
+        return max(0, self.head - self.capacity)
+
+    def valid(self, seq):
+        """True si el tick `seq` no ha sido sobrescrito (comprobar tras usar una vista)"""
+        return seq >= self.head - self.capacity
+
+    def read(self, seq, max_items=None):
+        """(primera secuencia, vista) de los ticks publicados desde `seq`.
+
+        La vista es contigua: si el rango da la vuelta al buffer solo llega
+        hasta el final y el resto se obtiene con otra llamada. Si `seq` ya fue
+        sobrescrito, la lectura empieza en el tick mas antiguo disponible.
+        """
+        fin = self.seq
+        inicio = max(seq, self.oldest())
+        if inicio >= fin:
+            return fin, self.data[:0]
+        pos = inicio & self._mask
+        n = min(fin - inicio, self.capacity - pos)
+        if max_items is not None:
+            n = min(n, max_items)
+        return inicio, self.data[pos:pos + n]
+
+    def latest(self):
+        """Ultimo tick publicado (None si aun no hay ninguno)"""
+        seq = self.seq
+        if not seq:
+            return None
+        return self.data[(seq - 1) & self._mask]
+
+
+class TickCursor:
+    """Posicion de lectura de un consumidor sobre un TickRing"""
+
+    def __init__(self, ring, seq=None):
+        self.ring = ring
+        self.seq = ring.seq if seq is None else seq
+        # Ticks sobrescritos antes de que el consumidor los leyera
+        self.lost = 0
+
+    def read(self, max_items=None):
+        """Vista de los ticks nuevos; avanza el cursor"""
+        inicio, vista = self.ring.read(self.seq, max_items)
+        self.lost += inicio - self.seq
+        self.seq = inicio + len(vista)
+        return vista
+
+    def pending(self):
+        return self.ring.seq - self.seq
+
+
+class TickStream(threading.Thread):
+    """Hilo unico que trae los ticks de todos los simbolos suscritos a sus TickRing"""
+
+    def __init__(self, manager=None, symbols=(), capacity=RING_CAPACITY, interval=0.05,
+                 batch=TICK_BATCH, max_backoff=5.0):
+        super().__init__(name="TickStream", daemon=True)
+        self.manager = manager if manager is not None else get_manager()
+        self.capacity = capacity
+        self.interval = interval
+        self.batch = batch
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._rings = {}
+        # Por simbolo: (time_msc del ultimo tick guardado, ticks ya guardados con ese time_msc)
+        self._estado = {}
+        for symbol in symbols:
+            self.subscribe(symbol)
+
+    # ---------------- Suscripciones ---------------- #
+    def subscribe(self, symbol):
+        """Empieza a recibir los ticks de `symbol` (desde el momento actual)"""
+        with self._lock:
+            ring = self._rings.get(symbol)
+            if ring is None:
+                ring = TickRing(symbol, self.capacity)
+                self._estado[symbol] = None
+                self._rings = {**self._rings, symbol: ring}
+        return ring
+
+    def unsubscribe(self, symbol):
+        with self._lock:
+            self._rings = {s: r for s, r in self._rings.items() if s != symbol}
+            self._estado.pop(symbol, None)
+
+    def symbols(self):
+        return tuple(self._rings)
+
+    def ring(self, symbol):
+        return self._rings[symbol]
+
+    def cursor(self, symbol, seq=None):
+        """Cursor de lectura sobre los ticks de `symbol` (por defecto desde el ultimo publicado)"""
+        return TickCursor(self.ring(symbol), seq)
+
+    # ---------------- Hilo ---------------- #
+    def stop(self, timeout=None):
+        self._parar.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        espera = self.interval
+        while not self._parar.is_set():
+            try:
+                for symbol, ring in self._rings.items():
+                    self.poll(symbol, ring)
+                espera = self.interval
+            except MT5ConnectionError as e:
+                espera = min(self.max_backoff, max(espera * 2, self.interval))
+                logger.error(f"Sin conexion para leer ticks: {e}; reintento en {espera:.1f}s")
+            except Exception:
+                logger.exception("Error en el hilo de ticks")
+                espera = self.max_backoff
+            self._parar.wait(espera)
+
+    def poll(self, symbol, ring=None):
+        """Trae los ticks nuevos de un simbolo; devuelve cuantos se guardaron"""
+        ring = ring if ring is not None else self._rings[symbol]
+        estado = self._estado.get(symbol)
+        if estado is None:
+            tick = self.manager.symbol_tick(symbol)
+            if tick is None:
+                return 0
+            estado = (int(tick.time_msc), 0)
+
+        total = 0
+        while True:
+            ultimo, vistos = estado
+            ticks = self.manager.call('copy_ticks_from', symbol, ultimo // 1000, self.batch, COPY_TICKS_ALL)
+            if ticks is None or not len(ticks):
+                break
+            tiempo = ticks['time_msc']
+            # La peticion es por segundos: se descartan los ticks ya guardados
+            i = int(np.searchsorted(tiempo, ultimo, side='left'))
+            iguales = int(np.searchsorted(tiempo, ultimo, side='right')) - i
+            i += min(vistos, iguales)
+            if i < len(ticks):
+                ring.write(ticks[i:])
+                total += len(ticks) - i
+                ultimo = int(tiempo[-1])
+                vistos = len(ticks) - int(np.searchsorted(tiempo, ultimo, side='left'))
+                estado = (ultimo, vistos)
+            # Peticion completa: puede haber mas ticks pendientes
+            if len(ticks) < self.batch or i >= len(ticks):
+                break
+
+        if symbol in self._estado:
+            self._estado[symbol] = estado
+        return total
+
+
+def _as_ticks(ticks):
+    """Copia los campos conocidos de un array de ticks con otro formato"""
+    salida = np.zeros(len(ticks), dtype=TICK_DTYPE)
+    for campo in TICK_DTYPE.names:
+        if campo in ticks.dtype.names:
+            salida[campo] = ticks[campo]
+    return salida
@@ -0,0 +1,116 @@
+# core/walk_forward.py
+# Analisis walk-forward: optimizar en muestra y validar fuera de muestra por ventanas
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import atr
+from core.optimizer import worker_pool, run_task
+from utils.loggers import get_logger
+
+logger = get_logger(__name__)
+
+
+class WalkForward:
+    """Ventanas rodantes (o ancladas) de optimizacion y validacion.
+
+    El ATR y la piramide de temporalidades se calculan una sola vez sobre todo
+    el historico: cada proceso del pool la arma al arrancar y las ventanas solo
+    toman vistas por posicion, de modo que el coste de preparar los datos crece
+    con el historico y no con el numero de ventanas.
+
+    Las optimizaciones de todas las ventanas se encolan a la vez y cada
+    validacion fuera de muestra se lanza en cuanto se conoce su mejor
+    combinacion, sin esperar a que termine para seguir con la siguiente.
+    """
+
+    def __init__(self, data, symbol, decimal, swap, tamcontrato, grid,
+                 in_sample='90D', out_sample='30D', anchored=False,
+                 workers=None, sort_key='net_profit', strategy='ict_money'):
+        if 'ATR' not in data.columns:
+            data = data.assign(ATR=atr(data['high'], data['low'], data['close'], period=14))
+        self.data = data
+        self.symbol = symbol
+        self.decimal = decimal
+        self.swap = swap
+        self.tamcontrato = tamcontrato
+        self.grid = list(grid)
+        self.in_sample = pd.Timedelta(in_sample)
+        self.out_sample = pd.Timedelta(out_sample)
+        self.anchored = anchored
+        self.workers = workers
+        self.sort_key = sort_key
+        self.strategy = strategy
+        self.results = []
+
+    def windows(self):
+        """Lista de ventanas como posiciones ((is_inicio, is_fin), (oos_inicio, oos_fin))"""
+        index = self.data.index
+        if not len(index):
+            return []
+        tiempos = index.values
+        ventanas = []
+        inicio = index[0]
+        while True:
+            corte = inicio + self.in_sample
+            fin = corte + self.out_sample
+            if corte > index[-1]:
+                break
+            i0, i1, i2 = np.searchsorted(tiempos, [
+                (index[0] if self.anchored else inicio).to_datetime64(),
+                corte.to_datetime64(),
+                fin.to_datetime64(),
+            ])
+            if i1 >= i2:
+                break
+            ventanas.append(((int(i0), int(i1)), (int(i1), int(i2))))
+            inicio = inicio + self.out_sample
+        return ventanas
+
+    def run(self):
+        """Generador: devuelve el resultado de cada ventana, en orden, al terminarla"""
+        self.results = []
+        ventanas = self.windows()
+        logger.info(f"Walk-forward de {len(ventanas)} ventanas y {len(self.grid)} combinaciones")
+
+        with worker_pool(self.data, self.symbol, self.decimal, self.swap, self.tamcontrato,
+                         self.workers, self.strategy) as pool:
+            # Optimizacion en muestra de todas las ventanas, en orden de ventana
+            tareas = [(params, dentro) for dentro, _ in ventanas for params in self.grid]
+            evaluados = pool.imap(run_task, tareas)
+            pendientes = deque()
+            for k, (dentro, fuera) in enumerate(ventanas):
+                mejor = max((next(evaluados) for _ in self.grid), key=lambda r: r[self.sort_key])
+                # Validacion fuera de muestra con los mejores parametros, en segundo plano
+                validacion = pool.apply_async(run_task, ((mejor['params'], fuera),))
+                pendientes.append((k, dentro, fuera, mejor, validacion))
+                while pendientes and pendientes[0][-1].ready():
+                    yield self._result(*pendientes.popleft())
+            while pendientes:
+                yield self._result(*pendientes.popleft())
+
+    def _result(self, k, dentro, fuera, mejor, validacion):
+        """Resultado de una ventana (espera a su validacion si aun no termino)"""
+        index = self.data.index
+        resultado = {
+            'window': k,
+            'in_sample': (index[dentro[0]], index[dentro[1] - 1]),
+            'out_sample': (index[fuera[0]], index[fuera[1] - 1]),
+            'params': mejor['params'],
+            'in_sample_result': mejor,
+            'out_sample_result': validacion.get(),
+        }
+        self.results.append(resultado)
+        return resultado
+
+    def summary(self):
+        """Resultados fuera de muestra de todas las ventanas en un DataFrame"""
+        filas = []
+        for r in self.results:
+            fila = {'window': r['window'], 'inicio': r['out_sample'][0], 'fin': r['out_sample'][1]}
+            fila.update(r['params'])
+            fila.update({k: v for k, v in r['out_sample_result'].items() if k != 'params'})
+            filas.append(fila)
+        return pd.DataFrame(filas)
@@ -8,6 +8,11 @@ import os
 import pystray
 import threading
 
+# Importacion del nucleo
+from core.tick_stream import TickStream
+from core.order_gateway import OrderGateway
+from core.mt5_manager import get_manager, MT5ConnectionError
+
 # Importacion de paginas
 from .pages.config_mt5 import ConfigMT5Page
 from .pages.dashboard_view import DashboardView
@@ -46,6 +51,10 @@ class MainApp(ctk.CTk):
         self.profit_loss = 250.50
         self.open_positions = 3
 
+        # Hilos de ticks en vivo y de ordenes (None si no hay terminal MT5 disponible)
+        self.tick_stream = self._start_tick_stream()
+        self.order_gateway = self._start_order_gateway()
+
         # Configurar protocolo de cierre
         self.protocol("WM_DELETE_WINDOW", self._minimized_to_dray)
 
@@ -385,7 +394,9 @@ class MainApp(ctk.CTk):
             self.content_area,
             balance=self.balance,
             profit_loss=self.profit_loss,
-            open_positions=self.open_positions
+            open_positions=self.open_positions,
+            tick_stream=self.tick_stream,
+            order_gateway=self.order_gateway
         )
         dashboard.pack(fill="both", expand=True)
         
@@ -480,9 +491,35 @@ class MainApp(ctk.CTk):
             logger.warning(f"Ruta no encontrada: {full_patch}")
         return str(full_patch)
 
+    def _start_tick_stream(self):
+        """Arranca el hilo que lee los ticks del terminal"""
+        try:
+            stream = TickStream(get_manager())
+        except (ImportError, MT5ConnectionError) as e:
+            logger.warning(f"Datos en vivo desactivados: {e}")
+            return None
+        stream.start()
+        return stream
+
+    def _start_order_gateway(self):
+        """Arranca el hilo que envia las ordenes al terminal"""
+        try:
+            gateway = OrderGateway(get_manager())
+        except (ImportError, MT5ConnectionError) as e:
+            logger.warning(f"Operativa desactivada: {e}")
+            return None
+        gateway.start()
+        return gateway
+
     def _on_destroy(self, event):
+        if event.widget is not self:
+            return
         if self.tray_icon:
             self.tray_icon.stop()
+        if self.tick_stream:
+            self.tick_stream.stop(timeout=1.0)
+        if self.order_gateway:
+            self.order_gateway.stop()
 
     def run(self):
         self.mainloop()
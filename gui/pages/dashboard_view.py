@@ -2,9 +2,23 @@
 
 import customtkinter as ctk
 
+from core.order_gateway import close_summary
+
+# Intervalo de refresco del precio en vivo y de las ordenes en curso (ms)
+PRICE_REFRESH_MS = 250
+ORDER_POLL_MS = 100
+
+# Volumen de las operaciones rapidas
+QUICK_VOLUME = 0.01
+
+
 class DashboardView(ctk.CTkFrame):
-    def __init__(self, parent, balance, profit_loss, open_positions):
+    def __init__(self, parent, balance, profit_loss, open_positions, tick_stream=None, order_gateway=None,
+                 symbol="EURUSD"):
         super().__init__(parent, fg_color="transparent")
+        self.tick_stream = tick_stream
+        self.order_gateway = order_gateway
+        self.symbol = symbol
 
         # Configurar grid layout
         self.grid_columnconfigure((0, 1), weight=1)
@@ -53,12 +67,13 @@ class DashboardView(ctk.CTkFrame):
             text_color="#CBA6F7"
         ).pack(pady=15)
 
-        ctk.CTkLabel(
+        self.price_label = ctk.CTkLabel(
             market_frame,
-            text="Precio EURUSD: 1.0850",
+            text=f"Precio {symbol}: --",
             font=("Segoe UI", 14),
             text_color="#CDD6F4"
-        ).pack(pady=8, padx=20, anchor="w")
+        )
+        self.price_label.pack(pady=8, padx=20, anchor="w")
 
         ctk.CTkLabel(
             market_frame,
@@ -96,7 +111,8 @@ class DashboardView(ctk.CTkFrame):
             hover_color="#94E2D5",
             text_color="#11111B",
             height=45,
-            corner_radius=10
+            corner_radius=10,
+            command=self._buy
         ).pack(side="left", expand=True, padx=5)
 
         ctk.CTkButton(
@@ -107,7 +123,8 @@ class DashboardView(ctk.CTkFrame):
             hover_color="#F5C2E7",
             text_color="#11111B",
             height=45,
-            corner_radius=10
+            corner_radius=10,
+            command=self._sell
         ).pack(side="left", expand=True, padx=5)
 
         ctk.CTkButton(
@@ -118,5 +135,71 @@ class DashboardView(ctk.CTkFrame):
             hover_color="#F9E2AF",
             text_color="#11111B",
             height=45,
-            corner_radius=10
+            corner_radius=10,
+            command=self._close_all
         ).pack(side="left", expand=True, padx=5)
+
+        self.order_label = ctk.CTkLabel(
+            operations_frame,
+            text="",
+            font=("Segoe UI", 12),
+            text_color="#6C7086"
+        )
+        self.order_label.pack(pady=(0, 10))
+
+        # Precio en vivo leido del buffer de ticks
+        if self.tick_stream is not None:
+            self.tick_stream.subscribe(self.symbol)
+            self._refresh_price()
+
+    def _refresh_price(self):
+        """Muestra el ultimo bid del simbolo y vuelve a programarse"""
+        if not self.winfo_exists():
+            return
+        tick = self.tick_stream.ring(self.symbol).latest()
+        if tick is not None:
+            self.price_label.configure(text=f"Precio {self.symbol}: {tick['bid']:.5f}")
+        self.after(PRICE_REFRESH_MS, self._refresh_price)
+
+    # ---------------- Operaciones rapidas ---------------- #
+    def _send(self, descripcion, accion):
+        """Encola la orden en la pasarela y vigila el Future sin bloquear la interfaz"""
+        if self.order_gateway is None:
+            self.order_label.configure(text="Sin conexión con MT5", text_color="#F38BA8")
+            return
+        self.order_label.configure(text=f"{descripcion}...", text_color="#6C7086")
+        self._watch(descripcion, accion())
+
+    def _buy(self):
+        self._send(f"Compra {QUICK_VOLUME} {self.symbol}",
+                   lambda: self.order_gateway.buy(self.symbol, QUICK_VOLUME, comment="dashboard"))
+
+    def _sell(self):
+        self._send(f"Venta {QUICK_VOLUME} {self.symbol}",
+                   lambda: self.order_gateway.sell(self.symbol, QUICK_VOLUME, comment="dashboard"))
+
+    def _close_all(self):
+        self._send("Cerrar posiciones", lambda: self.order_gateway.close_all(comment="dashboard"))
+
+    def _watch(self, descripcion, future):
+        if not self.winfo_exists():
+            return
+        if not future.done():
+            self.after(ORDER_POLL_MS, self._watch, descripcion, future)
+            return
+        if future.cancelled():
+            self.order_label.configure(text=f"{descripcion}: cancelada", text_color="#F38BA8")
+        elif future.exception() is not None:
+            self.order_label.configure(text=f"{descripcion}: {future.exception()}", text_color="#F38BA8")
+        else:
+            resultado = future.result()
+            color = "#A6E3A1"
+            if isinstance(resultado, list):
+                cerradas, rechazadas, fallidas = close_summary(resultado)
+                texto = f"{descripcion}: {cerradas} cerradas"
+                if rechazadas or fallidas:
+                    texto += f", {rechazadas} rechazadas, {fallidas} sin respuesta"
+                    color = "#F38BA8"
+            else:
+                texto = f"{descripcion}: ejecutada a {resultado.price}"
+            self.order_label.configure(text=texto, text_color=color)
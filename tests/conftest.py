@@ -0,0 +1,53 @@
+# tests/conftest.py
+# Pruebas de regresion: se ejecutan desde la raiz del repositorio con `python -m pytest`
+
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from utils.loggers import logger as app_logger  # noqa: E402
+
+
+def synth(n=60_000, seed=0, start='2021-03-01'):
+    """Velas de M1 sinteticas (paseo aleatorio) con ATR de 14 periodos"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n, freq='1min')
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.random(n) * 0.0002
+    low = np.minimum(open_, close) - rng.random(n) * 0.0002
+    data = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close}, index=index)
+    previo = np.r_[np.nan, close[:-1]]
+    rango = np.maximum(high - low, np.maximum(abs(high - previo), abs(low - previo)))
+    data['ATR'] = pd.Series(rango, index=index).rolling(14).mean()
+    return data
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_log(tmp_path_factory):
+    """Los logs de las pruebas van a un archivo temporal y no a logs/app.log"""
+    originales = list(app_logger.handlers)
+    for h in originales:
+        app_logger.removeHandler(h)
+    ruta = tmp_path_factory.mktemp('logs') / 'app.log'
+    handler = logging.FileHandler(ruta, encoding='utf-8')
+    handler.setFormatter(originales[0].formatter if originales else None)
+    app_logger.addHandler(handler)
+    yield ruta
+    app_logger.removeHandler(handler)
+    handler.close()
+    for h in originales:
+        app_logger.addHandler(h)
+
+
+@pytest.fixture(scope='session')
+def m1_data():
+    return synth()
@@ -0,0 +1,60 @@
+# tests/test_backtest.py
+# Backtest vectorizado: mismas operaciones que el recorrido vela a vela
+
+import numpy as np
+import pytest
+
+from core.backtest import SALIDA_NINGUNA, SALIDA_SL, SALIDA_TP, first_exit, select_sequential
+from core.strategies.ict_money import strategy_class
+
+
+@pytest.mark.parametrize('risk', [0.0, 0.01])
+@pytest.mark.parametrize('sessions', [None, ['london', 'new_york']])
+def test_vectorized_matches_loop(m1_data, risk, sessions):
+    estrategia = strategy_class(m1_data.iloc[:30_000], 'EURUSD', 5, 0, 100000,
+                                risk=risk, sessions=sessions)
+    bucle = estrategia.run()
+    cash = estrategia.cash
+    vectorizado = estrategia.run(vectorized=True)
+    assert len(bucle) > 0
+    assert vectorizado == bucle
+    assert estrategia.cash == pytest.approx(cash, rel=1e-12)
+
+
+def _first_exit_loop(high, low, entries, direction, stop, target):
+    """Referencia vela a vela de first_exit"""
+    salidas, motivos = [], []
+    for e, d, sl, tp in zip(entries, direction, stop, target):
+        salida, motivo = -1, SALIDA_NINGUNA
+        for j in range(e + 1, len(high)):
+            toca_sl = low[j] <= sl if d == 1 else high[j] >= sl
+            toca_tp = high[j] >= tp if d == 1 else low[j] <= tp
+            if toca_sl or toca_tp:
+                salida, motivo = j, SALIDA_SL if toca_sl else SALIDA_TP
+                break
+        salidas.append(salida)
+        motivos.append(motivo)
+    return np.array(salidas), np.array(motivos)
+
+
+def test_first_exit_matches_reference(m1_data):
+    data = m1_data.iloc[:5000]
+    high, low, close = (data[c].to_numpy() for c in ('high', 'low', 'close'))
+    rng = np.random.default_rng(7)
+    entries = np.sort(rng.choice(len(data), size=300, replace=False))
+    direction = rng.choice([-1, 1], size=len(entries))
+    distancia = rng.uniform(0.0001, 0.004, size=len(entries))
+    stop = close[entries] - direction * distancia
+    target = close[entries] + direction * 2 * distancia
+
+    salida, motivo = first_exit(high, low, entries, direction, stop, target, window=8)
+    referencia = _first_exit_loop(high, low, entries, direction, stop, target)
+    np.testing.assert_array_equal(salida, referencia[0])
+    np.testing.assert_array_equal(motivo, referencia[1])
+    assert (salida == -1).any() and (motivo == SALIDA_TP).any()
+
+
+def test_select_sequential():
+    entries = np.array([1, 3, 5, 8, 9, 20])
+    exits = np.array([4, 6, 7, 9, 30, 25])
+    assert select_sequential(entries, exits).tolist() == [0, 2, 3, 5]
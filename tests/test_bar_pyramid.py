@@ -0,0 +1,78 @@
+# tests/test_bar_pyramid.py
+# Piramide de temporalidades: extend() equivale a reconstruir y se comparte por contenido
+
+import pandas as pd
+import pytest
+
+from core import bar_pyramid
+from core.bar_pyramid import TIMEFRAMES, BarPyramid, data_key, get_pyramid
+
+
+@pytest.fixture
+def velas(m1_data):
+    bar_pyramid.clear_cache()
+    # Con un hueco para que haya temporalidades sin velas intermedias
+    return m1_data.iloc[:20_000].drop(columns='ATR').drop(m1_data.index[5000:7000])
+
+
+def test_extend_matches_rebuild(velas):
+    completa = BarPyramid(velas)
+    # Cortes a mitad de vela de M15, H4 y D1
+    cortes = [3001, 3007, 9_999, 15_433, len(velas)]
+    piramide = BarPyramid(velas.iloc[:cortes[0]])
+    for a, b in zip(cortes, cortes[1:]):
+        piramide.extend(velas.iloc[a:b])
+
+    assert piramide.key == completa.key == data_key(velas)
+    pd.testing.assert_frame_equal(piramide['M1'], completa['M1'])
+    for tf in TIMEFRAMES:
+        pd.testing.assert_frame_equal(piramide[tf], completa[tf], check_freq=False)
+
+
+def test_extend_rejects_old_bars(velas):
+    piramide = BarPyramid(velas.iloc[:1000])
+    with pytest.raises(ValueError):
+        piramide.extend(velas.iloc[500:1500])
+
+
+def test_shared_by_content(velas):
+    piramide = get_pyramid(velas.iloc[:8000])
+    assert get_pyramid(velas.iloc[:8000].copy()) is piramide
+    piramide.extend(velas.iloc[8000:12_000])
+    assert get_pyramid(velas.iloc[:12_000]) is piramide
+    assert get_pyramid(velas.iloc[:8000]) is not piramide
+
+
+def test_key_covers_every_aggregated_column(velas):
+    con_volumen = velas.assign(tick_volume=1.0)
+    otro_volumen = con_volumen.copy()
+    otro_volumen.iloc[-1, otro_volumen.columns.get_loc('tick_volume')] = 2.0
+
+    claves = {data_key(velas), data_key(con_volumen), data_key(otro_volumen)}
+    assert len(claves) == 3
+    assert get_pyramid(otro_volumen) is not get_pyramid(con_volumen)
+
+    # Anexar conserva la misma clave que hashear todo de una vez
+    piramide = BarPyramid(con_volumen.iloc[:4000])
+    piramide.extend(con_volumen.iloc[4000:])
+    assert piramide.key == data_key(con_volumen)
+
+
+def test_key_is_memoized_per_frame(velas, monkeypatch):
+    data = velas.iloc[:8000].copy()
+    clave = data_key(data)
+    piramide = get_pyramid(data)
+    llamadas = []
+    original = bar_pyramid._row_bytes
+    monkeypatch.setattr(bar_pyramid, '_row_bytes', lambda *a: llamadas.append(1) or original(*a))
+
+    assert get_pyramid(data) is piramide
+    assert data_key(data) == clave and not llamadas
+    # Otro objeto con el mismo contenido se hashea, y da la misma clave
+    assert data_key(data.copy()) == clave and len(llamadas) == 1
+
+    ident = id(data)
+    # La cache de piramides tambien retiene el DataFrame base
+    bar_pyramid._cache.clear()
+    del data, piramide
+    assert ident not in bar_pyramid._claves
@@ -0,0 +1,27 @@
+# tests/test_benchmarks.py
+# Comparacion de la suite de benchmarks con la linea base
+
+from benchmarks.suite import compare, format_report
+
+
+def _resultados(**casos):
+    return {'results': {c: {'seconds': s, 'peak_bytes': m} for c, (s, m) in casos.items()}}
+
+
+def test_compare_flags_memory_regression():
+    base = _resultados(a=(1.0, 1000), b=(1.0, 1000))
+    actual = _resultados(a=(1.0, 1500), b=(1.0, 1050), c=(1.0, 10))
+    filas, regresion = compare(actual, base, threshold=0.10, memory_threshold=0.20)
+    estados = {f[0]: f[-1] for f in filas}
+    assert regresion
+    assert estados == {'a': 'MAS MEMORIA', 'b': 'igual', 'c': 'nuevo'}
+    assert 'MAS MEMORIA' in format_report(filas)
+
+
+def test_compare_time_and_memory_together():
+    base = _resultados(a=(1.0, 1000))
+    filas, regresion = compare(_resultados(a=(0.5, 2000)), base)
+    assert regresion and filas[0][-1] == 'mas rapido, MAS MEMORIA'
+    filas, regresion = compare(_resultados(a=(2.0, 500)), base)
+    assert regresion and filas[0][-1] == 'MAS LENTO, menos memoria'
+    assert not compare(_resultados(a=(1.05, 1050)), base)[1]
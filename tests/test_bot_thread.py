@@ -0,0 +1,90 @@
+# Bot en vivo: estrategia del registro sobre el broker simulado
+
+import calendar
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.bot_thread import BotThread
+from core.mt5_manager import MT5Manager, RateSync, SymbolSpecCache
+from core.mt5_sim import SimulatedBroker
+from core.ohlcv_store import OHLCVStore
+from core.order_gateway import OrderGateway, TRADE_RETCODE_DONE
+from core.strategy_registry import create_strategy
+
+INICIO = calendar.timegm((2024, 3, 4, 0, 0, 30))
+
+
+@pytest.fixture
+def entorno(tmp_path):
+    reloj = [INICIO]
+    broker = SimulatedBroker(seed=4, clock=lambda: reloj[0])
+    manager = MT5Manager(broker, sleep=lambda s: None)
+    gateway = OrderGateway(manager, rate=1000, burst=100)
+    gateway.start()
+    yield {
+        'reloj': reloj,
+        'broker': broker,
+        'manager': manager,
+        'gateway': gateway,
+        'sync': RateSync(manager, OHLCVStore(tmp_path / 'ohlcv'), history_days=2),
+        'specs': SymbolSpecCache(manager, path=tmp_path / 'specs.json'),
+    }
+    gateway.stop(timeout=2)
+
+
+def _bot(entorno, **kwargs):
+    return BotThread('ict_money', 'EURUSD', manager=entorno['manager'], rate_sync=entorno['sync'],
+                     gateway=entorno['gateway'], specs=entorno['specs'], **kwargs)
+
+
+def test_live_signals_match_bulk_signals(entorno):
+    bot = _bot(entorno, params={'velas_1M': 20}).prepare()
+    arranque = bot.last_bar
+    entorno['reloj'][0] += 86_400
+    procesadas = bot.step()
+    assert procesadas == 1440 and bot.last_bar == arranque + pd.Timedelta('1D')
+    assert bot.step() == 0
+
+    data = entorno['sync'].store.frame('EURUSD', 'M1')
+    data = data[data.index >= arranque - pd.Timedelta(days=bot.warmup_days)]
+    bloque = create_strategy('ict_money', 'EURUSD', 5, 0, 100000, velas_1M=20).signals(data)
+    nuevas = np.flatnonzero(data.index > arranque)
+    esperadas = [data.index[i] for i in nuevas if bloque['direccion'][i]]
+    assert [s['time'] for s in bot.signals] == esperadas
+    assert len(esperadas) > 1
+
+    # De un dia atrasado solo se opera la señal de la ultima vela
+    assert len(bot.orders) == int(bot.signals[-1]['time'] == bot.last_bar)
+
+
+def test_orders_follow_signals_bar_by_bar(entorno):
+    bot = _bot(entorno).prepare()
+    enviadas = []
+    for _ in range(360):
+        entorno['reloj'][0] += 60
+        antes = len(bot.orders), len(bot.signals)
+        assert bot.step() == 1
+        propias = [p for p in entorno['broker'].positions.values() if p.comment.startswith('ict_money')]
+        assert len(propias) <= 1
+        if len(bot.orders) > antes[0]:
+            # Cada orden sale de la señal de la vela recien cerrada
+            assert len(bot.signals) == antes[1] + 1 and bot.signals[-1]['time'] == bot.last_bar
+            enviadas.append((bot.signals[-1], bot.orders[-1].result(5)))
+
+    assert len(enviadas) > 1
+    for señal, resultado in enviadas:
+        assert resultado.retcode == TRADE_RETCODE_DONE
+        assert resultado.request['volume'] >= 0.01
+        assert resultado.request['sl'] == round(señal['stop'], 5)
+        assert resultado.request['tp'] == round(señal['objetivo'], 5)
+        assert resultado.request['comment'].startswith('ict_money#')
+
+
+def test_thread_runs_until_stopped(entorno):
+    bot = _bot(entorno, risk=0.0, interval=0.01)
+    bot.start()
+    bot.stop(timeout=5)
+    assert not bot.is_alive()
+    assert bot.strategy.velas_m1 == 30 and bot.last_bar is not None
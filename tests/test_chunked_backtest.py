@@ -0,0 +1,27 @@
+# tests/test_chunked_backtest.py
+# Backtest por bloques: mismas operaciones que el backtest en memoria
+
+import pytest
+
+from core.chunked_backtest import ChunkedBacktest
+from core.ohlcv_store import OHLCVStore
+from core.strategies.ict_money import strategy_class
+
+
+@pytest.mark.parametrize('chunk_rows', [997, 7777, 100_000])
+@pytest.mark.parametrize('risk', [0.0, 0.01])
+def test_chunked_matches_in_memory(m1_data, chunk_rows, risk):
+    data = m1_data.drop(columns='ATR')
+    estrategia = strategy_class(data, 'X', 5, 0, 1e5, risk=risk)
+    memoria = estrategia.run(vectorized=True)
+    bloques = ChunkedBacktest('X', 5, 0, 1e5, chunk_rows=chunk_rows, risk=risk)
+    assert bloques.run_frame(data) == memoria
+    assert bloques.cash == pytest.approx(estrategia.cash, rel=1e-12)
+
+
+def test_chunked_store_matches_frame(tmp_path, m1_data):
+    data = m1_data.iloc[:20_000].drop(columns='ATR')
+    store = OHLCVStore(tmp_path)
+    store.write('X', 'M1', data.assign(tick_volume=1))
+    bloques = ChunkedBacktest('X', 5, 0, 1e5, chunk_rows=3000)
+    assert bloques.run_store(store) == bloques.run_frame(data)
@@ -0,0 +1,80 @@
+# Modelo de costes: noches de swap con miercoles triple, swap y comisiones
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.costs import (pip_value, position_size, rollover_nights, swap_cost,
+                        trade_costs)
+from core.ledger import TradeLedger
+
+
+def _ns(*fechas):
+    return pd.DatetimeIndex(fechas).as_unit('ns').asi8
+
+
+@pytest.mark.parametrize('entrada, salida, noches', [
+    # Martes -> jueves: rollover del martes (1) y del miercoles (3)
+    ('2024-01-09 10:00', '2024-01-11 10:00', 4),
+    # Viernes -> lunes: solo el rollover del viernes, el fin de semana ya lo cobro el miercoles
+    ('2024-01-12 10:00', '2024-01-15 10:00', 1),
+    # Abierta y cerrada el mismo dia, aunque sea miercoles
+    ('2024-01-10 00:01', '2024-01-10 23:59', 0),
+    # Solo el rollover del miercoles
+    ('2024-01-10 23:00', '2024-01-11 01:00', 3),
+    # Semana completa de lunes a lunes: 1 + 1 + 3 + 1 + 1
+    ('2024-01-08 10:00', '2024-01-15 10:00', 7),
+    # Dos semanas desde el sabado: 7 noches por semana
+    ('2024-01-13 12:00', '2024-01-27 12:00', 14),
+])
+def test_rollover_nights(entrada, salida, noches):
+    assert rollover_nights(_ns(entrada), _ns(salida)).tolist() == [noches]
+
+
+def test_rollover_uses_broker_server_day():
+    # 22:30 UTC del martes ya es miercoles en un servidor UTC+2 (EET en invierno)
+    entrada, salida = _ns('2024-01-09 22:30'), _ns('2024-01-10 12:00')
+    assert rollover_nights(entrada, salida).tolist() == [1]
+    assert rollover_nights(entrada, salida, 'Europe/Athens').tolist() == [0]
+
+
+def test_swap_cost_per_direction():
+    # 2 lotes EURUSD, 4 noches: largo -6.5 puntos y corto +1.2 puntos por lote y noche
+    swaps = swap_cost(np.array([1, -1]), [2.0, 2.0], [4, 4], (-6.5, 1.2), 5, 100_000)
+    np.testing.assert_allclose(swaps, [-6.5 * 1e-5 * 100_000 * 2 * 4, 1.2 * 1e-5 * 100_000 * 2 * 4])
+    np.testing.assert_allclose(swaps, [-52.0, 9.6])
+
+
+def test_position_size_rounds_down_to_step():
+    # 1% de 10.000 con 20 pips de SL: 100 / (0.002 * 100.000) = 0.5 lotes
+    assert float(position_size(10_000, 0.01, 1.1000, 1.0980, 100_000)) == 0.5
+    # 0.03 / 0.01 no debe quedar en 0.02 por redondeo binario
+    assert float(position_size(30, 0.01, 1.1, 1.099, 10_000)) == 0.03
+    # SL en la entrada y volumen por encima del maximo
+    assert float(position_size(10_000, 0.01, 1.1, 1.1, 100_000)) == 0.01
+    assert float(position_size(1e9, 0.01, 1.1, 1.09, 100_000, max_volume=50)) == 50
+
+
+def test_trade_costs_from_ledger():
+    ledger = TradeLedger()
+    ledger.extend(
+        tipo=np.array([1, -1]),
+        fecha_entrada=_ns('2024-01-09 10:00', '2024-01-12 10:00'),
+        precio_entrada=np.array([1.1, 1.1]),
+        sl=np.array([1.09, 1.11]),
+        tp=np.array([1.12, 1.08]),
+        lotes=np.array([1.0, 0.5]),
+        fecha_salida=_ns('2024-01-11 10:00', '2024-01-15 10:00'),
+        precio_salida=np.array([1.12, 1.08]),
+        salida=np.array([1, 1]),
+        profit=np.array([2000.0, 1000.0]),
+        cash=np.array([12_000.0, 13_000.0]),
+    )
+    costes = trade_costs(ledger, 5, (-6.5, 1.2), 100_000, commission_per_lot=7.0)
+
+    assert costes['nights'].tolist() == [4, 1]
+    np.testing.assert_allclose(costes['pip_value'], [10.0, 5.0])
+    np.testing.assert_allclose(costes['swap'], [-26.0, 0.6])
+    np.testing.assert_allclose(costes['commission'], [7.0, 3.5])
+    np.testing.assert_allclose(costes['net_profit'], [2000 - 26 - 7, 1000 + 0.6 - 3.5])
+    np.testing.assert_allclose(pip_value([1.0], 3, 1000), [10.0])
@@ -0,0 +1,140 @@
+# tests/test_execution_sim.py
+# Simulador dentro de la vela: mismo resultado que un recorrido vela a vela
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.execution_sim import ExecutionSimulator
+from core.strategies.ict_money import LOTE_MINIMO, strategy_class
+
+
+def _reference(data, splipage, señales, ratio, risk, tamcontrato, cash):
+    """Recorrido vela a vela de run_intrabar: orden a mercado en la apertura siguiente y
+    SL/TP comprobados en el camino open -> low/high -> high/low -> close de cada vela"""
+    o, h, l, c = (data[k].to_numpy() for k in ('open', 'high', 'low', 'close'))
+    slip = np.nan_to_num(splipage)
+    n = len(c)
+    operaciones = []
+    candidatas = np.flatnonzero(señales['direccion'])
+    k = 0
+    while k < len(candidatas) and candidatas[k] + 1 < n:
+        i = candidatas[k]
+        d = int(señales['direccion'][i])
+        sl = señales['stop'][i].item()
+        j = i + 1
+        entrada = o[j] + d * slip[j]
+        distancia = d * (entrada - sl)
+        tp = entrada + d * ratio * distancia
+        if risk and not distancia > 0:
+            # Orden rechazada: el llenado quedo al otro lado del SL
+            k = int(np.searchsorted(candidatas, j, side='right'))
+            continue
+        lotes = cash * risk / (distancia * tamcontrato) if risk else LOTE_MINIMO
+
+        salida = None
+        for b in range(j, n):
+            # Hueco en la apertura
+            if (o[b] <= sl) if d == 1 else (o[b] >= sl):
+                salida = (b, o[b] - d * slip[b], 'sl')
+            elif (o[b] >= tp) if d == 1 else (o[b] <= tp):
+                salida = (b, o[b], 'tp')
+            else:
+                previo = o[b]
+                for p in ((l[b], h[b], c[b]) if c[b] >= o[b] else (h[b], l[b], c[b])):
+                    sube = p > previo
+                    if p == previo:
+                        continue
+                    if (d == 1 and sube and p >= tp) or (d == -1 and not sube and p <= tp):
+                        salida = (b, tp, 'tp')
+                    elif (d == 1 and not sube and p <= sl) or (d == -1 and sube and p >= sl):
+                        salida = (b, sl - d * slip[b], 'sl')
+                    if salida:
+                        break
+                    previo = p
+            if salida:
+                break
+        if salida is None:
+            salida = (n - 1, c[n - 1], 'fin')
+
+        b, precio, motivo = salida
+        profit = d * (precio - entrada) * lotes * tamcontrato
+        cash += profit
+        operaciones.append({
+            'tipo': 'buy' if d == 1 else 'sell', 'fecha_entrada': data.index[j],
+            'precio_entrada': entrada, 'sl': sl, 'tp': tp, 'lotes': lotes,
+            'fecha_salida': data.index[b], 'precio_salida': float(precio), 'salida': motivo,
+            'profit': float(profit), 'cash': cash,
+        })
+        if motivo == 'fin':
+            break
+        k = int(np.searchsorted(candidatas, b, side='right'))
+    return operaciones, cash
+
+
+@pytest.mark.parametrize('risk', [0.0, 0.01])
+def test_run_intrabar_matches_bar_loop(m1_data, risk):
+    data = m1_data.iloc[:30_000]
+    estrategia = strategy_class(data, 'EURUSD', 5, 0, 100000, risk=risk)
+    operaciones = estrategia.run_intrabar()
+    esperado, cash = _reference(data, estrategia._column('splipage'), estrategia._signals(),
+                                estrategia.ratio, risk, 100000, estrategia.initial_cash)
+    assert len(operaciones) > 10
+    assert list(operaciones) == esperado
+    assert estrategia.cash == cash
+    assert {op['salida'] for op in esperado} >= {'sl', 'tp'}
+
+
+def _velas(filas):
+    index = pd.date_range('2024-01-02', periods=len(filas), freq='1min')
+    return pd.DataFrame(filas, columns=['open', 'high', 'low', 'close'], index=index)
+
+
+@pytest.mark.parametrize('cierre, motivo, precio', [
+    (1.0015, 'sl', 0.9990),   # alcista: open -> low -> high, el SL llega antes
+    (0.9995, 'tp', 1.0020),   # bajista: open -> high -> low, el TP llega antes
+])
+def test_sl_and_tp_in_same_bar(cierre, motivo, precio):
+    data = _velas([(1.0, 1.0, 1.0, 1.0), (1.0, 1.0, 1.0, 1.0),
+                   (1.0, 1.0030, 0.9980, cierre)])
+    sim = ExecutionSimulator(data, 100000)
+    sim.submit(1, 'market', sl=0.9990, tp=1.0020, volume=1.0, bar=1)
+    sim.run()
+    [op] = list(sim.operations)
+    assert (op['salida'], op['precio_salida'], op['fecha_salida']) == (motivo, precio, data.index[2])
+    assert sim.flat
+
+
+def test_gaps_fill_at_the_open():
+    data = _velas([(1.0, 1.0, 1.0, 1.0), (1.0, 1.0, 1.0, 1.0), (1.0, 1.0005, 0.9995, 1.0),
+                   (0.9950, 0.9960, 0.9940, 0.9955),     # abre por debajo del SL de la compra
+                   (1.0100, 1.0110, 1.0090, 1.0100)])    # abre por encima del buy stop
+    sim = ExecutionSimulator(data, 100000, splipage=np.full(len(data), 0.0001))
+    sim.submit(1, 'market', sl=0.9990, tp=1.0050, volume=1.0, bar=1)
+    sim.submit(1, 'stop', price=1.0050, volume=1.0, bar=4)
+    sim.run()
+    compra = sim.operations[0]
+    assert compra['salida'] == 'sl'
+    assert compra['precio_salida'] == pytest.approx(0.9950 - 0.0001)
+    # La orden stop se llena en la apertura del hueco y sigue abierta al final
+    assert not sim.flat and len(sim.positions) == 1
+    assert sim.positions[0].entry == pytest.approx(1.0100 + 0.0001)
+    sim.close_all()
+    fin = sim.operations[-1]
+    assert (fin['salida'], fin['precio_salida'], fin['fecha_salida']) == ('fin', 1.0100, data.index[4])
+    assert sim.flat
+
+
+def test_flat_tracks_pending_orders():
+    data = _velas([(1.0, 1.0, 1.0, 1.0)] * 6)
+    sim = ExecutionSimulator(data, 100000)
+    assert sim.flat
+    limite = sim.submit(1, 'limit', price=0.9, volume=1.0, bar=1)
+    caduca = sim.submit(-1, 'limit', price=1.1, volume=1.0, bar=1, expires=2)
+    sim.run(until=1)
+    assert not sim.flat
+    sim.cancel(limite)
+    sim.cancel(limite)
+    assert not sim.flat
+    sim.run()
+    assert sim.orders[caduca].state == 'expired' and sim.flat
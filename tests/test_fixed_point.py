@@ -0,0 +1,41 @@
+# tests/test_fixed_point.py
+# Modo de punto fijo: mismos resultados que en float y mismos en todos los caminos
+
+import numpy as np
+import pytest
+
+from core.chunked_backtest import ChunkedBacktest
+from core.fixed_point import SUBPOINTS, to_points, to_units
+from core.strategies.ict_money import strategy_class
+
+
+@pytest.fixture(scope='module')
+def precios(m1_data):
+    data = m1_data.iloc[:20_000].copy()
+    for c in ('open', 'high', 'low', 'close'):
+        data[c] = data[c].round(5)
+    return data
+
+
+def test_sub_point_slippage_is_kept():
+    assert to_units(0.3e-5, 5) == int(0.3 * SUBPOINTS)
+    assert to_points(1.123456, 5) == 112346 * SUBPOINTS
+
+
+@pytest.mark.parametrize('risk', [0.0, 0.01])
+def test_fixed_point_matches_float(precios, risk):
+    flotante = strategy_class(precios, 'X', 5, 0, 1e5, risk=risk).run(vectorized=True)
+    fijo = strategy_class(precios, 'X', 5, 0, 1e5, risk=risk, fixed_point=True)
+    bucle = fijo.run()
+    vectorizado = fijo.run(vectorized=True)
+    bloques = ChunkedBacktest('X', 5, 0, 1e5, chunk_rows=7777, risk=risk,
+                              fixed_point=True).run_frame(precios)
+
+    assert len(flotante) > 0
+    assert bucle == vectorizado == bloques
+    a, b = flotante.rows, vectorizado.rows
+    assert np.array_equal(a['fecha_entrada'], b['fecha_entrada'])
+    assert np.array_equal(a['fecha_salida'], b['fecha_salida'])
+    # El slippage de la entrada es una fraccion de punto y no se redondea a cero
+    np.testing.assert_allclose(b['precio_entrada'], a['precio_entrada'], rtol=0, atol=1e-9)
+    assert not np.array_equal(b['precio_entrada'], np.rint(b['precio_entrada'] * 1e5) / 1e5)
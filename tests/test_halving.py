@@ -0,0 +1,26 @@
+# tests/test_halving.py
+# Successive halving / Hyperband sobre una rejilla pequeña
+
+import pytest
+
+from core.halving import SuccessiveHalving, _params_key, hyperband
+from core.optimizer import param_grid
+
+
+def test_hyperband_ranks_each_combination_once(m1_data):
+    grid = param_grid(velas_15M=[2, 3, 4], velas_1M=[10, 20, 30])
+    ranking = hyperband(m1_data.iloc[:6000], 'X', 5, 0, 1e5, grid, eta=3, workers=2, seed=1)
+    claves = [_params_key(r['params']) for r in ranking]
+    assert len(claves) == len(set(claves))
+    netos = [r['net_profit'] for r in ranking]
+    assert netos == sorted(netos, reverse=True)
+
+
+@pytest.mark.parametrize('buscar', [
+    lambda data, grid: SuccessiveHalving(data, 'X', 5, 0, 1e5, grid, workers=1, strategy='no_existe').run(),
+    lambda data, grid: hyperband(data, 'X', 5, 0, 1e5, grid, workers=1, seed=1, strategy='no_existe'),
+])
+def test_strategy_reaches_the_workers(m1_data, buscar):
+    # Los procesos crean la estrategia pedida: un nombre desconocido falla en ellos
+    with pytest.raises(KeyError, match='no_existe'):
+        buscar(m1_data.iloc[:3000], param_grid(velas_1M=[10, 20]))
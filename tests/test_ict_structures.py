@@ -0,0 +1,53 @@
+# Estructuras ICT: el tracker vela a vela da los mismos eventos que detect()
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.ict_structures import TIPOS, StructureTracker, detect
+
+
+def _incremental(data, k):
+    tracker = StructureTracker(k)
+    for fila in data[['open', 'high', 'low', 'close']].itertuples(index=False):
+        tracker.update(*fila)
+    return tracker.structures(data.index)
+
+
+@pytest.fixture(scope='module', params=['continuo', 'redondeado'])
+def velas(request, m1_data):
+    data = m1_data.iloc[:8000].copy()
+    if request.param == 'redondeado':
+        # Precios en pocos niveles para que haya empates en maximos, minimos y cierres
+        for c in ('open', 'high', 'low', 'close'):
+            data[c] = data[c].round(3)
+    return data
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 5])
+def test_tracker_matches_detect(velas, k):
+    bloque = detect(velas, lookback=k)
+    vela_a_vela = _incremental(velas, k)
+    for tipo in TIPOS:
+        esperado, obtenido = getattr(bloque, tipo), getattr(vela_a_vela, tipo)
+        assert len(esperado) > 0 or tipo == 'order_blocks'
+        np.testing.assert_array_equal(obtenido, esperado, err_msg=tipo)
+
+
+def test_upto_only_returns_confirmed_events(m1_data):
+    data = m1_data.iloc[:3000].tz_localize('UTC')
+    estructuras = detect(data, lookback=3)
+    corte = data.index[1500]
+    swings = estructuras.upto('swings', corte.tz_convert('Europe/Madrid'))
+    assert len(swings) and (swings['index'] <= 1500).all()
+    assert len(swings) == (estructuras.swings['index'] <= 1500).sum()
+    assert (swings['index'] - swings['origin'] == 3).all()
+
+
+def test_short_series():
+    data = pd.DataFrame({'open': [1.0, 1.1], 'high': [1.2, 1.3], 'low': [0.9, 1.0], 'close': [1.1, 1.2]},
+                        index=pd.date_range('2024-01-02', periods=2, freq='1min'))
+    for k in (1, 2):
+        bloque, vela_a_vela = detect(data, k), _incremental(data, k)
+        for tipo in TIPOS:
+            assert len(getattr(bloque, tipo)) == len(getattr(vela_a_vela, tipo)) == 0
@@ -0,0 +1,79 @@
+# tests/test_indicators.py
+# Indicadores: el calculo en bloque, vela a vela y por lotes dan los mismos numeros
+
+import numpy as np
+import pytest
+
+from core.indicators import ATR, EMA, MACD, RSI, atr, ema, macd, rsi
+
+N = 3000
+
+
+@pytest.fixture(scope='module')
+def velas(m1_data):
+    data = m1_data.iloc[:N]
+    return tuple(data[c].to_numpy() for c in ('high', 'low', 'close'))
+
+
+def _lotes(n, seed=0):
+    """Cortes aleatorios (incluidos lotes de una vela y lotes que cruzan la siembra)"""
+    rng = np.random.default_rng(seed)
+    cortes = np.unique(np.r_[0, 1, 5, 13, rng.integers(0, n, 40), n])
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def _bar_by_bar(indicador, *series):
+    return np.array([indicador.update(*valores) for valores in zip(*series)], dtype=np.float64)
+
+
+def _batches(indicador, *series):
+    partes = [indicador.update_batch(*(s[a:b] for s in series)) for a, b in _lotes(len(series[0]))]
+    if isinstance(partes[0], tuple):
+        return tuple(np.concatenate(p) for p in zip(*partes))
+    return np.concatenate(partes)
+
+
+def test_ema(velas):
+    close = velas[2]
+    bloque = ema(close, 20)
+    np.testing.assert_array_equal(_bar_by_bar(EMA(20), close), bloque)
+    np.testing.assert_array_equal(_batches(EMA(20), close), bloque)
+
+
+def test_ema_with_nan(velas):
+    # NaN al principio, dentro de la siembra y despues (sueltos y seguidos)
+    close = velas[2].copy()
+    close[:7] = np.nan
+    close[[15, 40, 41, 42, 500, 1999]] = np.nan
+    bloque = ema(close, 20)
+    assert np.isnan(bloque[:7 + 20]).all() and not np.isnan(bloque[7 + 21:]).any()
+    np.testing.assert_array_equal(_bar_by_bar(EMA(20), close), bloque)
+    np.testing.assert_array_equal(_batches(EMA(20), close), bloque)
+    # Lotes que terminan en un hueco
+    media = EMA(20)
+    partes = [media.update_batch(close[a:b]) for a, b in [(0, 41), (41, 42), (42, 43), (43, 500), (500, N)]]
+    np.testing.assert_array_equal(np.concatenate(partes), bloque)
+
+
+def test_atr(velas):
+    bloque = atr(*velas, period=14)
+    np.testing.assert_array_equal(_bar_by_bar(ATR(14), *velas), bloque)
+    np.testing.assert_array_equal(_batches(ATR(14), *velas), bloque)
+
+
+def test_rsi(velas):
+    close = velas[2]
+    bloque = rsi(close, 14)
+    np.testing.assert_array_equal(_bar_by_bar(RSI(14), close), bloque)
+    np.testing.assert_array_equal(_batches(RSI(14), close), bloque)
+
+
+def test_macd(velas):
+    close = velas[2]
+    bloque = macd(close)
+    vela = MACD()
+    valores = np.array([vela.update(c) for c in close], dtype=np.float64)
+    lotes = _batches(MACD(), close)
+    for k in range(3):
+        np.testing.assert_array_equal(valores[:, k], bloque[k])
+        np.testing.assert_array_equal(lotes[k], bloque[k])
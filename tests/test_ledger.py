@@ -0,0 +1,56 @@
+# tests/test_ledger.py
+# TradeLedger: anexar por bloques equivale a reconstruir operacion a operacion
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.ledger import DTYPE, TradeLedger
+from core.strategies.ict_money import strategy_class
+
+
+@pytest.fixture(scope='module')
+def operaciones(m1_data):
+    data = m1_data.iloc[:30_000].tz_localize('UTC').tz_convert('Europe/Madrid')
+    return strategy_class(data, 'EURUSD', 5, 0, 100000, risk=0.01).run(vectorized=True), data.index
+
+
+def test_extend_matches_append(operaciones):
+    ledger, index = operaciones
+    assert len(ledger) > 10
+
+    # Reconstruido desde los dicts, con la capacidad minima para forzar el crecimiento
+    uno_a_uno = TradeLedger(capacity=1)
+    for op in ledger:
+        uno_a_uno.append(op)
+
+    # Por bloques, con las fechas como posiciones dentro del indice
+    posiciones = {c: index.get_indexer(pd.to_datetime(ledger.rows[c], unit='ns', utc=True))
+                  for c in ('fecha_entrada', 'fecha_salida')}
+    bloques = TradeLedger(capacity=1)
+    for a in range(0, len(ledger), 7):
+        columnas = {c: ledger.rows[c][a:a + 7] for c in DTYPE.names}
+        columnas.update({c: p[a:a + 7] for c, p in posiciones.items()})
+        bloques.extend(index=index, **columnas)
+
+    assert uno_a_uno == ledger
+    assert bloques == ledger
+    assert uno_a_uno.tz == bloques.tz == ledger.tz == 'Europe/Madrid'
+    assert list(bloques) == list(ledger)
+    assert bloques[-1] == list(ledger)[-1]
+    assert bloques[2:5] == list(ledger)[2:5]
+
+
+def test_frame_and_stats_match_dicts(operaciones):
+    ledger, _ = operaciones
+    esperado = pd.DataFrame(list(ledger))
+    pd.testing.assert_frame_equal(ledger.to_frame()[esperado.columns], esperado, check_dtype=False)
+
+    stats = ledger.stats(100)
+    profit = esperado['profit']
+    equity = np.r_[100.0, esperado['cash']]
+    assert stats['trades'] == len(esperado)
+    assert stats['net_profit'] == pytest.approx(equity[-1] - 100)
+    assert stats['win_rate'] == pytest.approx((profit > 0).mean())
+    assert stats['max_drawdown'] == pytest.approx(
+        ((np.maximum.accumulate(equity) - equity) / np.maximum.accumulate(equity)).max())
@@ -0,0 +1,84 @@
+# Monte Carlo: reproducibilidad con semilla, casos degenerados y forma del resumen
+
+import numpy as np
+import pytest
+
+from core import monte_carlo
+from core.monte_carlo import PERCENTILES, MonteCarlo
+from core.strategies.ict_money import strategy_class
+
+
+@pytest.fixture(scope='module')
+def operaciones(m1_data):
+    ops = strategy_class(m1_data.iloc[:30_000], 'X', 5, 0, 1e5, risk=0.01).run(vectorized=True)
+    assert len(ops) > 10
+    return ops
+
+
+def _filas(profit, cash=1000.0):
+    """Operaciones de beneficio fijo encadenadas desde `cash`"""
+    profit = np.asarray(profit, dtype=np.float64)
+    return {'profit': profit, 'lotes': np.full(len(profit), 0.1), 'cash': cash + np.cumsum(profit)}
+
+
+@pytest.mark.parametrize('compound', [True, False])
+def test_seeded_runs_are_reproducible(operaciones, compound):
+    a = MonteCarlo(operaciones, 1e5, compound=compound, tamcontrato=1e5, seed=7)
+    b = MonteCarlo(operaciones, 1e5, compound=compound, tamcontrato=1e5, seed=7)
+    assert a.run(500, sigma=0.00005) == b.run(500, sigma=0.00005)
+
+    otra = MonteCarlo(operaciones, 1e5, compound=compound, seed=8).bootstrap(500)
+    assert not np.array_equal(a.bootstrap(500)['final'], otra['final'])
+
+
+def test_shuffle_keeps_the_final_cash(operaciones):
+    mc = MonteCarlo(operaciones, 1e5, compound=False, seed=1)
+    final = mc.shuffle(200)['final']
+    np.testing.assert_allclose(final, 1e5 + operaciones.rows['profit'].sum(), rtol=1e-12)
+
+
+def test_zero_variance_is_degenerate():
+    mc = MonteCarlo(_filas([10.0] * 50), 1000.0, compound=False, seed=3)
+    for resultado in (mc.shuffle(300), mc.bootstrap(300)):
+        np.testing.assert_allclose(resultado['final'], 1500.0)
+        assert not resultado['max_drawdown'].any()
+        assert not resultado['ruined'].any()
+        resumen = mc.summary(resultado)
+        assert resumen['final'] == pytest.approx(dict.fromkeys(PERCENTILES, 1500.0))
+        assert resumen['ruin_probability'] == resumen['loss_probability'] == 0.0
+
+    vacio = MonteCarlo(_filas([]), 1000.0, seed=3).bootstrap(10)
+    assert (vacio['final'] == 1000.0).all() and not vacio['ruined'].any()
+
+
+def test_ruin_and_loss_probability():
+    # Siempre se pierde: todas las simulaciones caen por debajo del 50 %
+    mc = MonteCarlo(_filas([-100.0] * 8), 1000.0, compound=False, ruin=0.5, seed=0)
+    resumen = mc.summary(mc.bootstrap(100))
+    assert resumen['ruin_probability'] == resumen['loss_probability'] == 1.0
+    assert resumen['max_drawdown'][50] == pytest.approx(0.8)
+
+
+def test_summary_percentiles(operaciones, monkeypatch):
+    # Bloques pequeños para recorrer el calculo por partes
+    monkeypatch.setattr(monte_carlo, 'MAX_CELDAS', 7 * len(operaciones))
+    mc = MonteCarlo(operaciones, 1e5, tamcontrato=1e5, seed=11)
+    resumen = mc.run(1000, sigma=0.00005)
+
+    assert set(resumen) == {'shuffle', 'bootstrap', 'slippage'}
+    for parte in resumen.values():
+        assert parte['simulations'] == 1000
+        for clave in ('final', 'max_drawdown'):
+            assert list(parte[clave]) == list(PERCENTILES)
+            valores = list(parte[clave].values())
+            assert valores == sorted(valores)
+        assert 0.0 <= parte['ruin_probability'] <= 1.0 and 0.0 <= parte['loss_probability'] <= 1.0
+        assert all(0.0 <= v <= 1.0 for v in parte['max_drawdown'].values())
+    # El slippage solo empeora: el percentil mas alto no supera el capital sin slippage
+    final = mc.initial_cash * np.prod(1.0 + mc.returns)
+    assert resumen['slippage']['final'][95] < final
+
+
+def test_slippage_needs_contract_size(operaciones):
+    with pytest.raises(ValueError):
+        MonteCarlo(operaciones, 1e5).slippage(10)
@@ -0,0 +1,77 @@
+# Sesion MT5: reconexion y reintentos solo de lectura
+
+import calendar
+from datetime import datetime
+
+import pytest
+
+from core.mt5_manager import MT5ConnectionError, MT5Manager
+from core.mt5_sim import ORDER_TYPE_BUY, TRADE_ACTION_DEAL, SimulatedBroker
+
+RELOJ = calendar.timegm((2024, 3, 1, 12, 0, 0))
+
+
+class DropAfterSend(SimulatedBroker):
+    """Ejecuta la orden y pierde la conexion antes de responder"""
+
+    def order_send(self, request):
+        super().order_send(request)
+        self.drop_connection()
+        return None
+
+
+def manager(broker):
+    return MT5Manager(broker, sleep=lambda s: None)
+
+
+def test_connect_retries_with_bounded_backoff():
+    esperas = []
+    m = MT5Manager(SimulatedBroker(fail_connects=3), base_delay=1, max_delay=2, sleep=esperas.append)
+    assert m.connect()
+    assert len(esperas) == 3
+    assert max(esperas) <= 2 * 1.2
+
+
+def test_connect_gives_up():
+    m = MT5Manager(SimulatedBroker(fail_connects=10), max_retries=3, sleep=lambda s: None)
+    with pytest.raises(MT5ConnectionError):
+        m.connect()
+
+
+def test_read_only_call_is_retried_after_reconnect():
+    b = SimulatedBroker(clock=lambda: RELOJ)
+    m = manager(b)
+    m.connect()
+    b.drop_connection()
+    assert m.account_info() is not None
+    assert m.reconnects == 1
+
+
+def test_order_send_is_never_repeated():
+    b = DropAfterSend(clock=lambda: RELOJ)
+    m = manager(b)
+    request = {'action': TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.01, 'type': ORDER_TYPE_BUY}
+    assert m.order_send(request) is None
+    assert m.reconnects == 1
+    assert len(m.positions()) == 1
+
+
+def test_rates_frame():
+    b = SimulatedBroker(clock=lambda: RELOJ)
+    df = manager(b).rates('EURUSD', 'M1', datetime(2024, 3, 1, 10), datetime(2024, 3, 1, 11))
+    assert len(df) == 61
+    assert list(df.columns[:4]) == ['open', 'high', 'low', 'close']
+
+
+@pytest.mark.parametrize('timeframe', ['M1', 'H1'])
+def test_current_bar_does_not_see_future_ticks(timeframe):
+    ahora = RELOJ + 25 * 60 + 17
+    b = SimulatedBroker(clock=lambda: ahora)
+    m = manager(b)
+    en_curso = m.last_rates('EURUSD', timeframe, 3).iloc[-1]
+    # La misma vela pedida mas tarde solo puede ampliar el rango
+    despues = SimulatedBroker(clock=lambda: ahora + 7200)
+    completa = manager(despues).rates('EURUSD', timeframe, en_curso.name, en_curso.name).iloc[0]
+    assert en_curso['close'] == m.symbol_tick('EURUSD').bid
+    assert en_curso['high'] <= completa['high'] and en_curso['low'] >= completa['low']
+    assert en_curso['tick_volume'] < completa['tick_volume']
@@ -0,0 +1,113 @@
+# Almacen columnar: escritura, anexado con solape, zonas horarias y recuperacion tras un fallo
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.ohlcv_store import OHLCVStore, open_descriptor
+
+COLUMNAS = ['open', 'high', 'low', 'close', 'ATR']
+
+
+@pytest.fixture
+def velas(m1_data):
+    # El almacen devuelve siempre ns
+    data = m1_data.iloc[:5000].copy()
+    data.index = data.index.as_unit('ns')
+    return data
+
+
+def _leer(store):
+    return store.frame('EURUSD', 'M1')
+
+
+def test_write_round_trip(tmp_path, velas):
+    store = OHLCVStore(tmp_path)
+    assert store.last_timestamp('EURUSD', 'M1') is None
+    store.write('eurusd', 'm1', velas)
+
+    assert store.meta('EURUSD', 'M1') == {'rows': 5000, 'columns': COLUMNAS}
+    pd.testing.assert_frame_equal(_leer(store), velas, check_freq=False, check_names=False)
+    assert store.first_timestamp('EURUSD', 'M1') == velas.index[0]
+    assert store.last_timestamp('EURUSD', 'M1') == velas.index[-1]
+
+    rango = store.frame('EURUSD', 'M1', velas.index[100], velas.index[199])
+    assert len(rango) == 100 and rango.index[0] == velas.index[100]
+    pd.testing.assert_frame_equal(open_descriptor(store.descriptor('EURUSD', 'M1', velas.index[100],
+                                                                   velas.index[199])), rango)
+
+
+def test_append_with_overlap(tmp_path, velas):
+    store = OHLCVStore(tmp_path)
+    store.write('EURUSD', 'M1', velas.iloc[:3000])
+    # Lectura abierta antes del anexado: sigue siendo valida
+    previo = _leer(store)
+
+    store.append('EURUSD', 'M1', velas.iloc[2500:4000])
+    store.append('EURUSD', 'M1', velas.iloc[:100])
+    store.append('EURUSD', 'M1', velas.iloc[4000:5000].drop(columns='ATR'))
+
+    leido = _leer(store)
+    assert store.meta('EURUSD', 'M1')['rows'] == 5000
+    assert leido.index.equals(velas.index)
+    pd.testing.assert_frame_equal(leido.iloc[:4000], velas.iloc[:4000], check_freq=False,
+                                  check_names=False)
+    assert leido['ATR'].iloc[4000:].isna().all()
+    np.testing.assert_array_equal(leido['close'], velas['close'])
+    assert len(previo) == 3000
+
+
+def test_tz_aware_input(tmp_path, velas):
+    store = OHLCVStore(tmp_path)
+    madrid = velas.tz_localize('UTC').tz_convert('Europe/Madrid')
+    store.write('EURUSD', 'M1', madrid.iloc[:3000])
+    # Solape en otra zona horaria y velas naive (UTC) a continuacion
+    store.append('EURUSD', 'M1', velas.tz_localize('UTC').tz_convert('America/New_York').iloc[2000:4000])
+    store.append('EURUSD', 'M1', velas.iloc[3500:])
+
+    leido = _leer(store)
+    assert leido.index.equals(velas.index)
+    np.testing.assert_array_equal(leido['close'], velas['close'])
+    assert store.last_timestamp('EURUSD', 'M1') == velas.index[-1]
+    assert len(store.frame('EURUSD', 'M1', madrid.index[10], madrid.index[19])) == 10
+
+
+def test_append_recovers_from_interrupted_write(tmp_path, velas):
+    store = OHLCVStore(tmp_path)
+    store.write('EURUSD', 'M1', velas.iloc[:3000])
+    carpeta = tmp_path / 'EURUSD' / 'M1'
+    # Un append anterior murio tras escribir parte de las columnas y antes de meta.json
+    for nombre in ('time.bin', 'open.bin', 'high.bin'):
+        with open(carpeta / nombre, 'ab') as f:
+            f.write(b'\x00' * 8 * 7)
+    assert json.loads((carpeta / 'meta.json').read_text())['rows'] == 3000
+
+    store.append('EURUSD', 'M1', velas.iloc[3000:])
+    leido = OHLCVStore(tmp_path).frame('EURUSD', 'M1')
+    pd.testing.assert_frame_equal(leido, velas, check_freq=False, check_names=False)
+    for nombre in ('time.bin', 'open.bin', 'ATR.bin'):
+        assert (carpeta / nombre).stat().st_size == 5000 * 8
+
+
+def test_strategy_reads_store_without_copying(tmp_path, velas):
+    from core.strategies.ict_money import strategy_class
+
+    store = OHLCVStore(tmp_path)
+    store.write('EURUSD', 'M1', velas)
+    mapas = store.arrays('EURUSD', 'M1')
+    data = store.frame('EURUSD', 'M1')
+
+    estrategia = strategy_class(data, 'EURUSD', 5, 0, 100000, copy=False)
+    assert estrategia.data is data
+    for nombre, precio in zip(('high', 'low', 'close'), estrategia._prices()):
+        assert np.shares_memory(precio, mapas[nombre])
+    for nombre in ('open', 'ATR'):
+        assert np.shares_memory(estrategia._column(nombre), mapas[nombre])
+    # Las columnas derivadas van aparte y las velas mapeadas no cambian
+    assert not np.shares_memory(estrategia._column('splipage'), mapas['ATR'])
+    assert list(data.columns) == COLUMNAS
+
+    copia = strategy_class(velas, 'EURUSD', 5, 0, 100000)
+    assert estrategia.run(vectorized=True) == copia.run(vectorized=True)
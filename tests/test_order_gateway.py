@@ -0,0 +1,151 @@
+# Pasarela de ordenes: envio unico, reconciliacion y cierre
+
+import calendar
+import time
+
+import pytest
+
+from core.mt5_manager import MT5ConnectionError, MT5Manager
+from core.mt5_sim import SimulatedBroker
+from core.order_gateway import OrderError, OrderGateway, TRADE_RETCODE_DONE, close_summary
+
+RELOJ = calendar.timegm((2024, 3, 1, 12, 0, 0))
+
+
+class DropAfterSend(SimulatedBroker):
+    """Ejecuta la orden pero se pierde la respuesta (caida justo despues)"""
+
+    def order_send(self, request):
+        super().order_send(request)
+        self.drop_connection()
+        return None
+
+
+class DropBeforeSend(SimulatedBroker):
+    """La conexion cae antes de que la orden llegue al servidor"""
+
+    def order_send(self, request):
+        self.drop_connection()
+        return super().order_send(request)
+
+
+@pytest.fixture
+def gateway_for():
+    creadas = []
+
+    def crear(broker):
+        g = OrderGateway(MT5Manager(broker, sleep=lambda s: None), rate=1000, burst=100, magic=77)
+        g.start()
+        creadas.append(g)
+        return g
+
+    yield crear
+    for g in creadas:
+        g.stop(timeout=2)
+
+
+def test_buy_sell_and_close(gateway_for):
+    b = SimulatedBroker(clock=lambda: RELOJ)
+    g = gateway_for(b)
+    compra = g.buy('EURUSD', 0.01).result(5)
+    venta = g.sell('GBPUSD', 0.02).result(5)
+    assert compra.retcode == venta.retcode == TRADE_RETCODE_DONE
+    assert g.close(compra.order).result(5).retcode == TRADE_RETCODE_DONE
+    assert [p.symbol for p in b.positions.values()] == ['GBPUSD']
+
+
+def test_rejected_order_raises(gateway_for):
+    g = gateway_for(SimulatedBroker(clock=lambda: RELOJ))
+    with pytest.raises(OrderError):
+        g.buy('EURUSD', 0.015).result(5)
+
+
+def test_lost_reply_is_reconciled_not_resent(gateway_for):
+    b = DropAfterSend(clock=lambda: RELOJ)
+    g = gateway_for(b)
+    resultado = g.buy('EURUSD', 0.01, comment='manual').result(5)
+    assert resultado.retcode == TRADE_RETCODE_DONE
+    assert len(b.positions) == 1
+    assert resultado.order in b.positions
+
+
+def test_lost_close_reply_is_reconciled(gateway_for):
+    b = SimulatedBroker(clock=lambda: RELOJ)
+    g = gateway_for(b)
+    ticket = g.buy('EURUSD', 0.01).result(5).order
+    b.__class__ = DropAfterSend
+    resultado = g.close(ticket).result(5)
+    assert resultado.retcode == TRADE_RETCODE_DONE
+    assert not b.positions
+
+
+def test_unsent_order_fails_without_retry(gateway_for):
+    b = DropBeforeSend(clock=lambda: RELOJ)
+    g = gateway_for(b)
+    with pytest.raises(MT5ConnectionError):
+        g.buy('EURUSD', 0.01).result(5)
+    assert not b.positions
+
+
+class SlowBroker(SimulatedBroker):
+    """Cada envio tarda `demora` segundos"""
+    demora = 0.2
+
+    def order_send(self, request):
+        time.sleep(self.demora)
+        return super().order_send(request)
+
+
+def wait_running(future):
+    while not future.running() and not future.done():
+        time.sleep(0.001)
+
+
+def test_stop_cancels_queued_orders():
+    b = SlowBroker(clock=lambda: RELOJ)
+    g = OrderGateway(MT5Manager(b, sleep=lambda s: None), rate=1000, burst=100)
+    g.start()
+    futuros = [g.buy('EURUSD', 0.01) for _ in range(5)]
+    wait_running(futuros[0])
+    assert g.stop(timeout=5) == 4
+    assert futuros[0].result(5).retcode == TRADE_RETCODE_DONE
+    assert all(f.cancelled() for f in futuros[1:])
+    assert len(b.positions) == 1
+    with pytest.raises(RuntimeError):
+        g.buy('EURUSD', 0.01)
+
+
+def test_stop_join_is_bounded():
+    b = SlowBroker(clock=lambda: RELOJ)
+    b.demora = 1.0
+    g = OrderGateway(MT5Manager(b, sleep=lambda s: None))
+    g.start()
+    f = g.buy('EURUSD', 0.01)
+    wait_running(f)
+    inicio = time.monotonic()
+    g.stop(timeout=0.1)
+    assert time.monotonic() - inicio < 0.5
+    assert f.result(5).retcode == TRADE_RETCODE_DONE
+
+
+class RejectGBP(SimulatedBroker):
+    def order_send(self, request):
+        if request['symbol'] == 'GBPUSD' and request.get('position'):
+            return self._result(10018, request, 'Market closed')
+        return super().order_send(request)
+
+
+def test_close_all_reports_rejections(gateway_for):
+    g = gateway_for(RejectGBP(clock=lambda: RELOJ))
+    for symbol in ('EURUSD', 'EURUSD', 'GBPUSD'):
+        g.buy(symbol, 0.01).result(5)
+    assert close_summary(g.close_all().result(5)) == (2, 1, 0)
+
+
+def test_close_all_fails_when_positions_cannot_be_read(gateway_for):
+    b = SimulatedBroker(clock=lambda: RELOJ)
+    g = gateway_for(b)
+    g.buy('EURUSD', 0.01).result(5)
+    b.drop_connection(fail_connects=100)
+    with pytest.raises(MT5ConnectionError):
+        g.close_all().result(5)
@@ -0,0 +1,68 @@
+# tests/test_portfolio.py
+# Cartera con cuenta comun: un simbolo reproduce strategy_class y varios comparten saldo y margen
+
+import numpy as np
+import pytest
+
+from core.portfolio import PortfolioBacktest
+from core.strategies.ict_money import strategy_class
+
+from conftest import synth
+
+
+def _spec(data):
+    return {'data': data, 'decimal': 5, 'swap': 0, 'tamcontrato': 100000}
+
+
+@pytest.mark.parametrize('risk', [0.0, 0.01])
+def test_single_symbol_matches_strategy(m1_data, risk):
+    data = m1_data.iloc[:30_000]
+    estrategia = strategy_class(data, 'EURUSD', 5, 0, 100000, risk=risk)
+    esperado = estrategia.run()
+
+    # Apalancamiento alto: el margen nunca limita a un solo simbolo
+    cartera = PortfolioBacktest({'EURUSD': _spec(data)}, cash=estrategia.initial_cash, risk=risk,
+                                leverage=10**9, workers=1)
+    operaciones = cartera.run()
+    assert cartera.rejected == 0
+    if not risk:
+        assert operaciones == esperado
+        assert cartera.cash == estrategia.cash
+    else:
+        # Con riesgo compuesto strategy_class aplica cash * (1 + risk * R) y la cartera
+        # lotes * movimiento: mismo resultado salvo el ultimo bit
+        a, b = operaciones.rows, esperado.rows
+        for campo in ('tipo', 'fecha_entrada', 'precio_entrada', 'sl', 'tp', 'fecha_salida',
+                      'precio_salida', 'salida'):
+            np.testing.assert_array_equal(a[campo], b[campo])
+        for campo in ('lotes', 'profit', 'cash'):
+            np.testing.assert_allclose(a[campo], b[campo], rtol=1e-12, atol=1e-12)
+        assert cartera.cash == pytest.approx(estrategia.cash, rel=1e-12)
+    assert set(cartera.trade_symbols) == {'EURUSD'}
+
+
+def test_shared_cash_and_margin_limit(m1_data):
+    simbolos = {'EURUSD': _spec(m1_data.iloc[:30_000]),
+                'GBPUSD': _spec(synth(30_000, seed=5))}
+    cartera = PortfolioBacktest(simbolos, cash=1000, risk=0.02, leverage=30, workers=2)
+    filas = cartera.run().rows
+    tc = 100000
+
+    assert set(cartera.trade_symbols) == {'EURUSD', 'GBPUSD'}
+    assert cartera.rejected > 0
+    assert cartera.cash == pytest.approx(1000 + filas['profit'].sum())
+
+    # Las salidas anteriores (o simultaneas) a cada entrada ya estan en el saldo comun
+    entrada, salida = filas['fecha_entrada'], filas['fecha_salida']
+    orden_salida = np.argsort(salida, kind='stable')
+    saldo = np.r_[1000.0, 1000 + np.cumsum(filas['profit'][orden_salida])]
+    saldo_previo = saldo[np.searchsorted(salida[orden_salida], entrada, side='right')]
+    distancia = np.abs(filas['precio_entrada'] - filas['sl'])
+    np.testing.assert_allclose(filas['lotes'], saldo_previo * 0.02 / (distancia * tc), rtol=1e-9)
+
+    # Posiciones de los dos simbolos abiertas a la vez y margen siempre cubierto
+    margen = filas['lotes'] * tc * filas['precio_entrada'] / 30
+    abiertas = (entrada[:, None] >= entrada[None, :]) & (entrada[:, None] < salida[None, :])
+    simbolos_abiertos = np.asarray(cartera.trade_symbols)
+    assert any(len(set(simbolos_abiertos[fila])) == 2 for fila in abiertas)
+    assert np.all(abiertas.astype(float) @ margen <= saldo_previo + 1e-9)
@@ -0,0 +1,66 @@
+# tests/test_rate_sync.py
+# Sincronizacion incremental de velas: huecos y fin de semana del mercado
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.mt5_manager import MT5ConnectionError, MT5Manager, RateSync
+from core.mt5_sim import SimulatedBroker
+from core.ohlcv_store import OHLCVStore
+
+
+def _semana(broker_tz):
+    """Velas de M1 del jueves al lunes con el cierre real del fin de semana (y el cambio
+    de hora de EEUU del domingo) y un hueco de dos horas el lunes"""
+    utc = pd.date_range('2024-03-07 00:00', '2024-03-08 21:59', freq='1min').append(
+        pd.date_range('2024-03-10 21:00', '2024-03-11 12:00', freq='1min'))
+    utc = utc[(utc < '2024-03-11 02:00') | (utc >= '2024-03-11 04:00')]
+    index = utc.tz_localize('UTC').tz_convert(broker_tz).tz_localize(None)
+    precio = np.linspace(1.08, 1.09, len(index))
+    return pd.DataFrame({'open': precio, 'high': precio, 'low': precio, 'close': precio,
+                         'tick_volume': 1}, index=index)
+
+
+@pytest.mark.parametrize('broker_tz', ['UTC', 'Europe/Athens'])
+def test_weekend_is_not_a_gap(tmp_path, broker_tz):
+    data = _semana(broker_tz)
+    store = OHLCVStore(tmp_path)
+    store.write('EURUSD', 'M1', data)
+    store.update_meta('EURUSD', 'M1', synced_from=str(data.index[0]), gaps_checked=[])
+
+    ultima = (data.index[-1] + pd.Timedelta('90s')).value // 10**9
+    broker = SimulatedBroker(seed=1, clock=lambda: ultima)
+    sync = RateSync(MT5Manager(broker, sleep=lambda s: None), store, broker_tz=broker_tz)
+    huecos = sync._gaps('EURUSD', 'M1', store.meta('EURUSD', 'M1'))
+
+    lunes = data.index[data.index.day == data.index[-1].day]
+    salto = np.flatnonzero(np.diff(lunes.values) > np.timedelta64(1, 'm'))[0]
+    assert huecos == [(lunes[salto].value, lunes[salto + 1].value)]
+
+    pedidas = []
+    manager = sync.manager
+    original = manager.call
+    manager.call = lambda metodo, *a, **k: (pedidas.append(metodo), original(metodo, *a, **k))[1]
+    assert sync.sync('EURUSD', 'M1') == 120
+    assert pedidas.count('copy_rates_range') == 1
+    assert sync._gaps('EURUSD', 'M1', store.meta('EURUSD', 'M1')) == []
+
+
+def test_without_tick_uses_last_stored_bar(tmp_path):
+    data = _semana('UTC').loc[:'2024-03-07']
+    store = OHLCVStore(tmp_path)
+    store.write('EURUSD', 'M1', data)
+    store.update_meta('EURUSD', 'M1', synced_from=str(data.index[0]), gaps_checked=[])
+
+    broker = SimulatedBroker(seed=1, clock=lambda: (data.index[-1] + pd.Timedelta('1D')).value // 10**9)
+    sync = RateSync(MT5Manager(broker, sleep=lambda s: None), store)
+    # Sin tick no se usa la hora local: no hay velas nuevas que pedir
+    sync.manager.symbol_tick = lambda symbol: None
+    assert sync._last_closed('EURUSD', 'M1', 60) == data.index[-1]
+    assert sync.sync('EURUSD', 'M1', start=data.index[0]) == 0
+    assert store.last_timestamp('EURUSD', 'M1') == data.index[-1]
+
+    # Sin tick ni velas guardadas no hay hora del servidor
+    with pytest.raises(MT5ConnectionError):
+        sync.sync('GBPUSD', 'M1')
@@ -0,0 +1,100 @@
+# Cache de resultados: clave, aciertos y version del codigo
+
+import ast
+import os
+from pathlib import Path
+
+import numpy as np
+
+from core import result_cache
+from core.result_cache import ResultCache
+
+CORE = Path(result_cache.__file__).parent
+
+
+def core_imports(ruta, vistos=None):
+    """Modulos de core importados (transitivamente) por un archivo, relativos a core/"""
+    vistos = set() if vistos is None else vistos
+    for nodo in ast.walk(ast.parse(ruta.read_text(encoding='utf-8'))):
+        nombres = []
+        if isinstance(nodo, ast.ImportFrom) and nodo.module:
+            nombres = [nodo.module]
+        elif isinstance(nodo, ast.Import):
+            nombres = [a.name for a in nodo.names]
+        for nombre in nombres:
+            if not nombre.startswith('core.'):
+                continue
+            relativo = nombre[len('core.'):].replace('.', '/') + '.py'
+            if relativo not in vistos and (CORE / relativo).exists():
+                vistos.add(relativo)
+                core_imports(CORE / relativo, vistos)
+    return vistos
+
+
+def test_code_version_covers_strategy_dependencies():
+    estrategia = CORE / 'strategies' / 'ict_money.py'
+    esperado = {(CORE / r).resolve() for r in core_imports(estrategia)} | {estrategia.resolve()}
+    assert set(result_cache.dependencies(estrategia)) == esperado
+    assert (CORE / 'indicators.py').resolve() in esperado
+
+
+def test_dependencies_follow_new_imports(tmp_path):
+    modulo = tmp_path / 'otra.py'
+    modulo.write_text("import numpy\n")
+    assert set(result_cache.dependencies(modulo)) == {modulo.resolve()}
+    modulo.write_text("import numpy\nfrom core import costs\n")
+    os.utime(modulo, ns=(1, 1))
+    assert (CORE / 'costs.py').resolve() in result_cache.dependencies(modulo)
+
+
+def test_run_hits_cache(tmp_path, m1_data):
+    data = m1_data.iloc[:20_000]
+    cache = ResultCache(tmp_path)
+    primera, meta = cache.run(data, 'EURUSD', 5, 0, 100000)
+    segunda, meta2 = cache.run(data, 'EURUSD', 5, 0, 100000)
+    assert len(primera) > 0
+    assert cache.hits == 1
+    assert meta['cash'] == meta2['cash']
+    np.testing.assert_array_equal(primera.rows, segunda.rows)
+
+
+def test_defaults_come_from_the_selected_strategy():
+    from core.strategy_registry import Strategy, registry
+
+    class Otra(Strategy):
+        def __init__(self, symbol, decimal, swap, tamcontrato, umbral=0.5, **params):
+            super().__init__(symbol, decimal, swap, tamcontrato, **params)
+
+    assert Otra.defaults() == {'umbral': 0.5}
+    ict = registry.get('ict_money').defaults()
+    assert ict['velas_1M'] == 30 and 'pyramid' not in ict and 'copy' not in ict
+
+
+def test_code_version_includes_strategy_module(tmp_path):
+    modulo = tmp_path / 'otra.py'
+    modulo.write_text("A = 1\n")
+    os.utime(modulo, ns=(1, 1))
+    antes = result_cache.code_version(modulo)
+    assert antes != result_cache.code_version()
+    assert result_cache.code_version(modulo) == antes
+    # Mismo tamaño: la version cambia porque cambia el mtime
+    modulo.write_text("A = 2\n")
+    os.utime(modulo, ns=(2, 2))
+    assert result_cache.code_version(modulo) != antes
+
+
+def test_key_includes_strategy_name(tmp_path, m1_data):
+    from core.strategy_registry import registry
+    from core.strategies.ict_money import ICTMoney
+
+    data = m1_data.iloc[:5000]
+    cache = ResultCache(tmp_path)
+    registry.register('ict_money_copia', ICTMoney)
+    try:
+        _, meta = cache.run(data, 'EURUSD', 5, 0, 100000)
+        _, otra = cache.run(data, 'EURUSD', 5, 0, 100000, strategy='ict_money_copia')
+    finally:
+        registry._clases.pop('ict_money_copia', None)
+    assert cache.hits == 0 and cache.misses == 2
+    assert meta['params']['strategy'] == 'ict_money' and otra['params']['strategy'] == 'ict_money_copia'
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == ['.json', '.json', '.npy', '.npy']
@@ -0,0 +1,67 @@
+# Calendario de sesiones: IDs por vela y cache por contenido del indice
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.sessions import (LONDON, NEW_YORK, NONE, DaySessions, clear_cache, session_ids,
+                           session_mask)
+
+
+def test_session_ids_follow_new_york_dst():
+    # 07:00 en Nueva York es 12:00 UTC en invierno y 11:00 UTC en verano
+    index = pd.DatetimeIndex(['2024-01-10 12:00', '2024-07-10 11:00', '2024-07-10 07:00'])
+    assert list(session_ids(index)) == [NEW_YORK, NEW_YORK, LONDON]
+
+
+def test_nat_is_outside_every_session():
+    index = pd.DatetimeIndex(['2024-01-10 12:00', pd.NaT])
+    assert list(session_ids(index)) == [NEW_YORK, NONE]
+
+
+def test_cache_is_keyed_on_index_content():
+    clear_cache()
+    base = pd.date_range('2024-01-02', periods=2100, freq='1min')
+    # Mismos extremos y longitud, con el hueco en otro sitio
+    a = base.delete(slice(100, 200))
+    b = base.delete(slice(1500, 1600))
+    assert len(a) == len(b) and a[0] == b[0] and a[-1] == b[-1]
+    assert (session_ids(a) != session_ids(b)).any()
+
+    for index in (a, b):
+        cacheada = session_mask(index, ['london', 'new_york'], symbol='EURUSD')
+        directa = session_mask(index, ['london', 'new_york'])
+        np.testing.assert_array_equal(cacheada, directa)
+
+
+@pytest.mark.parametrize('broker_tz', ['UTC', 'Europe/Athens'])
+def test_day_sessions_match_single_bar_mask(broker_tz):
+    # Dos cambios de hora en Europa y en EEUU, con el minuto inexistente de Atenas
+    index = pd.date_range('2024-03-08', '2024-04-02', freq='37min').append(
+        pd.date_range('2024-10-26', '2024-11-05', freq='37min'))
+    filtro = DaySessions(['london', 'new_york'], broker_tz)
+    vela_a_vela = [filtro(t) for t in index]
+    sola = [bool(session_mask(pd.DatetimeIndex([t]), ['london', 'new_york'], broker_tz)[0]) for t in index]
+    assert vela_a_vela == sola
+    assert any(vela_a_vela) and not all(vela_a_vela)
+
+    con_zona = index.tz_localize('UTC')
+    assert [filtro(t) for t in con_zona] == session_mask(con_zona, ['london', 'new_york']).tolist()
+
+
+def test_ambiguous_hours_fall_back_to_nat(monkeypatch):
+    # La hora repetida sola no se puede deducir: queda fuera de toda sesion
+    index = pd.DatetimeIndex(['2024-11-03 01:30', '2024-11-03 12:00'])
+    assert session_ids(index, 'America/New_York').tolist() == [NONE, NONE]
+
+    # Solo se reintenta con NaT por horas ambiguas: cualquier otro error no se oculta
+    original = pd.DatetimeIndex.tz_localize
+
+    def fallo(self, tz, ambiguous='raise', nonexistent='raise'):
+        if ambiguous == 'infer':
+            raise RuntimeError('fallo inesperado')
+        return original(self, tz, ambiguous=ambiguous, nonexistent=nonexistent)
+
+    monkeypatch.setattr(pd.DatetimeIndex, 'tz_localize', fallo)
+    with pytest.raises(RuntimeError):
+        session_ids(index, 'America/New_York')
@@ -0,0 +1,72 @@
+# Velas en memoria compartida: ida y vuelta, liberacion del bloque y barridos en paralelo
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import optimizer
+from core.halving import _params_key
+from core.optimizer import optimize, param_grid, run_task, worker_pool
+from core.shared_frame import SharedFrame, attach_frame
+
+
+def _existe(nombre):
+    try:
+        shm = shared_memory.SharedMemory(name=nombre)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'America/New_York'])
+def test_round_trip(m1_data, tz):
+    data = m1_data.iloc[:5000]
+    if tz is not None:
+        data = data.tz_localize('UTC').tz_convert(tz)
+    with SharedFrame(data) as compartido:
+        copia, shm = attach_frame(compartido.descriptor)
+        try:
+            pd.testing.assert_frame_equal(copia, data, check_freq=False)
+            assert str(copia.index.tz) == str(data.index.tz)
+            # Solo lectura y sin copiar: las columnas apuntan al bloque compartido
+            assert not copia['close'].to_numpy().flags.writeable
+            assert np.shares_memory(copia.to_numpy(), np.frombuffer(shm.buf, dtype=np.uint8))
+        finally:
+            del copia
+            shm.close()
+
+
+def test_unlinked_on_close(m1_data):
+    compartido = SharedFrame(m1_data.iloc[:100])
+    nombre = compartido.descriptor['name']
+    assert _existe(nombre)
+    compartido.close()
+    compartido.close()
+    assert not _existe(nombre)
+
+
+def test_unlinked_on_worker_error(m1_data, monkeypatch):
+    creados = []
+
+    class Registrado(SharedFrame):
+        def __init__(self, data):
+            super().__init__(data)
+            creados.append(self.descriptor['name'])
+
+    monkeypatch.setattr(optimizer, 'SharedFrame', Registrado)
+    with pytest.raises(KeyError):
+        with worker_pool(m1_data.iloc[:3000], 'X', 5, 0, 1e5, workers=2, strategy='no_existe') as pool:
+            pool.map(run_task, param_grid(velas_1M=[10, 20]))
+    assert len(creados) == 1 and not _existe(creados[0])
+
+
+def test_sweep_same_results_with_one_or_two_workers(m1_data):
+    data = m1_data.iloc[:8000]
+    grid = param_grid(velas_15M=[2, 3], velas_1M=[10, 30])
+    uno = sorted(optimize(data, 'X', 5, 0, 1e5, grid, workers=1), key=lambda r: _params_key(r['params']))
+    dos = sorted(optimize(data, 'X', 5, 0, 1e5, grid, workers=2), key=lambda r: _params_key(r['params']))
+    assert len(uno) == len(grid)
+    assert uno == dos
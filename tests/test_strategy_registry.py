@@ -0,0 +1,62 @@
+# tests/test_strategy_registry.py
+# Registro de estrategias: carga diferida y misma señal en bloque y vela a vela
+
+import sys
+
+import numpy as np
+import pytest
+
+from core.strategy_registry import StrategyRegistry, create_strategy
+
+
+def test_modules_load_on_first_use(tmp_path, monkeypatch):
+    paquete = tmp_path / 'estrategias_prueba'
+    paquete.mkdir()
+    (paquete / '__init__.py').write_text('')
+    (paquete / '_privada.py').write_text('raise ImportError')
+    (paquete / 'cruce.py').write_text(
+        'from core.strategy_registry import Strategy\n\n\n'
+        'class Cruce(Strategy):\n    pass\n\n\nSTRATEGY = Cruce\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    registro = StrategyRegistry('estrategias_prueba', paquete)
+    assert registro.available() == ['cruce']
+    assert 'estrategias_prueba.cruce' not in sys.modules
+    cls = registro.get('cruce')
+    assert cls.name == 'cruce' and registro.get('cruce') is cls
+    with pytest.raises(KeyError):
+        registro.get('_privada')
+
+
+@pytest.mark.parametrize('params', [{}, {'velas_15M': 5, 'velas_1M': 10, 'ratio': 3,
+                                         'sessions': ('london',)}])
+def test_on_bar_matches_signals(m1_data, params):
+    # Con velas ausentes, como en un historico real
+    data = m1_data.iloc[:30_000].drop(columns='ATR')
+    data = data[np.random.default_rng(2).random(len(data)) >= 0.03]
+    estrategia = create_strategy('ict_money', 'EURUSD', 5, 0, 100000, **params)
+    bloque = estrategia.signals(data)
+
+    filas = zip(data.index, *(data[c].to_numpy() for c in ('open', 'high', 'low', 'close')))
+    vela_a_vela = [estrategia.on_bar(*fila) for fila in filas]
+    con_señal = [i for i, s in enumerate(vela_a_vela) if s is not None]
+
+    assert con_señal == np.flatnonzero(bloque['direccion']).tolist()
+    assert len(con_señal) > 0
+    for i in con_señal:
+        s = vela_a_vela[i]
+        assert s['time'] == data.index[i]
+        assert s['direccion'] == bloque['direccion'][i]
+        for campo in ('entrada', 'stop', 'objetivo'):
+            assert s[campo] == bloque[campo][i], campo
+
+
+def test_ict_money_defaults_come_from_strategy_class():
+    from core.strategies.ict_money import ICTMoney
+
+    por_defecto = ICTMoney.defaults()
+    estrategia = create_strategy('ict_money', 'EURUSD', 5, 0, 100000)
+    assert (estrategia.velas_m15, estrategia.velas_m1, estrategia.ratio, estrategia.sessions,
+            estrategia.broker_tz) == tuple(por_defecto[k] for k in ('velas_15M', 'velas_1M', 'ratio',
+                                                                     'sessions', 'broker_tz'))
+    assert create_strategy('ict_money', 'EURUSD', 5, 0, 100000, velas_1M=12).velas_m1 == 12
@@ -0,0 +1,65 @@
+# tests/test_symbol_specs.py
+# Cache de especificaciones: una sola descarga, disco con TTL y refresco en segundo plano
+
+import pytest
+
+from core.mt5_manager import MT5Manager, SymbolSpecCache
+from core.mt5_sim import SimulatedBroker
+
+
+class CountingBroker(SimulatedBroker):
+    """Cuenta las descargas completas de simbolos"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.descargas = 0
+
+    def symbols_get(self, group=None):
+        self.descargas += 1
+        return super().symbols_get(group)
+
+
+@pytest.fixture
+def broker():
+    return CountingBroker(seed=1)
+
+
+def _cache(broker, path, reloj, ttl=3600):
+    return SymbolSpecCache(MT5Manager(broker, sleep=lambda s: None), path, ttl=ttl, clock=lambda: reloj[0])
+
+
+def test_single_download_then_disk(tmp_path, broker):
+    reloj = [1000.0]
+    ruta = tmp_path / 'specs.json'
+    cache = _cache(broker, ruta, reloj)
+    assert cache.get('EURUSD')['digits'] == 5
+    cache.get('GBPUSD')
+    assert broker.descargas == 1
+
+    # Otra instancia dentro del TTL no toca el terminal
+    otra = _cache(broker, ruta, reloj)
+    assert otra.symbols() == cache.symbols()
+    assert otra.strategy_params('EURUSD') == {
+        'decimal': 5, 'swap': (-5.0, 1.5), 'tamcontrato': 100000.0}
+    assert broker.descargas == 1
+
+
+def test_expired_specs_are_served_and_refreshed(tmp_path, broker):
+    reloj = [1000.0]
+    cache = _cache(broker, tmp_path / 'specs.json', reloj, ttl=60)
+    anterior = cache.get('EURUSD')
+    reloj[0] += 61
+    assert cache.expired()
+    # Se sirve la copia caducada sin esperar al terminal y se refresca aparte
+    assert cache.get('EURUSD') is anterior
+    cache._hilo.join(5)
+    assert broker.descargas == 2
+    assert not cache.expired()
+    assert cache.get('EURUSD') == anterior
+
+
+def test_unknown_symbol(tmp_path, broker):
+    cache = _cache(broker, tmp_path / 'specs.json', [0.0])
+    with pytest.raises(KeyError):
+        cache.get('NOEXISTE')
+    assert 'NOEXISTE' not in cache
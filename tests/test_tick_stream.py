@@ -0,0 +1,83 @@
+# tests/test_tick_stream.py
+# Buffers circulares de ticks y lectura incremental del terminal
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core.tick_stream import TICK_DTYPE, TickCursor, TickRing, TickStream
+
+
+def _ticks(n, seed=0):
+    """Ticks con varios en el mismo segundo y en el mismo milisegundo"""
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(n, dtype=TICK_DTYPE)
+    ticks['time_msc'] = 1_709_294_400_000 + np.cumsum(rng.integers(0, 300, n))
+    ticks['time'] = ticks['time_msc'] // 1000
+    ticks['bid'] = 1.08 + np.arange(n) * 1e-5
+    ticks['ask'] = ticks['bid'] + 1e-4
+    return ticks
+
+
+class Feed:
+    """Terminal falso: copy_ticks_from por segundos sobre los ticks ya publicados"""
+
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.publicados = 1
+
+    def symbol_tick(self, symbol):
+        t = self.ticks[0]
+        return SimpleNamespace(time=int(t['time']), time_msc=int(t['time_msc']))
+
+    def call(self, metodo, symbol, desde, count, flags):
+        visibles = self.ticks[:self.publicados]
+        i = int(np.searchsorted(visibles['time_msc'], desde * 1000, side='left'))
+        return visibles[i:i + count].copy()
+
+
+def test_ring_wraps_and_reads_in_order():
+    ring = TickRing('X', capacity=8)
+    cursor = TickCursor(ring)
+    ticks = _ticks(50)
+    leidos = []
+    for a in range(0, 50, 3):
+        ring.write(ticks[a:a + 3])
+        while True:
+            vista = cursor.read()
+            if not len(vista):
+                break
+            leidos.append(vista.copy())
+    assert cursor.lost == 0
+    np.testing.assert_array_equal(np.concatenate(leidos), ticks)
+    assert ring.latest() == ticks[-1]
+
+
+def test_slow_cursor_counts_lost_ticks():
+    ring = TickRing('X', capacity=8)
+    cursor = TickCursor(ring)
+    ticks = _ticks(30)
+    ring.write(ticks[:20])
+    primera = cursor.seq
+    vista = cursor.read()
+    assert cursor.lost == 12 and not ring.valid(primera) and ring.valid(12)
+    np.testing.assert_array_equal(vista, ticks[12:12 + len(vista)])
+    # Un bloque mayor que el buffer solo conserva el final
+    ring.write(ticks)
+    assert ring.seq == 50 and ring.oldest() == 42
+    with pytest.raises(ValueError):
+        TickRing('X', capacity=12)
+
+
+def test_poll_keeps_every_tick_once():
+    ticks = _ticks(5000, seed=3)
+    feed = Feed(ticks)
+    stream = TickStream(feed, ['EURUSD'], capacity=1 << 13, batch=50)
+    rng = np.random.default_rng(4)
+    while feed.publicados < len(ticks):
+        feed.publicados = min(len(ticks), feed.publicados + int(rng.integers(1, 120)))
+        stream.poll('EURUSD')
+    ring = stream.ring('EURUSD')
+    assert ring.seq == len(ticks)
+    np.testing.assert_array_equal(ring.data[:ring.seq], ticks)
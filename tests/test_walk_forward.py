@@ -0,0 +1,61 @@
+# Walk-forward: limites de las ventanas y validacion fuera de muestra independiente
+
+import pandas as pd
+import pytest
+
+from core.bar_pyramid import get_pyramid
+from core.optimizer import evaluate, param_grid
+from core.walk_forward import WalkForward
+
+GRID = param_grid(velas_1M=[20, 30], ratio=[2])
+
+
+@pytest.fixture(scope='module')
+def velas(m1_data):
+    return m1_data.iloc[:15_000]
+
+
+def test_fixed_windows(velas):
+    wf = WalkForward(velas, 'EURUSD', 5, 0, 100000, GRID, in_sample='4D', out_sample='2D')
+    ventanas = wf.windows()
+    inicio = velas.index[0]
+    # 10.4 dias de M1: ventanas que empiezan en los dias 0, 2, 4 y 6
+    assert len(ventanas) == 4
+    for k, ((i0, i1), (o0, o1)) in enumerate(ventanas):
+        desde = inicio + pd.Timedelta(days=2 * k)
+        assert velas.index[i0] == desde
+        assert i1 == o0 == velas.index.searchsorted(desde + pd.Timedelta('4D'))
+        assert o1 == min(len(velas), velas.index.searchsorted(desde + pd.Timedelta('6D')))
+    # La ultima validacion se recorta al final del historico
+    assert ventanas[-1][1] == (14_400, len(velas))
+
+    ancladas = WalkForward(velas, 'EURUSD', 5, 0, 100000, GRID, in_sample='4D', out_sample='2D',
+                           anchored=True).windows()
+    assert [v[1] for v in ancladas] == [v[1] for v in ventanas]
+    assert all(v[0][0] == 0 for v in ancladas)
+
+
+def test_out_of_sample_matches_independent_run(velas):
+    wf = WalkForward(velas, 'EURUSD', 5, 0, 100000, GRID, in_sample='4D', out_sample='2D',
+                     workers=2, strategy='ict_money')
+    resultados = list(wf.run())
+    assert [r['window'] for r in resultados] == list(range(4)) and wf.results == resultados
+
+    piramide = get_pyramid(velas)
+    for r, (dentro, fuera) in zip(resultados, wf.windows()):
+        evaluados = []
+        for params in GRID:
+            tramo = velas.iloc[dentro[0]:dentro[1]]
+            evaluados.append(evaluate(tramo, 'EURUSD', 5, 0, 100000, params,
+                                      pyramid=piramide.slice(tramo.index[0], tramo.index[-1])))
+        mejor = max(evaluados, key=lambda e: e['net_profit'])
+        assert r['params'] == mejor['params'] and r['in_sample_result'] == mejor
+
+        tramo = velas.iloc[fuera[0]:fuera[1]]
+        assert r['out_sample'] == (tramo.index[0], tramo.index[-1])
+        independiente = evaluate(tramo, 'EURUSD', 5, 0, 100000, r['params'],
+                                 pyramid=piramide.slice(tramo.index[0], tramo.index[-1]))
+        assert r['out_sample_result'] == independiente
+
+    resumen = wf.summary()
+    assert list(resumen['window']) == list(range(4))